@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the start up time of the bug checker command line.
+
+Each command is run in a new interpreter several times and the median wall time is reported. The "eager" commands
+import netmiko before the bug checker, as importing devices did before netmiko was imported on first connection, to
+show the time saved by informational commands which never connect to a device.
+
+Usage:
+    python benchmarks/bench_import.py --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "import bug_checker": ["-c", "import bug_checker"],
+    "import bug_checker (eager)": ["-c", "import netmiko, bug_checker"],
+    "bug_checker.py -l -s": [os.path.join(ROOT, "bug_checker.py"), "-l", "-s"],
+    "bug_checker.py -l -s (eager)": ["-c", "import netmiko, runpy, sys; sys.argv = ['bug_checker.py', '-l', '-s']; "
+                                           "runpy.run_path('bug_checker.py', run_name='__main__')"],
+}
+
+
+def bench(args, runs):
+    """
+    Run a python command several times in a new interpreter
+    :param args: arguments passed to python
+    :param runs: number of times to run the command
+    :return: median elapsed seconds
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def ssh_stack_loaded():
+    """
+    Check if importing bug_checker loads netmiko or paramiko
+    :return: list of the SSH modules loaded
+    """
+    code = "import sys, bug_checker; print(' '.join(m for m in ('netmiko', 'paramiko') if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return output.stdout.split()
+
+
+if __name__ == "__main__":
+
+    parse = argparse.ArgumentParser()
+    parse.add_argument("--runs", type=int, default=10, help="Number of runs of each command. Default is 10")
+    parse_args = parse.parse_args()
+
+    print(f"SSH modules loaded by import bug_checker: {ssh_stack_loaded() or 'none'}")
+    print(f"{'Command':<32} {'Median':>10}")
+
+    for name, args in COMMANDS.items():
+        print(f"{name:<32} {bench(args, parse_args.runs) * 1000:>8.1f}ms")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark of parsing the OS version from sh ver and sh sysinfo output.
+
+Compares the patterns the device classes used before devices.parsers, passed uncompiled to re.search on every call,
+with the precompiled line anchored patterns of devices.parsers. The output is either generated, padded to a number of
+lines to represent large stacked or clustered devices, or read from a corpus captured with --capture, in which case
+every sh ver and sh sysinfo output in the corpus is parsed by each pattern for its device type.
+
+Usage:
+    python benchmarks/bench_parse.py --lines 2000 --runs 200
+    python benchmarks/bench_parse.py --corpus corpus/
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from devices import Offline, parsers  # noqa: E402
+
+# patterns used by the device classes before devices.parsers
+LEGACY = {
+    "cisco_ios": r"Cisco IOS Software, .* Version ?(.*)",
+    "cisco_nxos": r"system:    version ?(.*)",
+    "cisco_asa": r"Cisco Adaptive Security Appliance Software Version ?(.*)",
+    "cisco_wlc": r"Product Version.................................. ?(.*)",
+}
+
+COMPILED = {
+    "cisco_ios": parsers.CISCO_IOS_VERSION,
+    "cisco_nxos": parsers.CISCO_NXOS_VERSION,
+    "cisco_asa": parsers.CISCO_ASA_VERSION,
+    "cisco_wlc": parsers.CISCO_WLC_VERSION,
+}
+
+COMMANDS = {"cisco_ios": "sh ver", "cisco_nxos": "sh ver", "cisco_asa": "sh ver", "cisco_wlc": "sh sysinfo"}
+
+
+def generate(lines):
+    """
+    Generate the version command output of each device type, with the version line after a number of other lines
+    :param lines: number of lines of output before the version line
+    :return: dictionary of device type to output
+    """
+    padding = "".join(f"GigabitEthernet1/0/{i} is up, line protocol is up, Version counters {i}\n" for i in range(lines))
+    sysinfo = "".join(f"Product Name{'.' * 37} Cisco Controller {i}\n" for i in range(lines))
+
+    return {
+        "cisco_ios": f"{padding}Cisco IOS Software, C2960 Software (C2960-LANBASEK9-M), Version 15.0(2)SE11, "
+                     f"RELEASE SOFTWARE (fc3)\n",
+        "cisco_nxos": f"{padding}  system:    version 7.0(3)I7(6)\n",
+        "cisco_asa": f"{padding}Cisco Adaptive Security Appliance Software Version 9.8(2)20\n",
+        "cisco_wlc": f"{sysinfo}Product Version{'.' * 34} 8.5.140.0\n",
+    }
+
+
+def load_corpus(directory):
+    """
+    Read the version command output of each device in a captured corpus
+    :param directory: corpus directory
+    :return: list of (device type, output)
+    """
+    outputs = []
+    for device_dir in sorted(Path(directory).iterdir()):
+        for device_type, command in COMMANDS.items():
+            file = device_dir / Offline.command_file(command)
+            if file.is_file():
+                outputs.append((device_type, file.read_text()))
+    return outputs
+
+
+def bench(outputs, parse, runs):
+    """
+    Parse each output several times
+    :param outputs: list of (device type, output)
+    :param parse: function called with the device type and output
+    :param runs: number of times to parse each output
+    :return: mean seconds per output
+    """
+    start = time.perf_counter()
+    for _ in range(runs):
+        for device_type, output in outputs:
+            parse(device_type, output)
+    return (time.perf_counter() - start) / (runs * len(outputs))
+
+
+def legacy(device_type, output):
+    match = re.search(LEGACY[device_type], output)
+    return match.group(1) if match else None
+
+
+def compiled(device_type, output):
+    return parsers.search(COMPILED[device_type], output)
+
+
+if __name__ == "__main__":
+
+    parse = argparse.ArgumentParser()
+    parse.add_argument("--lines", type=int, default=2000,
+                       help="Lines of generated output before the version line. Default is 2000")
+    parse.add_argument("--runs", type=int, default=200, help="Number of times each output is parsed. Default is 200")
+    parse.add_argument("--corpus", help="Corpus directory of captured output to parse instead of generated output")
+    parse_args = parse.parse_args()
+
+    if parse_args.corpus:
+        outputs = load_corpus(parse_args.corpus)
+        if not outputs:
+            sys.exit(f"No sh ver or sh sysinfo output found in {parse_args.corpus}")
+    else:
+        outputs = list(generate(parse_args.lines).items())
+
+    print(f"{'Device type':<12} {'Outputs':>8} {'KB':>8} {'Legacy':>12} {'Compiled':>12}")
+
+    for device_type in COMMANDS:
+        device_outputs = [o for o in outputs if o[0] == device_type]
+        if not device_outputs:
+            continue
+
+        for t, output in device_outputs:
+            if legacy(t, output) != compiled(t, output):
+                print(f"{device_type}: versions differ {legacy(t, output)!r} {compiled(t, output)!r}")
+
+        size = sum(len(o[1]) for o in device_outputs) / len(device_outputs) / 1024
+        legacy_time = bench(device_outputs, legacy, parse_args.runs)
+        compiled_time = bench(device_outputs, compiled, parse_args.runs)
+        print(f"{device_type:<12} {len(device_outputs):>8} {size:>8.1f} {legacy_time * 1e6:>10.1f}us "
+              f"{compiled_time * 1e6:>10.1f}us")
@@ -1,69 +1,224 @@
 #!/usr/bin/env python3
 
 import csv
+import functools
+import ipaddress
 import logging
 import argparse
+import contextlib
+import copy
+import itertools
+import multiprocessing
 import sys
 from bugs.bug_class_mapper import BugClassMapper
-from devices import DeviceClassMapper, ConnectionException
-from helpers import ThreadingHelper, DeviceHelper
+from bugs.bug_index import DeviceTypeIndex
+from devices import CachedConnection, DeviceClassMapper, ConnectionException, ConnectionTimeoutException, JumpHostPool
+from helpers import AdaptiveLimiter, CheckpointHelper, CorpusHelper, FactsHelper, ReachabilityHelper, ShardHelper, \
+    ThreadingHelper, TimingHelper, MetricsHelper, DeviceHelper
 
 _logger = logging.getLogger("BugChecker")
 
 
-def check_bug(device, bug_list):
+def check_bug(device, bug_list, capture_dir=None, type_index=None):
     """
     Method to check a bug against.
     :param device: device to connect to
     :type device: BaseBug
     :param bug_list: list of bugs to be checked
     :type bug_list: list
+    :param capture_dir: corpus directory to capture the command output to, for later offline evaluation
+    :type capture_dir: str
+    :param type_index: index of the device types the bugs apply to. Bugs which do not apply to the device type are
+                       recorded as not applicable without being checked. Default is an index of bug_list, built for
+                       this device
+    :type type_index: DeviceTypeIndex
     :return:
     """
 
+    # device already failed, such as being unreachable in the pre-flight sweep
+    if device.connection_error:
+        _logger.debug(f"{device.ipaddr} - Skipping bug checks: {device.connection_error}")
+        return device
+
+    # hostname and version which were not discovered during the checks are left unknown rather than reconnecting
+    device.lazy_connect = False
+
     try:
+        with device.timed(TimingHelper.DEVICE_PHASE):
+            _check_device(device, bug_list, capture_dir, type_index)
+
+    except ConnectionException as e:
+        device.connection_error = e
+
+    except ValueError as e:
+        device.connection_error = e
+
+    finally:
+        return device
+
+
+def _check_device(device, bug_list, capture_dir=None, type_index=None):
+    """
+    Connect to a device and check each bug within a single session, recording a timing span for each bug check and
+    disconnect
+    :raises ConnectionException: If unable to connect to the device
+    :raises ValueError: If a bug check is not supported on the device
+    """
+    bug_list = _skip_other_device_types(device, bug_list, type_index or DeviceTypeIndex(bug_list))
+    if not bug_list:
+        _logger.info(f"{device.ipaddr} - No bugs apply to device type {device.device_type}, skipping device")
+        return
+
+    # discovery and every bug check share a single connection, which is closed when the session exits
+    with device.session():
+        # bugs which do not require enable mode are checked first, so enable mode is entered at most once
+        bug_list = sorted(bug_list, key=lambda b: b.enable_mode_required())
+
+        # commands for each privilege level, sent in one batch before the first bug check at that level
+        batches = {False: [], True: []}
+        for bug in bug_list:
+            batches[bug.enable_mode_required()].extend(bug.commands())
 
-        device.connect()
         for bug in bug_list:
             bug = bug()
             _logger.info(f"{device.ipaddr} - Starting {bug.manufacture_bug_id()} bug check")
 
-            if bug.enable_mode_required():
-                _logger.debug(f"{device.ipaddr} - Enable mode required for {bug.manufacture_bug_id()}")
-                device.enter_enable_mode()
+            with device.timed(f"check:{bug.manufacture_bug_id()}"):
+                if bug.enable_mode_required():
+                    _logger.debug(f"{device.ipaddr} - Enable mode required for {bug.manufacture_bug_id()}")
+                    device.enter_enable_mode()
+
+                device.send_command_batch(batches.pop(bug.enable_mode_required(), []))
+
+                device.check_bug(bug)
 
-            device.check_bug(bug)
             _logger.info(f"{device.ipaddr} - Completed {bug.manufacture_bug_id()} bug check")
 
+        if capture_dir:
+            CorpusHelper.capture(device, capture_dir)
+
         _logger.debug(f"{device.ipaddr} - Disconnecting from device")
-        device.disconnect()
 
-    except ConnectionException as e:
-        device.connection_error = e
+    if device.handshakes > 1:
+        _logger.warning(f"{device.ipaddr} - Connected {device.handshakes} times, the connection was lost during checks")
 
-    except ValueError as e:
-        device.connection_error = e
 
-    finally:
-        return device
+def _skip_other_device_types(device, bug_list, type_index):
+    """
+    Record the bugs which do not apply to the device type as not applicable. Their impacted value is None, so the
+    Impacted column of the CSV is left empty rather than showing False, as for a device checked and not impacted
+    :return: list of the bugs which apply to the device
+    """
+    applicable = set(type_index.applicable(device.device_type))
+    remaining = []
+
+    for bug in bug_list:
+        if bug in applicable:
+            remaining.append(bug)
+        else:
+            device.bugs[bug.manufacture_bug_id()] = bug.Bug(None, f"Not applicable to {device.device_type}")
+            device.skipped_bugs.add(bug.manufacture_bug_id())
+
+    return remaining
 
 
-def main(devices, bug_list, worker_threads=4):
+def check_bug_failed(device, exception):
     """
-    Main run method.
-    :param devices: list of device objects to check
-    :type devices: list
+    Record a device check which raised an unexpected exception or timed out
+    :param device: device which failed
+    :type device: BaseDevice
+    :param exception: exception raised by the check
+    :type exception: Exception
+    :return: device with the connection_error set
+    """
+    _logger.error(f"{device.ipaddr} - Bug check failed: {exception!r}")
+
+    if isinstance(exception, TimeoutError):
+        # the check may still be running on the device, so the result is a copy of the device as it was
+        device = copy.copy(device)
+        device.bugs = dict(device.bugs)
+        device.skipped_bugs = set(device.skipped_bugs)
+        device.timings = list(device.timings)
+        device.connection = None
+
+    device.connection_error = exception
+    return device
+
+
+def check_bug_abort(device):
+    """
+    Abort a device check which timed out by closing its connection, so the check stops rather than running on
+    :param device: device whose check timed out
+    :type device: BaseDevice
+    """
+    device.abort()
+
+
+def check_bug_feedback(device, latency_target=None):
+    """
+    Determine if a checked device shows signs of overload, used to adapt the number of devices checked at the same
+    time. Timeouts, refused connections and slow connection attempts indicate that jump hosts or the network are
+    congested. Failed authentication, and connections slowed by trying several credential sets, do not.
+    :param device: checked device
+    :type device: BaseDevice
+    :param latency_target: seconds a connection attempt should take. Default is no latency target
+    :type latency_target: float
+    :return: bool - False if the device shows signs of overload
+    """
+    if isinstance(device.connection_error, TimeoutError):
+        return False
+    elif isinstance(device.connection_error, ConnectionTimeoutException) and device.connect_attempts:
+        # refused connections are reported as timeouts. Devices which were skipped before connecting, such as
+        # unreachable devices, do not indicate overload
+        return False
+    elif latency_target and device.connect_time and device.connect_time / device.connect_attempts > latency_target:
+        return False
+    else:
+        return True
+
+
+def scan(devices, bug_list, worker_threads=4, device_timeout=None, capture_dir=None, limiter=None,
+         latency_target=None, group_limit=None, timings=None, metrics=None):
+    """
+    Generator which checks devices concurrently, yielding each device as soon as its checks complete.
+
+    Devices are read lazily from the iterable, so a generator such as iter_csv() keeps memory flat regardless of the
+    number of devices.
+    :param devices: iterable of device objects to check
+    :type devices: iterable
     :param bug_list: list of bugs to check on the object
     :type bug_list: list
     :param worker_threads: Number of worker threads to use. Default is 4
     :type worker_threads: int
-    :return: List of devices containing the results of the bug checks
+    :param device_timeout: Seconds a single device check may take before it is abandoned. Default is no timeout
+    :type device_timeout: float
+    :param capture_dir: corpus directory to capture the command output to, for later offline evaluation
+    :type capture_dir: str
+    :param limiter: adapts the number of devices checked at the same time, between its min and max limits, instead
+                    of using worker_threads
+    :type limiter: AdaptiveLimiter
+    :param latency_target: seconds a connection attempt should take before the limiter treats it as overload
+    :type latency_target: float
+    :param group_limit: maximum number of devices of the same group (device.group) checked at the same time. Devices
+                        without a group are not limited
+    :type group_limit: int
+    :param timings: aggregates the timing spans of each checked device
+    :type timings: TimingHelper
+    :param metrics: exposes the progress of the scan as it runs
+    :type metrics: MetricsHelper
+    :return: generator of devices containing the results of the bug checks, in order of completion
     """
 
     _logger.info(f"Starting Bug Checker")
     _logger.info(f"-Bug List: {bug_list}")
     _logger.info(f"-Worker Threads: {worker_threads}")
-    _logger.info(f"-Number of Devices: {len(devices)}")
+    _logger.info(f"-Device Timeout: {device_timeout}")
+    if limiter:
+        _logger.info(f"-Adaptive Concurrency: {limiter.min_limit} to {limiter.max_limit}, starting at {limiter.limit}")
+    if group_limit:
+        _logger.info(f"-Group Limit: {group_limit}")
+    if isinstance(devices, list):
+        _logger.info(f"-Number of Devices: {len(devices)}")
 
     # if bug_ids is not a list, convert it to list
     if not isinstance(bug_list, list):
@@ -71,56 +226,160 @@ def main(devices, bug_list, worker_threads=4):
 
     bugs = BugClassMapper.get_bug_class(bug_list)
 
-    args = {"bug_list": bugs}
+    args = {"bug_list": bugs, "capture_dir": capture_dir, "type_index": DeviceTypeIndex(bugs)}
+
+    worker_func = check_bug
+    if metrics:
+        worker_func = metrics.instrument(check_bug)
+        devices = metrics.queue(devices)
 
     _logger.debug(f"Starting worker threads")
-    th = ThreadingHelper(worker_func=check_bug, worker_func_args=args, num_of_workers=worker_threads)
-    devices = th.run(devices)
-    _logger.debug(f"Worker threads completed")
-    return devices
+    th = ThreadingHelper(worker_func=worker_func, worker_func_args=args, num_of_workers=worker_threads,
+                         timeout=device_timeout, failure_func=check_bug_failed, abort_func=check_bug_abort,
+                         limiter=limiter,
+                         feedback_func=functools.partial(check_bug_feedback, latency_target=latency_target),
+                         group_func=lambda d: d.group, group_limit=group_limit)
+
+    CachedConnection.reset_totals()
+
+    count = 0
+    connect_attempts = 0
+    for device in th.imap(devices):
+        count += 1
+        connect_attempts += device.connect_attempts
+        if timings:
+            timings.update(device)
+        if metrics:
+            metrics.update(device)
+        yield device
+
+    _logger.info(f"Completed checking {count} devices")
+    if count:
+        _logger.info(f"Connection attempts: {connect_attempts}, {connect_attempts / count:.2f} per device")
+    if limiter:
+        _logger.info(f"Concurrency limit finished at {int(limiter.limit)}, peak {limiter.peak_limit}")
+    _logger.info(f"Command cache hits: {CachedConnection.total_hits} misses: {CachedConnection.total_misses}")
+
+
+def main(devices, bug_list, worker_threads=4, device_timeout=None, timings_file=None, metrics_port=None):
+    """
+    Main run method. A summary of the time taken by each phase of the device checks is printed once all devices have
+    been checked.
+    :param devices: list of device objects to check
+    :type devices: list
+    :param bug_list: list of bugs to check on the object
+    :type bug_list: list
+    :param worker_threads: Number of worker threads to use. Default is 4
+    :type worker_threads: int
+    :param device_timeout: Seconds a single device check may take before it is abandoned. Default is no timeout
+    :type device_timeout: float
+    :param timings_file: location to export the timing summary to as JSON
+    :type timings_file: str
+    :param metrics_port: port to serve Prometheus metrics on while the devices are checked. Default is no metrics
+    :type metrics_port: int
+    :return: List of devices containing the results of the bug checks
+    """
 
+    timings = TimingHelper()
+    metrics = MetricsHelper(port=metrics_port) if metrics_port is not None else None
 
-def read_csv(input_file, credentials):
+    with metrics or contextlib.nullcontext():
+        checked_devices = list(scan(devices, bug_list, worker_threads, device_timeout, timings=timings,
+                                    metrics=metrics))
+
+    timings.print_summary()
+    if timings_file:
+        timings.export(timings_file)
+
+    return checked_devices
+
+
+def device_group(row, group_column=None, group_prefix=None):
     """
-    Read a CSV to create a list of devices to check.
+    Get the concurrency group of a CSV row, either the value of a column such as the site, or the subnet of the IP
+    address.
+    :param row: CSV row
+    :type row: dict
+    :param group_column: column containing the group. Used in preference to group_prefix when the row has a value
+    :type group_column: str
+    :param group_prefix: prefix length of the subnet used as the group, for example 24
+    :type group_prefix: int
+    :return: str - group, or None if the row has no group
+    """
+    if group_column and row.get(group_column):
+        return row[group_column]
+
+    if group_prefix is not None:
+        try:
+            return str(ipaddress.ip_network(f"{row['IP Address']}/{group_prefix}", strict=False))
+        except ValueError:
+            _logger.warning(f"{row['IP Address']} - Unable to derive subnet group from IP address")
+
+    return None
+
+
+def iter_csv(input_file, credentials, group_column=None, group_prefix=None, **device_kwargs):
+    """
+    Generator which reads a CSV one row at a time, yielding a device to check for each row.
 
     CSV File must contain a column titled "IP Address"
     :param input_file:  CSV file location
     :type input_file: str
     :param credentials: credentails to be used to connect to the devices.
     :type credentials: list
-    :return: List of Devices
+    :param group_column: column containing the concurrency group of each device, such as the site
+    :type group_column: str
+    :param group_prefix: prefix length of the subnet used as the concurrency group of each device, when the device
+                         has no group_column value
+    :type group_prefix: int
+    :param device_kwargs: additional kwargs passed to each device, such as parallel_logins
+    :return: generator of Devices
     """
 
-    devices = []
-
     # Read CSV file and write each row to a Device Obect
     with open(input_file) as csv_file:
         reader = csv.DictReader(csv_file)
         for row in reader:
 
             # Get device class, If no column exists then use autodetect type of device
-            try:
-                device_type = row["Device Type"]
-                device = DeviceClassMapper.get_device_class(device_type)
-            except IndexError:
-                device = DeviceClassMapper.get_device_class("AutoDetect")
+            device = DeviceClassMapper.get_device_class(row.get("Device Type"))
 
-            device = device(credentials=credentials, ipaddr=row["IP Address"])
-            devices.append(device)
+            yield device(credentials=credentials, ipaddr=row["IP Address"],
+                         group=device_group(row, group_column, group_prefix), **device_kwargs)
 
-    return devices
+
+def read_csv(input_file, credentials, group_column=None, group_prefix=None):
+    """
+    Read a CSV to create a list of devices to check.
+
+    CSV File must contain a column titled "IP Address"
+    :param input_file:  CSV file location
+    :type input_file: str
+    :param credentials: credentails to be used to connect to the devices.
+    :type credentials: list
+    :param group_column: column containing the concurrency group of each device, such as the site
+    :type group_column: str
+    :param group_prefix: prefix length of the subnet used as the concurrency group of each device, when the device
+                         has no group_column value
+    :type group_prefix: int
+    :return: List of Devices
+    """
+
+    return list(iter_csv(input_file, credentials, group_column, group_prefix))
 
 
 def write_csv(output_file, bug_list, devices):
     """
-    Writes the checked devices results to a CSV file
+    Writes the checked devices results to a CSV file.
+
+    Each row is flushed as soon as it is written, so when devices is a generator such as scan() the file can be
+    tailed while the remaining devices are checked.
     :param output_file: location of CSV file to be saved
     :type output_file: str
     :param bug_list: List of bugs been checked. Used to create coulmns for the results
     :type bug_list: list
-    :param devices: list of devices to write to the CSV file
-    :type devices: list
+    :param devices: devices to write to the CSV file
+    :type devices: iterable
     :return:
     """
 
@@ -128,6 +387,9 @@ def write_csv(output_file, bug_list, devices):
     if not isinstance(bug_list, list):
         bug_list = [bug_list]
 
+    # results are stored against the manufacture bug id, which may differ in case to the bug id passed in
+    bug_ids = [b.manufacture_bug_id() for b in BugClassMapper.get_bug_class(bug_list)]
+
     rows = ["Hostname", "IP Address", "OS Version", "Connection Error"]
 
     for b in bug_list:
@@ -147,11 +409,12 @@ def write_csv(output_file, bug_list, devices):
 
                 row = [device.hostname, device.ipaddr, device.version, device.connection_error]
 
-                for bug in bug_list:
+                for bug in bug_ids:
                     row.append(device.bugs[bug].impacted)
                     row.append(device.bugs[bug].output)
 
             wr.writerow(row)
+            csvfile.flush()
 
 
 def print_bug_detail(bug_list):
@@ -188,7 +451,7 @@ def print_bug_summary():
     for b in BugClassMapper.get_bug_class():
         affected_devices = b.affected_devices()
         print(
-            f"| {b.manufacture():^13} | {b.manufacture_bug_id():^13} | {b.cve_id():^15} | {b.bug_severity():^10} | {affected_devices[0]:^15} | {b.enable_mode_required():^13} | {b.remediate_implemented():^14} |")
+            f"| {b.manufacture() or '':^13} | {b.manufacture_bug_id():^13} | {b.cve_id() or '':^15} | {b.bug_severity():^10} | {affected_devices[0]:^15} | {b.enable_mode_required():^13} | {b.remediate_implemented():^14} |")
 
         for a in affected_devices[1:len(affected_devices)]:
             print(
@@ -197,6 +460,112 @@ def print_bug_summary():
         print("-" * 115)
 
 
+def run_checks(options, credentials=None, shard=None, save_facts=True):
+    """
+    Check the devices of a scan and write the results to the output CSV, as specified by the command line options.
+
+    When a shard is given only the devices assigned to the shard are checked, and the results and journal are written
+    to shard files which can be merged with ShardHelper.merge().
+    :param options: parsed command line options
+    :type options: argparse.Namespace
+    :param credentials: credentials used to connect to the devices. Not required when checking an offline corpus
+    :type credentials: list
+    :param shard: zero based shard index and number of shards to check
+    :type shard: tuple
+    :param save_facts: if False the facts cache is not saved, and the updates are returned to be merged instead
+    :type save_facts: bool
+    :return: dictionary of facts cache updates if save_facts is False, otherwise None
+    """
+
+    output_file = options.outputcsv
+    journal_file = options.journal
+    timings_file = options.timings
+
+    if shard:
+        output_file = ShardHelper.shard_file(output_file, *shard)
+        if journal_file:
+            journal_file = ShardHelper.shard_file(journal_file, *shard)
+        if timings_file:
+            timings_file = ShardHelper.shard_file(timings_file, *shard)
+
+    journal_file = journal_file or f"{output_file}.journal"
+
+    # connections to the jump hosts are shared by every device checked by this process
+    jump_hosts = None
+    if options.jumphost and not options.offline:
+        jump_hosts = JumpHostPool(options.jumphost, key_file=options.jumphostkey,
+                                  connections=options.jumphostconnections, channels=options.jumphostchannels)
+
+    def read_devices():
+        if options.offline:
+            devices = CorpusHelper.iter_devices(options.offline)
+        else:
+            devices = iter_csv(options.inputcsv, credentials, options.groupcolumn, options.groupprefix,
+                               parallel_logins=options.parallellogins, jump_hosts=jump_hosts)
+
+        if shard:
+            devices = ShardHelper.select(devices, *shard)
+
+        return devices
+
+    bug_ids = [b.manufacture_bug_id() for b in BugClassMapper.get_bug_class(options.bugid)]
+
+    facts = None
+    if options.factscache:
+        facts = FactsHelper(options.factscache, ttl=options.factsttl * 3600)
+
+    limiter = None
+    if options.adaptive:
+        limiter = AdaptiveLimiter(min_limit=options.minworkers, max_limit=options.maxworkers,
+                                  initial_limit=options.workerthreads)
+
+    # each process serves its own metrics, on consecutive ports
+    metrics = None
+    if options.metricsport is not None:
+        port = options.metricsport + (shard[0] if shard and options.processes > 1 else 0)
+        metrics = MetricsHelper(port=port, host=options.metricshost, limiter=limiter)
+
+    timings = TimingHelper()
+
+    with CheckpointHelper(journal_file, resume=options.resume) as journal, metrics or contextlib.nullcontext(), \
+            jump_hosts or contextlib.nullcontext():
+
+        # read devices lazily, skipping devices completed by a previous run
+        device_list = journal.skip_completed(read_devices(), bug_ids)
+        restored_devices = journal.restore_completed(read_devices(), bug_ids)
+
+        if facts:
+            device_list = facts.prepopulate(device_list)
+
+        if options.preflight and not options.offline:
+            rh = ReachabilityHelper(ports=options.preflightports, timeout=options.preflighttimeout,
+                                    concurrency=options.preflightconcurrency)
+            device_list = rh.sweep(device_list)
+
+        # check each device
+        checked_devices = scan(device_list, options.bugid, options.workerthreads, options.devicetimeout,
+                               options.capture, limiter, options.latencytarget, options.grouplimit, timings, metrics)
+
+        if facts:
+            checked_devices = facts.record(checked_devices)
+
+        # record each device in the journal as it completes
+        checked_devices = journal.checkpoint(checked_devices)
+
+        # write results to csv file as each device completes
+        write_csv(output_file, options.bugid,
+                  itertools.chain(restored_devices, checked_devices))
+
+    timings.print_summary()
+    if timings_file:
+        timings.export(timings_file)
+
+    if facts and save_facts:
+        facts.save()
+    elif facts:
+        return facts.updates()
+
+
 if __name__ == "__main__":
 
     parse = argparse.ArgumentParser()
@@ -219,6 +588,88 @@ if __name__ == "__main__":
 
     parse.add_argument("--workerthreads", type=int, default=4,
                        help="Number of worker threads to use. Default is 4")
+    parse.add_argument("--adaptive", action="store_true",
+                       help="Adapt the number of worker threads at runtime, starting at --workerthreads. Timeouts, "
+                            "refused connections and connection attempts slower than --latencytarget halve the "
+                            "number of threads, other devices slowly increase it")
+    parse.add_argument("--minworkers", type=int, default=1,
+                       help="Minimum number of worker threads when --adaptive is set. Default is 1")
+    parse.add_argument("--maxworkers", type=int, default=64,
+                       help="Maximum number of worker threads when --adaptive is set. Default is 64")
+    parse.add_argument("--latencytarget", type=float, default=10,
+                       help="Seconds a connection attempt should take when --adaptive is set. Default is 10")
+    parse.add_argument("--groupcolumn", type=str,
+                       help="Column of --inputcsv containing the group of each device, such as the site, used by "
+                            "--grouplimit")
+    parse.add_argument("--groupprefix", type=int,
+                       help="Prefix length of the subnet used as the group of each device without a --groupcolumn "
+                            "value, for example 24")
+    parse.add_argument("--grouplimit", type=int,
+                       help="Maximum number of devices of the same group checked at the same time. Devices of other "
+                            "groups are checked in the meantime. Default is no limit")
+    parse.add_argument("--devicetimeout", type=float,
+                       help="Seconds a single device check may take before it is abandoned and reported as a "
+                            "connection error. Default is no timeout")
+    parse.add_argument("--offline", type=str,
+                       help="Location of a corpus of captured command output to evaluate the bugs against, instead "
+                            "of connecting to the devices in --inputcsv")
+    parse.add_argument("--capture", type=str,
+                       help="Location to capture the command output of each device to, creating a corpus for "
+                            "--offline")
+    parse.add_argument("--journal", type=str,
+                       help="Location of the checkpoint journal recording each completed device. Default is the "
+                            "output CSV location with .journal appended")
+    parse.add_argument("--resume", action="store_true",
+                       help="Resume a previous scan, skipping devices already completed in the checkpoint journal")
+    parse.add_argument("--factscache", type=str,
+                       help="Location of the device facts cache. Cached hostname and version are used instead of "
+                            "running discovery commands on the device, and the credential set and device type which "
+                            "last connected are tried first")
+    parse.add_argument("--factsttl", type=float, default=24,
+                       help="Hours that cached device facts are used for. Default is 24")
+    parse.add_argument("--parallellogins", type=int, default=1,
+                       help="Number of credential set and device type combinations to attempt at the same time on "
+                            "each device. Only one attempt per username is made at a time. Default is 1")
+    parse.add_argument("--preflight", action="store_true",
+                       help="Probe each device with a TCP connection before connecting, reporting unreachable devices "
+                            "without waiting on a SSH connection timeout")
+    parse.add_argument("--preflightports", type=int, nargs="+", default=[22, 23],
+                       help="Ports probed by --preflight. Default is 22 23")
+    parse.add_argument("--preflighttimeout", type=float, default=2,
+                       help="Seconds to wait for each --preflight TCP connection. Default is 2")
+    parse.add_argument("--preflightconcurrency", type=int, default=512,
+                       help="Number of devices probed at the same time by --preflight. Default is 512")
+    parse.add_argument("--jumphost", type=JumpHostPool.parse, nargs="+",
+                       help="Jump hosts to connect to devices through, in the form [user@]host[:port]. Device "
+                            "connections are multiplexed over a few SSH connections to each jump host, which are "
+                            "authenticated with --jumphostkey, the SSH agent or the default keys. Telnet is not "
+                            "supported through a jump host")
+    parse.add_argument("--jumphostkey", type=str,
+                       help="Private key file used to authenticate to the --jumphost jump hosts")
+    parse.add_argument("--jumphostconnections", type=int, default=2,
+                       help="Maximum number of SSH connections to each jump host. With --processes this is per "
+                            "process. Default is 2")
+    parse.add_argument("--jumphostchannels", type=int, default=10,
+                       help="Number of device connections carried by an SSH connection to a jump host before another "
+                            "is opened. Default is 10")
+    parse.add_argument("--shard", type=ShardHelper.parse,
+                       help="Check only shard K of N, in the form K/N, for splitting a scan across hosts. Devices are "
+                            "assigned to a shard by a hash of their IP address, and the results are written to "
+                            "--outputcsv with .shardKofN appended")
+    parse.add_argument("--processes", type=int, default=1,
+                       help="Number of processes to check devices with, each checking a shard of the devices with "
+                            "--workerthreads threads. The shard results are merged into --outputcsv. Default is 1")
+    parse.add_argument("--merge", type=str, nargs="+",
+                       help="Merge the shard result CSV files written by --shard into --outputcsv")
+    parse.add_argument("--timings", type=str,
+                       help="Location to export the time taken by each phase of the device checks to as JSON. A "
+                            "summary is always printed once all devices have been checked")
+    parse.add_argument("--metricsport", type=int,
+                       help="Port to serve Prometheus metrics on while devices are checked, such as devices in "
+                            "flight, connection errors and bug hits. With --processes each process uses the next "
+                            "port. Default is no metrics")
+    parse.add_argument("--metricshost", type=str, default="127.0.0.1",
+                       help="Address to serve --metricsport metrics on. Default is 127.0.0.1")
     parse.add_argument("--logginglevel", type=str,
                        choices=["critical", "error", "warning", "info", "debug", "notset"],
                        default="info",
@@ -228,8 +679,14 @@ if __name__ == "__main__":
 
     parse_args = parse.parse_args()
 
-    if not parse_args.checkdevice and not parse_args.listbugdetails:
-        print("Bug Checker requires either -c or -l to be set")
+    if parse_args.merge:
+        if not parse_args.outputcsv:
+            print("If --merge is specified, --outputcsv is required")
+        else:
+            ShardHelper.merge(parse_args.merge, parse_args.outputcsv)
+
+    elif not parse_args.checkdevice and not parse_args.listbugdetails:
+        print("Bug Checker requires either -c, -l or --merge to be set")
     else:
         if parse_args.listbugdetails:
             if not (parse_args.bugid or parse_args.bugsummary):
@@ -241,10 +698,23 @@ if __name__ == "__main__":
                     print_bug_summary()
 
         elif parse_args.checkdevice:
-            if parse_args.checkdevice and not parse_args.bugid and not parse_args.inputcsv and not parse_args.outputcsv:
-                print("If -b is specified, the following are required --bug, --inputcsv as --outputcsv")
+            if not parse_args.bugid or not (parse_args.inputcsv or parse_args.offline) or not parse_args.outputcsv:
+                print("If -c is specified, the following are required --bugid, --inputcsv (or --offline) and "
+                      "--outputcsv")
+            elif parse_args.shard and parse_args.processes > 1:
+                print("--shard and --processes cannot both be specified")
+            elif parse_args.jumphost and parse_args.preflight:
+                print("--preflight cannot be used with --jumphost, as devices are not reachable directly")
+            elif parse_args.workerthreads < 1:
+                print("--workerthreads must be at least 1")
+            elif parse_args.grouplimit is not None and parse_args.grouplimit < 1:
+                print("--grouplimit must be at least 1")
+            elif parse_args.adaptive and not 1 <= parse_args.minworkers <= parse_args.maxworkers:
+                print("If --adaptive is specified, --minworkers must be at least 1 and no more than --maxworkers")
             else:
-                creds = DeviceHelper.get_credentials()
+                creds = None
+                if not parse_args.offline:
+                    creds = DeviceHelper.get_credentials()
 
                 # Setting up logging
 
@@ -271,11 +741,20 @@ if __name__ == "__main__":
                 sh.setFormatter(formatter)
                 _logger.addHandler(sh)
 
-                # get list of devices
-                device_list = read_csv("devices.csv", creds)
+                if parse_args.processes > 1:
+                    shards = [(i, parse_args.processes) for i in range(parse_args.processes)]
+
+                    # each process checks a shard of the devices, which are merged once all have completed
+                    with multiprocessing.Pool(parse_args.processes) as pool:
+                        facts_updates = pool.starmap(run_checks, [(parse_args, creds, s, False) for s in shards])
 
-                # check each device
-                checked_devices = main(device_list, parse_args.bugid, parse_args.workerthreads)
+                    if parse_args.factscache:
+                        facts = FactsHelper(parse_args.factscache, ttl=parse_args.factsttl * 3600)
+                        for updates in facts_updates:
+                            facts.merge(updates)
+                        facts.save()
 
-                # write results to csv file
-                write_csv(parse_args.outputcsv, parse_args.bugid, checked_devices)
+                    ShardHelper.merge([ShardHelper.shard_file(parse_args.outputcsv, *s) for s in shards],
+                                      parse_args.outputcsv)
+                else:
+                    run_checks(parse_args, creds, parse_args.shard)
@@ -1,3 +1,8 @@
 from bugs.base_bug import BaseBug
 from bugs.bug_class_mapper import BugClassMapper
-from bugs.test_bug import TestBug
+from bugs.bug_registry import BugRegistry
+
+
+def __getattr__(name):
+    # bug classes are imported on first use
+    return BugRegistry.package_attribute(__name__, name)
@@ -0,0 +1,8 @@
+import logging
+import sys
+
+from bugs.bug_registry import BugRegistry
+
+# regenerate the bug manifest after adding a bug
+logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+BugRegistry.write_manifest()
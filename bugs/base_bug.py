@@ -70,6 +70,15 @@ class BaseBug(ABC):
         """
         pass
 
+    @staticmethod
+    def commands():
+        """
+        Commands sent by check_bug. These are collected from all bugs being checked and sent to the device in a
+        single batch before the bug checks run, so check_bug receives the output without a further round trip.
+        :return: tuple of commands
+        """
+        return ()
+
     @staticmethod
     @abstractmethod
     def device_type_requirements():
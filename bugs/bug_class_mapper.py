@@ -1,5 +1,4 @@
-from bugs.cisco import CSCvg76186
-from bugs.test_bug import TestBug
+from bugs.bug_registry import BugRegistry
 
 
 class BugClassMapper:
@@ -12,19 +11,13 @@ class BugClassMapper:
         """
         Returns bug class based on bug_id. If no bug_id is specified all Bug Classes will be returned
 
+        Only the modules of the requested bugs are imported, see BugRegistry.
+
         :param bug_list: bug ids to be checked. If not specified all bugs class will be return
         :type bug_list: list
         :return: bug class
         :raises KeyError: If bug_id is not contained in class mapper
         """
-        bug_class_mapper = {
-
-            "testbug": TestBug,
-            "cscvg76186": CSCvg76186
-
-        }
-
-        return_classes = []
 
         if bug_list:
 
@@ -32,14 +25,7 @@ class BugClassMapper:
             if not isinstance(bug_list, list):
                 bug_list = [bug_list]
 
-            for b in bug_list:
-                try:
-                    return_classes.append(bug_class_mapper[b.lower()])
-
-                except KeyError as e:
-                    raise e
-
-            return return_classes
+            return [BugRegistry.get(b) for b in bug_list]
 
         else:
-            return list(bug_class_mapper.values())
+            return BugRegistry.all()
@@ -0,0 +1,54 @@
+import logging
+import threading
+
+
+class DeviceTypeIndex:
+    """
+    Index of the bugs which apply to each device type, used to select the bugs to check on a device without testing
+    the device type requirements of every bug.
+
+    The bugs are indexed by each device type in BaseBug.device_type_requirements(). The applicable bugs of a device
+    type are looked up once and cached, so devices of the same type share the lookup.
+
+    Example:
+
+    index = DeviceTypeIndex(bug_list)
+    bugs = index.applicable(device.device_type)
+    """
+
+    _logger = logging.getLogger("BugChecker.DeviceTypeIndex")
+
+    def __init__(self, bug_list):
+        """
+        :param bug_list: bug classes to index
+        :type bug_list: list
+        """
+        self._bug_list = list(bug_list)
+        self._positions = {}
+        self._applicable = {}
+        self._lock = threading.Lock()
+
+        for position, bug in enumerate(self._bug_list):
+            for device_type in bug.device_type_requirements():
+                self._positions.setdefault(device_type, set()).add(position)
+
+    def applicable(self, device_types):
+        """
+        Get the bugs which apply to a device
+        :param device_types: device types of the device
+        :type device_types: tuple
+        :return: list of bug classes, in the order they were indexed
+        """
+        if isinstance(device_types, str):
+            device_types = (device_types,)
+
+        with self._lock:
+            if device_types not in self._applicable:
+                positions = set()
+                for device_type in device_types:
+                    positions |= self._positions.get(device_type, set())
+
+                self._applicable[device_types] = [self._bug_list[p] for p in sorted(positions)]
+                self._logger.debug(f"{len(positions)} of {len(self._bug_list)} bugs apply to {device_types}")
+
+            return self._applicable[device_types]
@@ -0,0 +1,10 @@
+"""
+Bug id to bug class locations, used by BugRegistry to import bugs lazily.
+
+Generated by python -m bugs, do not edit.
+"""
+
+BUGS = {
+    "cscvg76186": "bugs.cisco.cscvg76186:CSCvg76186",
+    "testbug": "bugs.test_bug:TestBug",
+}
@@ -0,0 +1,166 @@
+import importlib
+import logging
+import threading
+
+from bugs.base_bug import BaseBug
+
+
+class BugRegistry:
+    """
+    Registry mapping bug ids to bug classes, importing each bug module only when the bug is first used.
+
+    Bugs in this package are listed in bugs/bug_manifest.py, which maps the lower case bug id to the module and class
+    name of the bug. The manifest is generated by running "python -m bugs" after adding a bug. Bugs outside this
+    package can be registered with a "bugchecker.bugs" entry point, named by the bug id, for example:
+
+    [project.entry-points."bugchecker.bugs"]
+    CSCxx12345 = "my_bugs.cscxx12345:CSCxx12345"
+    """
+
+    _logger = logging.getLogger("BugChecker.BugRegistry")
+
+    ENTRY_POINT_GROUP = "bugchecker.bugs"
+
+    _lock = threading.Lock()
+    _classes = {}
+    _locations = None
+    _plugins_loaded = False
+
+    @classmethod
+    def _load_locations(cls, plugins=False):
+        """
+        Load the bug id to "module:class" locations without importing any bugs. The manifest is always loaded, while
+        entry points are only loaded when plugins is True as reading package metadata is slow.
+        :param plugins: if True bugs registered by entry points are also loaded
+        :type plugins: bool
+        :return: dictionary of lower case bug id to location
+        """
+        if cls._locations is None:
+            from bugs.bug_manifest import BUGS
+            cls._locations = dict(BUGS)
+
+        if plugins and not cls._plugins_loaded:
+            from importlib import metadata
+
+            try:
+                entry_points = metadata.entry_points(group=cls.ENTRY_POINT_GROUP)
+            except TypeError:
+                # Python 3.9 returns a dictionary of group to entry points
+                entry_points = metadata.entry_points().get(cls.ENTRY_POINT_GROUP, [])
+
+            # bugs in this package take precedence over plugins with the same id
+            for entry_point in entry_points:
+                cls._locations.setdefault(entry_point.name.lower(), entry_point.value)
+
+            cls._plugins_loaded = True
+
+        return cls._locations
+
+    @classmethod
+    def bug_ids(cls):
+        """
+        Get the id of every registered bug, without importing any bugs
+        :return: list of lower case bug ids
+        """
+        return list(cls._load_locations(plugins=True))
+
+    @classmethod
+    def get(cls, bug_id):
+        """
+        Get the class of a bug, importing its module on first use
+        :param bug_id: bug id, case insensitive
+        :type bug_id: str
+        :return: bug class
+        :raises KeyError: If the bug id is not registered
+        """
+        key = bug_id.lower()
+
+        with cls._lock:
+            if key in cls._classes:
+                return cls._classes[key]
+
+            locations = cls._load_locations()
+            if key not in locations:
+                locations = cls._load_locations(plugins=True)
+
+            location = locations[key]
+            module_name, class_name = location.split(":")
+
+            cls._logger.debug(f"Importing bug {bug_id} from {location}")
+            bug_class = getattr(importlib.import_module(module_name), class_name)
+
+            cls._classes[key] = bug_class
+            return bug_class
+
+    @classmethod
+    def all(cls):
+        """
+        Get the class of every registered bug, importing every bug module
+        :return: list of bug classes
+        """
+        return [cls.get(b) for b in cls.bug_ids()]
+
+    @classmethod
+    def package_attribute(cls, package, name):
+        """
+        Lazily resolve a bug class exported by a package, for use by the package module __getattr__
+        :param package: name of the package
+        :type package: str
+        :param name: name of the bug class
+        :type name: str
+        :return: bug class
+        :raises AttributeError: If the package contains no bug class with the name
+        """
+        for bug_id, location in list(cls._load_locations(plugins=True).items()):
+            module_name, class_name = location.split(":")
+            if class_name == name and module_name.startswith(f"{package}."):
+                return cls.get(bug_id)
+
+        raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+    @staticmethod
+    def generate_manifest(package="bugs"):
+        """
+        Import every module in a package, returning the location of each bug class defined in it
+        :param package: name of the package to search
+        :type package: str
+        :return: dictionary of lower case bug id to "module:class" location
+        """
+        import inspect
+        import pkgutil
+
+        root = importlib.import_module(package)
+        bugs = {}
+
+        for module_info in pkgutil.walk_packages(root.__path__, f"{package}."):
+            if module_info.name.endswith(".__main__"):
+                continue
+
+            module = importlib.import_module(module_info.name)
+
+            for name, obj in inspect.getmembers(module, inspect.isclass):
+                if issubclass(obj, BaseBug) and obj.__module__ == module.__name__ and not inspect.isabstract(obj):
+                    bugs[obj.manufacture_bug_id().lower()] = f"{module.__name__}:{name}"
+
+        return dict(sorted(bugs.items()))
+
+    @classmethod
+    def write_manifest(cls, package="bugs"):
+        """
+        Generate the manifest of a package, writing it to the bug_manifest module of the package
+        :param package: name of the package to search
+        :type package: str
+        """
+        import json
+        from pathlib import Path
+
+        bugs = cls.generate_manifest(package)
+        manifest_file = Path(importlib.import_module(package).__file__).parent / "bug_manifest.py"
+
+        lines = ['"""', "Bug id to bug class locations, used by BugRegistry to import bugs lazily.", "",
+                 "Generated by python -m bugs, do not edit.", '"""', "", "BUGS = {"]
+        lines.extend(f"    {json.dumps(bug_id)}: {json.dumps(location)}," for bug_id, location in bugs.items())
+        lines.append("}")
+
+        manifest_file.write_text("\n".join(lines) + "\n")
+        cls._logger.info(f"Wrote {len(bugs)} bugs to {manifest_file}")
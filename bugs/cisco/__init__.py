@@ -1 +1,6 @@
-from bugs.cisco.cscvg76186 import CSCvg76186
+from bugs.bug_registry import BugRegistry
+
+
+def __getattr__(name):
+    # bug classes are imported on first use
+    return BugRegistry.package_attribute(__name__, name)
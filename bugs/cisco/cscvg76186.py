@@ -1,4 +1,5 @@
 from bugs.base_bug import BaseBug
+from helpers.template_helper import TemplateHelper
 
 
 
@@ -31,10 +32,10 @@ class CSCvg76186(BaseBug):
                "data. In order to exploit this vulnerablity, an attacker would create a Smart Install message " \
                "to an vulnerable device on port tcp/4786, which could cause a buffer overflow. \n\nThis bug " \
                "check works by checking the output of 'show vstack config' to determine if the Smart Install " \
-               "feature is enabled (which it is by default). Note this bug check does not currently check IOS " \
-               "version comparison and the output is only to indicate if a device might be affected (ie a " \
-               "upgraded IOS version (with the bug fix) with Smart Install enable would be marked as affected, " \
-               "Please check the IOS version). \n\nCVSS Score: 9.8 (Critical)"
+               "feature is enabled (which it is by default). Note this bug check does not compare the IOS " \
+               "version with the fixed releases, so the output only indicates if a device might be affected (ie " \
+               "an upgraded IOS version (with the bug fix) with Smart Install enabled is marked as affected, " \
+               "please check the IOS version against the advisory). \n\nCVSS Score: 9.8 (Critical)"
 
         return desc
 
@@ -80,6 +81,14 @@ class CSCvg76186(BaseBug):
         """
         return ["connection"]
 
+    @staticmethod
+    def commands():
+        """
+        Commands sent by check_bug
+        :return: tuple of commands
+        """
+        return "show vstack config",
+
     @staticmethod
     def device_type_requirements():
         """
@@ -136,10 +145,12 @@ class CSCvg76186(BaseBug):
             return self.Bug(False, "Command not supported on platform")
         else:
 
+            records = TemplateHelper.parse(connection, "show vstack config", "cisco_ios_show_vstack_config.textfsm")
+
             # check if vulnerable
-            if "Role: Client (SmartInstall enabled)" in vstack_output:
+            if TemplateHelper.match(records, Role="Client", SmartInstall="enabled"):
                 return self.Bug(True, vstack_output)
-            elif "Oper Mode: Enabled" in vstack_output and "Role: Client" in vstack_output:
+            elif TemplateHelper.match(records, Role="Client", OperMode="Enabled"):
                 return self.Bug(True, vstack_output)
             else:
                 return self.Bug(False, vstack_output)
@@ -64,6 +64,14 @@ class TestBug(BaseBug):
         """
         return ["connection"]
 
+    @staticmethod
+    def commands():
+        """
+        Commands sent by check_bug
+        :return: tuple of commands
+        """
+        return "Unknown cmd",
+
     @staticmethod
     def device_type_requirements():
         """
@@ -1,2 +1,5 @@
-from devices.base_device import BaseDevice, ConnectionException
+from devices.base_device import AuthenticationException, BaseDevice, ConnectionException, ConnectionTimeoutException
+from devices.cached_connection import CachedConnection
 from devices.device_class_mapper import DeviceClassMapper
+from devices.jump_host import JumpHostPool
+from devices.offline import Offline
@@ -57,20 +57,12 @@ class AutoDetect(BaseDevice):
         Get hostname set of device
         :return: str
         """
-        if self._hostname:
+        if self._hostname or not (self.connection or self.lazy_connect):
             return self._hostname
         else:
-            reqs_disconnect = False
-
-            if not self.connection:
-                self.connect()
-                reqs_disconnect = True
-
-            hostname = self.connection.find_prompt()
-            self.hostname = hostname[0:(len(hostname) - 1)]
-
-            if reqs_disconnect:
-                self.disconnect()
+            with self.session():
+                hostname = self.connection.find_prompt()
+                self.hostname = hostname[0:(len(hostname) - 1)]
 
             return self._hostname
 
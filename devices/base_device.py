@@ -1,7 +1,22 @@
 import logging
+import socket
+import threading
+import time
 from abc import ABC, abstractmethod
-from netmiko import ConnectHandler, NetMikoAuthenticationException, NetMikoTimeoutException
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from bugs import BaseBug
+from devices.cached_connection import CachedConnection
+
+
+def _import_netmiko():
+    """
+    Import netmiko when a connection is first made, so that importing devices does not load netmiko, paramiko and
+    cryptography. This keeps commands which do not connect to devices, such as listing bugs, fast to start.
+    :return: netmiko module
+    """
+    import netmiko
+    return netmiko
 
 
 class ConnectionException(Exception):
@@ -11,6 +26,20 @@ class ConnectionException(Exception):
     pass
 
 
+class ConnectionTimeoutException(ConnectionException):
+    """
+    Connection to device timed out
+    """
+    pass
+
+
+class AuthenticationException(ConnectionException):
+    """
+    No credential set and device type combination authenticated with the device
+    """
+    pass
+
+
 class BaseDevice(ABC):
     """
     Base class which all devices must inherit from
@@ -18,15 +47,47 @@ class BaseDevice(ABC):
 
     _logger = logging.getLogger("BugChecker.Device")
 
-    def __init__(self, ipaddr=None, credentials=None, hostname=None, version=None, **kwargs):
+    # seconds to wait for the TCP connection of each SSH connection attempt
+    _tcp_timeout = 10
+
+    def __init__(self, ipaddr=None, credentials=None, hostname=None, version=None, port=None, parallel_logins=1,
+                 group=None, jump_hosts=None, **kwargs):
         self.ipaddr = ipaddr
+        self.group = group
+        self.jump_hosts = jump_hosts
+        self.port = port
+        self.parallel_logins = parallel_logins
         self.credentials = credentials
         self.bugs = {}
+
+        # ids of the bugs in bugs recorded without being checked, such as bugs which do not apply to the device type
+        self.skipped_bugs = set()
         self.connection = None
         self._hostname = hostname
         self._version = version
         self.connection_error = None
 
+        # (credential index, device type) tried first when connecting, and the combination which last connected
+        self.preferred_login = None
+        self.login = None
+        self.connect_attempts = 0
+
+        # seconds taken to establish the last connection, including failed attempts
+        self.connect_time = None
+
+        # list of (phase, seconds) timing spans recorded while checking the device
+        self.timings = []
+
+        # number of authenticated connections established to the device
+        self.handshakes = 0
+
+        # whether the connection is in enable mode, tracked locally to avoid querying the device. None if not known
+        self._enable_mode = None
+
+        # if False, properties which are unknown are not discovered by connecting outside of a session
+        self.lazy_connect = True
+        self._session_depth = 0
+
     @property
     @abstractmethod
     def manufacture(self):
@@ -147,9 +208,237 @@ class BaseDevice(ABC):
             self._logger.error(f"{self.ipaddr} - Incorrect Object")
             raise ValueError('Incorrect Object passed. Must be of an instance of  BaseBug')
 
+    @contextmanager
+    def timed(self, phase):
+        """
+        Context manager which records a timing span for a phase in timings, whether or not the phase succeeds
+        :param phase: name of the phase
+        :type phase: str
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings.append((phase, time.monotonic() - start))
+
+    @contextmanager
+    def session(self):
+        """
+        Context manager which shares a single connection to the device between everything run within it, such as
+        discovery and every bug check.
+
+        The connection is established on entry if it is not already open, and closed on exit by the session which
+        established it. Sessions may be nested, and disconnect() has no effect within a session, so properties and bug
+        checks which connect and disconnect themselves reuse the session's connection.
+        :raises ConnectionException: If unable to connect to the device
+        """
+        opened = False
+        if not self.check_connection():
+            self.connect()
+            opened = True
+
+        self._session_depth += 1
+        try:
+            yield self
+        finally:
+            self._session_depth -= 1
+
+            if opened and self.connection:
+                with self.timed("disconnect"):
+                    self.disconnect()
+
+    def _login_order(self):
+        """
+        Order in which credential and device type combinations are attempted. Every credential set is tried with each
+        device type, with preferred_login tried first if it is set.
+        :return: list of tuples (credential index, device type)
+        :raises ConnectionException: If the device has jump hosts and only telnet device types
+        """
+        logins = [(i, dt) for i in range(len(self.credentials)) for dt in self.device_type]
+
+        # only SSH connections can be made through a jump host
+        if self.jump_hosts:
+            if all(dt.endswith("_telnet") for dt in self.device_type):
+                raise ConnectionException(f"Telnet is not supported through a jump host, device type "
+                                          f"{self.device_type}")
+            logins = [(i, dt) for i, dt in logins if not dt.endswith("_telnet")]
+
+        if self.preferred_login in logins:
+            logins.remove(self.preferred_login)
+            logins.insert(0, self.preferred_login)
+
+        return logins
+
+    def _connection_params(self, credential, device_type):
+        """
+        Build the parameters passed to netmiko ConnectHandler
+        :param credential: credential set containing username, password and optionally secret
+        :type credential: dict
+        :param device_type: netmiko device type
+        :type device_type: str
+        :return: dict
+        """
+
+        device = {
+            "ip": self.ipaddr,
+            "device_type": device_type
+        }
+
+        if self.port:
+            device["port"] = self.port
+
+        # set username / password / secret
+        for key in ("username", "password", "secret"):
+            if key in credential:
+                device[key] = credential[key]
+
+        return device
+
+    def _open_connection(self, credential, device_type):
+        """
+        Open a netmiko connection, recording the time taken by the attempt, and by its TCP connection and
+        authentication. SSH connections are made over a socket opened before netmiko is called, so that the TCP
+        connection is timed separately. If the device has jump hosts the socket is a channel through a jump host.
+        :param credential: credential set containing username, password and optionally secret
+        :type credential: dict
+        :param device_type: netmiko device type
+        :type device_type: str
+        :return: netmiko connection
+        :raises NetMikoTimeoutException: If the device can not be reached
+        :raises NetMikoAuthenticationException: If authentication fails
+        """
+        netmiko = _import_netmiko()
+        device = self._connection_params(credential, device_type)
+
+        with self.timed(f"attempt:{device_type}"):
+            if not device_type.endswith("_telnet"):
+                with self.timed("tcp"):
+                    try:
+                        if self.jump_hosts:
+                            device["sock"] = self.jump_hosts.open_channel(self.ipaddr, self.port or 22,
+                                                                          self._tcp_timeout)
+                        else:
+                            device["sock"] = socket.create_connection((self.ipaddr, self.port or 22),
+                                                                      self._tcp_timeout)
+                    except OSError as e:
+                        raise netmiko.NetMikoTimeoutException(f"TCP connection to device failed: {e}")
+
+            try:
+                with self.timed("auth"):
+                    return netmiko.ConnectHandler(**device)
+            except Exception:
+                if "sock" in device:
+                    device["sock"].close()
+                raise
+
+    def _connect_sequential(self, logins):
+        """
+        Attempt each login in turn until one authenticates
+        :param logins: list of tuples (credential index, device type)
+        :type logins: list
+        :return: tuple of netmiko connection and the login which connected, or (None, None)
+        :raises NetMikoTimeoutException: If the device can not be reached
+        """
+        netmiko = _import_netmiko()
+
+        for index, dt in logins:
+
+            try:
+                self._logger.debug(f"{self.ipaddr} - Attempting to connect using credential set {index} "
+                                   f"device type: {dt}")
+
+                self.connect_attempts += 1
+                return self._open_connection(self.credentials[index], dt), (index, dt)
+
+            except netmiko.NetMikoAuthenticationException:
+                # ignore except - unable to connect based on current User/pass type combo
+                # Move onto next set
+                self._logger.debug(f"{self.ipaddr} - Current username/password incorrect")
+                pass
+            except netmiko.NetMikoTimeoutException as e:
+                # unable to connect to device
+                self._logger.info(f"{self.ipaddr} - Connection timeout")
+                raise e
+
+        return None, None
+
+    def _connect_parallel(self, logins):
+        """
+        Attempt up to parallel_logins logins at the same time, returning as soon as one authenticates. Logins not yet
+        started are cancelled, and any other login which later authenticates is disconnected.
+
+        To avoid locking out accounts only one attempt per username is in flight at any time.
+        :param logins: list of tuples (credential index, device type)
+        :type logins: list
+        :return: tuple of netmiko connection and the login which connected, or (None, None)
+        :raises NetMikoTimeoutException: If the device can not be reached
+        """
+
+        netmiko = _import_netmiko()
+
+        def close_late_connection(future):
+            if not future.cancelled() and not future.exception():
+                self._logger.debug(f"{self.ipaddr} - Closing connection from cancelled login")
+                future.result().disconnect()
+
+        pending = list(logins)
+        in_flight = {}
+        executor = ThreadPoolExecutor(max_workers=self.parallel_logins,
+                                      thread_name_prefix=f"{threading.current_thread().name}-login")
+
+        try:
+            while pending or in_flight:
+
+                busy_usernames = {self.credentials[i].get("username") for i, dt in in_flight.values()}
+
+                for index, dt in list(pending):
+                    if len(in_flight) >= self.parallel_logins:
+                        break
+
+                    username = self.credentials[index].get("username")
+                    if username in busy_usernames:
+                        continue
+
+                    self._logger.debug(f"{self.ipaddr} - Attempting to connect using credential set {index} "
+                                       f"device type: {dt}")
+
+                    pending.remove((index, dt))
+                    busy_usernames.add(username)
+                    self.connect_attempts += 1
+                    future = executor.submit(self._open_connection, self.credentials[index], dt)
+                    in_flight[future] = (index, dt)
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    login = in_flight.pop(future)
+
+                    try:
+                        connection = future.result()
+                    except netmiko.NetMikoAuthenticationException:
+                        self._logger.debug(f"{self.ipaddr} - Credential set {login[0]} device type {login[1]} "
+                                           f"username/password incorrect")
+                        continue
+                    except netmiko.NetMikoTimeoutException as e:
+                        self._logger.info(f"{self.ipaddr} - Connection timeout")
+                        raise e
+
+                    return connection, login
+
+            return None, None
+
+        finally:
+            for future in in_flight:
+                future.add_done_callback(close_late_connection)
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def connect(self):
         """
-        Establishes connection to device, using netmiko
+        Establishes connection to device, using netmiko.
+
+        The credential index and device type which connected are stored in login, and the number of combinations
+        tried in connect_attempts. If parallel_logins is greater than 1 that many combinations are attempted at the
+        same time.
         :return:
         """
 
@@ -163,69 +452,58 @@ class BaseDevice(ABC):
 
                 self._logger.info(f"{self.ipaddr} - Attempting to connect")
 
-                # Start populating device dictionary to pass to netmiko
-                device = {
-                    "ip": self.ipaddr
-                }
-
                 # convert credentials to a list if its just a dictionary
                 if isinstance(self.credentials, dict):
                     self.credentials = [self.credentials]
-                try:
-                    for c in self.credentials:
 
-                        # set username / password / secret
-                        if "username" in c:
-                            device["username"] = c["username"]
+                logins = self._login_order()
+                netmiko = _import_netmiko()
+                start = time.monotonic()
 
-                        if "password" in c:
-                            device["password"] = c["password"]
-
-                        if "secret" in c:
-                            device["secret"] = c["secret"]
+                try:
+                    # loop through each credential and device_type combination attempting to connect.
+                    with self.timed("connect"):
+                        if self.parallel_logins > 1 and len(logins) > 1:
+                            connection, login = self._connect_parallel(logins)
                         else:
-                            # if no secret then remove it
-                            device.pop("secret", None)
-
-                        device_type = self.device_type
-
-                        # loop through each device_type attempting to connect.
-                        for dt in device_type:
-
-                            device["device_type"] = dt
-
-                            try:
-                                self._logger.debug(f"{self.ipaddr} - Attempting to connect using "
-                                                   f"device type: {dt}")
-
-                                self.connection = ConnectHandler(**device)
-                                self.hostname
-                                self._logger.debug(f"{self.ipaddr} - Hostname: {self.hostname}")
-                                self.version
-                                self._logger.debug(f"{self.ipaddr} - Version: {self.version}")
-                                self._logger.info(f"{self.ipaddr} - Connection established")
-                                return None
-
-                            except NetMikoAuthenticationException:
-                                # ignore except - unable to connect based on current User/pass type combo
-                                # Move onto next set
-                                self._logger.debug(f"{self.ipaddr} - Current username/password incorrect")
-                                pass
-                            except NetMikoTimeoutException as e:
-                                # unable to connect to device
-                                self._logger.info(f"{self.ipaddr} - Connection timeout")
-                                raise e
+                            connection, login = self._connect_sequential(logins)
+
+                except netmiko.NetMikoTimeoutException:
+                    raise ConnectionTimeoutException("Connection to device timed out")
 
+                if not connection:
                     # If this point is reached no connection was established
                     self._logger.error(f"{self.ipaddr} - Unable to connect to device")
-                    raise ConnectionException("Unable to connect to device")
+                    raise AuthenticationException("Unable to connect to device")
+
+                self.connection = CachedConnection(connection, self.ipaddr)
+                self._enable_mode = None
+                self.login = login
+                self.handshakes += 1
+                self.connect_time = time.monotonic() - start
+
+                with self.timed("discovery"):
+                    self.hostname
+                    self.version
+
+                self._logger.debug(f"{self.ipaddr} - Hostname: {self.hostname}")
+                self._logger.debug(f"{self.ipaddr} - Version: {self.version}")
+                self._logger.info(f"{self.ipaddr} - Connection established after {self.connect_attempts} attempts")
 
-                except NetMikoTimeoutException:
-                    raise ConnectionException("Connection to device timed out")
             else:
                 self._logger.error("No credentials provided")
                 raise ConnectionException("No Credentials provided")
 
+    def send_command_batch(self, commands):
+        """
+        Send a batch of commands to the device so their output is cached for the following bug checks. Has no effect
+        if the connection does not cache command output.
+        :param commands: commands to send
+        :type commands: iterable
+        """
+        if isinstance(self.connection, CachedConnection):
+            self.connection.send_command_batch(commands)
+
     def check_connection(self):
         """
         Check if connection is still established
@@ -239,35 +517,53 @@ class BaseDevice(ABC):
 
     def disconnect(self):
         """
-        Close the connection to the device
+        Close the connection to the device, unless it is used by a session
         :param self:
         """
+        if self._session_depth:
+            self._logger.debug(f"{self.ipaddr} - Connection used by a session, not disconnecting")
+            return
+
         self.connection.disconnect()
         self.connection = None
+        self._enable_mode = None
+
+    def abort(self):
+        """
+        Close the connection to the device from another thread, such as when a check has timed out, so a check blocked
+        reading from the device fails rather than running on
+        """
+        connection = self.connection
+        if isinstance(connection, CachedConnection):
+            self._logger.warning(f"{self.ipaddr} - Aborting connection")
+            connection.abort()
 
     def enter_enable_mode(self):
         """
-        Enter enable mode on device
+        Enter enable mode on device, unless the connection is already known to be in enable mode
         :return:
         """
-        if self.connection:
+        if self.connection and not self._enable_mode:
             self.connection.enable()
+            self._enable_mode = True
 
     def exit_enable_mode(self):
         """
-        Exit enable mode
+        Exit enable mode, unless the connection is already known not to be in enable mode
         :return:
         """
-        if self.connection:
-            if self.connection.check_enable_mode():
+        if self.connection and self._enable_mode is not False:
+            if self._enable_mode or self.connection.check_enable_mode():
                 self.connection.exit_enable_mode()
-                
+            self._enable_mode = False
+
     def check_enable_mode(self):
         """
-        Check if connection is in enable mode
+        Check if connection is in enable mode, updating the locally tracked mode
         :return: bool if device is in enable mode
         """
         if self.connection:
-            return self.connection.check_enable_mode()
+            self._enable_mode = self.connection.check_enable_mode()
+            return self._enable_mode
         else:
             return False
@@ -0,0 +1,207 @@
+import logging
+import re
+import threading
+
+
+class CachedConnection:
+    """
+    Wraps a netmiko connection so that each distinct command is only sent once per connection.
+
+    Output from send_command is cached by the normalised command text, so bug checks and device properties which
+    send the same show command share a single round trip to the device. Records parsed from the output, see
+    TemplateHelper, are cached in records alongside it. Any other method is passed through to the wrapped connection,
+    and methods which change the device configuration or the privilege level clear the cache, as the output of a
+    command may differ in enable mode.
+    """
+
+    _logger = logging.getLogger("BugChecker.CachedConnection")
+
+    # netmiko methods required to pipeline a batch of commands over the channel
+    _PIPELINE_METHODS = ("find_prompt", "write_channel", "read_until_pattern", "clear_buffer", "normalize_cmd",
+                         "normalize_linefeeds", "strip_command", "strip_prompt")
+
+    # methods which may change the output of show commands, by changing the configuration or the privilege level
+    _INVALIDATING_METHODS = ("send_config_set", "send_config_from_file", "commit", "save_config", "enable",
+                             "exit_enable_mode")
+
+    # totals across all connections, used to report cache effectiveness for a scan
+    total_hits = 0
+    total_misses = 0
+    _totals_lock = threading.Lock()
+
+    def __init__(self, connection, ipaddr=None):
+        """
+        :param connection: connection to wrap
+        :type connection: netmiko.ConnectHandler
+
+        :param ipaddr: IP address of the device, used for logging
+        :type ipaddr: str
+        """
+        self.connection = connection
+        self.ipaddr = ipaddr
+        self.hits = 0
+        self.misses = 0
+        self._cache = {}
+
+        # records parsed from the cached output, by normalised command and template
+        self.records = {}
+
+    @staticmethod
+    def normalise_command(command):
+        """
+        Normalise command text so that equivalent commands share a cache entry
+        :param command: command text
+        :type command: str
+        :return: str - command with whitespace collapsed and a leading "sh" expanded to "show"
+        """
+        words = command.split()
+
+        if words and words[0].lower() == "sh":
+            words[0] = "show"
+
+        return " ".join(words)
+
+    @classmethod
+    def reset_totals(cls):
+        """
+        Reset the totals across all connections
+        """
+        with cls._totals_lock:
+            cls.total_hits = 0
+            cls.total_misses = 0
+
+    def _key(self, command_string, args=(), kwargs=None):
+        """
+        Cache key for a command and the arguments it is sent with
+        """
+        return self.normalise_command(command_string), args, repr(sorted((kwargs or {}).items()))
+
+    def send_command(self, command_string, *args, **kwargs):
+        """
+        Send a command to the device, returning the cached output if the command has already been sent
+        :param command_string: command to send
+        :type command_string: str
+        :return: command output
+        """
+        key = self._key(command_string, args, kwargs)
+
+        if key in self._cache:
+            self.hits += 1
+            with self._totals_lock:
+                CachedConnection.total_hits += 1
+            self._logger.debug(f"{self.ipaddr} - Command cache hit: {command_string}")
+            return self._cache[key]
+
+        self.misses += 1
+        with self._totals_lock:
+            CachedConnection.total_misses += 1
+
+        output = self.connection.send_command(command_string, *args, **kwargs)
+        self._cache[key] = output
+        return output
+
+    def send_command_batch(self, commands, read_timeout=10.0):
+        """
+        Send commands which are not already cached in a single batch, caching their output for later send_command
+        calls.
+
+        When the wrapped connection is a netmiko connection all commands are written to the channel at once and the
+        output of each is read back in turn, otherwise each command is sent with send_command.
+        :param commands: commands to send. Duplicates are only sent once
+        :type commands: iterable
+        :param read_timeout: seconds to wait for the output of each command
+        :type read_timeout: float
+        :raises Exception: If a pipelined batch fails and the connection can not be returned to the prompt
+        """
+        pending = {}
+        for command in commands:
+            key = self._key(command)
+            if key not in self._cache and key not in pending:
+                pending[key] = command
+
+        if not pending:
+            return
+
+        self._logger.debug(f"{self.ipaddr} - Sending command batch: {list(pending.values())}")
+
+        if all(hasattr(self.connection, m) for m in self._PIPELINE_METHODS):
+            try:
+                self._send_pipelined(pending, read_timeout)
+            except Exception as e:
+                # commands not cached will be sent individually by send_command, once the output of the batch which
+                # has not been read is discarded
+                self._logger.warning(f"{self.ipaddr} - Unable to pipeline command batch: {e!r}")
+                self._discard_output()
+        else:
+            for command in pending.values():
+                self.send_command(command)
+
+    def _send_pipelined(self, pending, read_timeout):
+        """
+        Write all commands to the channel, then read the output of each up to the following prompt
+        :param pending: dictionary of cache key to command
+        :param read_timeout: seconds to wait for the output of each command
+        """
+        connection = self.connection
+        prompt = re.escape(connection.find_prompt())
+
+        connection.write_channel("".join(connection.normalize_cmd(c) for c in pending.values()))
+
+        for key, command in pending.items():
+            output = connection.read_until_pattern(pattern=prompt, read_timeout=read_timeout)
+            output = connection.normalize_linefeeds(output)
+            output = connection.strip_prompt(connection.strip_command(command, output))
+
+            self.misses += 1
+            with self._totals_lock:
+                CachedConnection.total_misses += 1
+
+            self._cache[key] = output
+
+    def _discard_output(self):
+        """
+        Discard output left in the channel by a failed batch, and wait for the prompt, so that the next command does not
+        read the output of an earlier one
+        :raises Exception: If the prompt is not found, as the connection can not be used
+        """
+        self.connection.clear_buffer()
+        self.connection.find_prompt()
+
+    def outputs(self):
+        """
+        Cached output of the commands sent without additional arguments
+        :return: dictionary of normalised command to output
+        """
+        return {k[0]: v for k, v in self._cache.items() if k[1:] == self._key(k[0])[1:]}
+
+    def clear(self):
+        """
+        Clear the cached command output and records
+        """
+        self._cache = {}
+        self.records = {}
+
+    def disconnect(self):
+        """
+        Close the wrapped connection, logging the cache hit and miss counts
+        """
+        self._logger.info(f"{self.ipaddr} - Command cache hits: {self.hits} misses: {self.misses}")
+        self.connection.disconnect()
+
+    def abort(self):
+        """
+        Close the channel and transport of the wrapped connection without waiting on the device, so a command blocked
+        reading from the device in another thread returns
+        """
+        for name in ("remote_conn", "remote_conn_pre"):
+            conn = getattr(self.connection, name, None)
+            if conn is not None:
+                conn.close()
+
+    def __getattr__(self, name):
+        attr = getattr(self.connection, name)
+
+        if name in self._INVALIDATING_METHODS:
+            self.clear()
+
+        return attr
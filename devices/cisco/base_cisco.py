@@ -1,6 +1,5 @@
-import re
+from devices import parsers
 from devices.base_device import BaseDevice
-from abc import abstractmethod
 
 
 class BaseCisco(BaseDevice):
@@ -8,6 +7,10 @@ class BaseCisco(BaseDevice):
     Class to represent base Cisco device
     """
 
+    # command and compiled pattern used by the version property to determine the OS version, see devices.parsers
+    _version_command = "sh ver"
+    _version_regex = None
+
     def __init__(self, **kwargs):
         super(BaseCisco, self).__init__(**kwargs)
 
@@ -27,26 +30,12 @@ class BaseCisco(BaseDevice):
         :return: str
         """
 
-        if self._version:
+        if self._version or not (self.connection or self.lazy_connect):
             return self._version
         else:
-            reqs_disconnect = False
-
-            if not self.connection:
-                self.connect()
-                reqs_disconnect = True
-
-            config = self.connection.send_command("sh ver")
-            regex = self._get_version_regex()
-            output = re.search(regex, config)
-
-            if output:
-                self._version = output.group(1)
-            else:
-                self._version = "Unable to determine IOS version"
-
-            if reqs_disconnect:
-                self.disconnect()
+            with self.session():
+                config = self.connection.send_command(self._version_command)
+                self._version = parsers.search(self._version_regex, config) or "Unable to determine IOS version"
 
             return self._version
 
@@ -66,20 +55,12 @@ class BaseCisco(BaseDevice):
         Get hostname set of device
         :return: str
         """
-        if self._hostname:
+        if self._hostname or not (self.connection or self.lazy_connect):
             return self._hostname
         else:
-            reqs_disconnect = False
-
-            if not self.connection:
-                self.connect()
-                reqs_disconnect = True
-
-            hostname = self.connection.find_prompt()
-            self._hostname = hostname[0:(len(hostname) - 1)]
-
-            if reqs_disconnect:
-                self.disconnect()
+            with self.session():
+                hostname = self.connection.find_prompt()
+                self._hostname = hostname[0:(len(hostname) - 1)]
 
             return self._hostname
 
@@ -92,12 +73,3 @@ class BaseCisco(BaseDevice):
         :return:
         """
         self._hostname = hostname
-
-    @abstractmethod
-    def _get_version_regex(self):
-        """
-        Returns the regular expression string required for the version property to determine the Cisco IOS version from
-        a show version output
-        :return: Regular expression string
-        """
-        pass
@@ -1,3 +1,4 @@
+from devices import parsers
 from devices.cisco import BaseCisco
 
 
@@ -6,6 +7,8 @@ class CiscoASA(BaseCisco):
     Class to represent Cisco ASA device
     """
 
+    _version_regex = parsers.CISCO_ASA_VERSION
+
     @property
     def device_type(self):
         """
@@ -14,11 +17,3 @@ class CiscoASA(BaseCisco):
         :return tuple:
         """
         return 'cisco_asa',
-
-    def _get_version_regex(self):
-        """
-        Returns the regular expression string required for the version property to determine the Cisco IOS version from
-        a show version output
-        :return: Regular expression string
-        """
-        return r"Cisco Adaptive Security Appliance Software Version ?(.*)"
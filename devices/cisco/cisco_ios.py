@@ -1,3 +1,4 @@
+from devices import parsers
 from devices.cisco import BaseCisco
 
 
@@ -6,6 +7,8 @@ class CiscoIOS(BaseCisco):
     Class to represent Cisco IOS device
     """
 
+    _version_regex = parsers.CISCO_IOS_VERSION
+
     def __init__(self, **kwargs):
         super(CiscoIOS, self).__init__(**kwargs)
 
@@ -17,11 +20,3 @@ class CiscoIOS(BaseCisco):
         :return tuple:
         """
         return 'cisco_ios',
-
-    def _get_version_regex(self):
-        """
-        Returns the regular expression string required for the version property to determine the Cisco IOS version from
-        a show version output
-        :return: Regular expression string
-        """
-        return r"Cisco IOS Software, .* Version ?(.*)"
@@ -0,0 +1,263 @@
+import itertools
+import logging
+import re
+import threading
+
+
+class _JumpHostConnection:
+    """
+    SSH connection to a jump host and the channels to devices opened over it. The connection is added to the pool
+    before it is opened, so channels can be reserved on it while it is being opened
+    """
+
+    def __init__(self):
+        self.client = None
+        self.transport = None
+        self.channels = []
+        self.pending = 0
+        self.error = None
+        self.ready = threading.Event()
+
+    def opened(self, client):
+        self.client = client
+        self.transport = client.get_transport()
+        self.ready.set()
+
+    def failed(self, error):
+        self.error = error
+        self.ready.set()
+
+    def load(self):
+        """
+        Number of channels open or being opened over the connection, forgetting channels which have closed
+        :return: int
+        """
+        self.channels = [c for c in self.channels if not c.closed]
+        return len(self.channels) + self.pending
+
+    def is_active(self):
+        # a connection being opened is active until it fails
+        if not self.ready.is_set():
+            return True
+        return self.transport is not None and self.transport.is_active()
+
+    def close(self):
+        if self.client:
+            self.client.close()
+
+
+class JumpHostPool:
+    """
+    Pool of SSH connections to jump hosts, over which connections to devices are multiplexed as direct-tcpip channels.
+
+    Rather than each device connection opening its own SSH connection to a jump host, a few SSH connections are opened
+    to each jump host and shared. Each channel is passed to netmiko as the socket of a device connection. A new
+    connection to a jump host is only opened when every connection to it carries the maximum number of channels, up to
+    the maximum number of connections, after which channels are added to the least loaded connection. Channels are
+    spread across the jump hosts in turn, and a jump host which fails is skipped for the next.
+
+    The jump hosts are authenticated with a key file, the SSH agent or the default keys in ~/.ssh. Telnet device
+    types can not be connected to through a jump host, and a device with only telnet device types fails to connect.
+
+    Example:
+
+    with JumpHostPool(["admin@bastion1", "admin@bastion2:2222"]) as jump_hosts:
+        device = CiscoIOS(ipaddr="10.0.0.1", credentials=credentials, jump_hosts=jump_hosts)
+    """
+
+    _logger = logging.getLogger("BugChecker.JumpHostPool")
+
+    def __init__(self, jump_hosts, key_file=None, connections=2, channels=10, timeout=10, keepalive=30):
+        """
+        :param jump_hosts: jump hosts in the form [user@]host[:port], or as parsed by parse()
+        :type jump_hosts: list
+
+        :param key_file: private key file used to authenticate to the jump hosts. Default is the SSH agent and the
+                         default keys
+        :type key_file: str
+
+        :param connections: maximum number of SSH connections to each jump host
+        :type connections: int
+
+        :param channels: number of channels carried by a connection before another connection is opened
+        :type channels: int
+
+        :param timeout: seconds to wait for a connection to a jump host, and for a channel to a device
+        :type timeout: float
+
+        :param keepalive: seconds between keepalive messages on idle connections to the jump hosts
+        :type keepalive: int
+        :raises ValueError: If a jump host is invalid
+        """
+        self.jump_hosts = [j if isinstance(j, tuple) else self.parse(j) for j in jump_hosts]
+        self.key_file = key_file
+        self.connections = connections
+        self.channels = channels
+        self.timeout = timeout
+        self.keepalive = keepalive
+
+        self._pool = {j: [] for j in self.jump_hosts}
+        self._locks = {j: threading.Lock() for j in self.jump_hosts}
+        self._next = itertools.cycle(range(len(self.jump_hosts)))
+        self._next_lock = threading.Lock()
+
+    @staticmethod
+    def parse(jump_host):
+        """
+        Parse a jump host
+        :param jump_host: jump host in the form [user@]host[:port], with an IPv6 host in brackets
+        :type jump_host: str
+        :return: tuple of username (or None), host and port
+        :raises ValueError: If the jump host is invalid
+        """
+        match = re.fullmatch(r"(?:([^@\s]+)@)?(\[[0-9A-Fa-f:.]+\]|[^:@\s\[\]]+)(?::(\d+))?", jump_host.strip())
+        if not match:
+            raise ValueError(f"Invalid jump host: {jump_host}. Must be in the form [user@]host[:port]")
+
+        username, host, port = match.groups()
+        return username, host.strip("[]"), int(port or 22)
+
+    def _connect(self, jump_host):
+        """
+        Open an SSH connection to a jump host
+        :param jump_host: tuple of username, host and port
+        :return: paramiko.SSHClient
+        """
+        # imported here as paramiko is slow to import, see devices.base_device._import_netmiko
+        import paramiko
+
+        username, host, port = jump_host
+
+        client = paramiko.SSHClient()
+        client.load_system_host_keys()
+        client.set_missing_host_key_policy(paramiko.WarningPolicy())
+
+        self._logger.info(f"Connecting to jump host {host}:{port}")
+        client.connect(host, port=port, username=username, key_filename=self.key_file, timeout=self.timeout,
+                       banner_timeout=self.timeout, auth_timeout=self.timeout)
+        client.get_transport().set_keepalive(self.keepalive)
+
+        return client
+
+    def _reserve(self, jump_host):
+        """
+        Reserve a channel on the least loaded connection to a jump host, opening a connection if every connection is
+        carrying the maximum number of channels. The connection is opened outside of the lock, so channels can be
+        reserved on the other connections to the jump host during the SSH handshake
+        :param jump_host: tuple of username, host and port
+        :return: _JumpHostConnection, once it is open
+        :raises paramiko.SSHException: If unable to connect to the jump host
+        :raises OSError: If unable to connect to the jump host
+        """
+        with self._locks[jump_host]:
+            pool = self._pool[jump_host]
+
+            for connection in [c for c in pool if not c.is_active()]:
+                self._logger.warning(f"Connection to jump host {jump_host[1]}:{jump_host[2]} lost")
+                connection.close()
+                pool.remove(connection)
+
+            connection = min(pool, key=lambda c: c.load(), default=None)
+
+            opening = connection is None or (connection.load() >= self.channels and len(pool) < self.connections)
+            if opening:
+                connection = _JumpHostConnection()
+                pool.append(connection)
+
+            connection.pending += 1
+
+        if opening:
+            try:
+                connection.opened(self._connect(jump_host))
+            except Exception as e:
+                # the connection is inactive once failed, so it may be pruned by another thread reserving a channel
+                with self._locks[jump_host]:
+                    connection.failed(e)
+                    if connection in pool:
+                        pool.remove(connection)
+
+        # channels reserved on a connection being opened by another thread wait for it, within the connect timeouts
+        connection.ready.wait()
+
+        if connection.error:
+            with self._locks[jump_host]:
+                connection.pending -= 1
+            raise connection.error
+
+        return connection
+
+    def open_channel(self, host, port=22, timeout=None):
+        """
+        Open a direct-tcpip channel to a device through a jump host, for use as the socket of a connection
+        :param host: address of the device
+        :type host: str
+        :param port: port of the device
+        :type port: int
+        :param timeout: seconds to wait for the channel to open. Default is the pool timeout
+        :type timeout: float
+        :return: paramiko.Channel
+        :raises OSError: If unable to open a channel through any jump host
+        """
+        import paramiko
+
+        with self._next_lock:
+            start = next(self._next)
+
+        error = None
+        for i in range(len(self.jump_hosts)):
+            jump_host = self.jump_hosts[(start + i) % len(self.jump_hosts)]
+
+            try:
+                connection = self._reserve(jump_host)
+            except (paramiko.SSHException, OSError) as e:
+                self._logger.warning(f"Unable to connect to jump host {jump_host[1]}:{jump_host[2]}: {e!r}")
+                error = e
+                continue
+
+            try:
+                channel = connection.transport.open_channel("direct-tcpip", (host, port), ("127.0.0.1", 0),
+                                                            timeout=timeout or self.timeout)
+            except (paramiko.SSHException, OSError) as e:
+                self._logger.debug(f"{host} - Unable to open channel through {jump_host[1]}:{jump_host[2]}: {e!r}")
+                error = e
+
+                # the device is unreachable from the jump host, rather than the jump host failing
+                if isinstance(e, paramiko.ChannelException):
+                    break
+                continue
+            else:
+                with self._locks[jump_host]:
+                    connection.channels.append(channel)
+                return channel
+            finally:
+                with self._locks[jump_host]:
+                    connection.pending -= 1
+
+        raise OSError(f"Unable to connect to {host}:{port} through jump hosts: {error}")
+
+    def stats(self):
+        """
+        Number of connections and open channels to each jump host
+        :return: dictionary of "host:port" to a tuple of connections and channels
+        """
+        stats = {}
+        for jump_host, pool in self._pool.items():
+            with self._locks[jump_host]:
+                stats[f"{jump_host[1]}:{jump_host[2]}"] = (len(pool), sum(c.load() for c in pool))
+        return stats
+
+    def close(self):
+        """
+        Close every connection to the jump hosts
+        """
+        for jump_host, pool in self._pool.items():
+            with self._locks[jump_host]:
+                for connection in pool:
+                    connection.close()
+                pool.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -34,19 +34,11 @@ class Linux(BaseDevice):
         :return: str
         """
 
-        if self._version:
+        if self._version or not (self.connection or self.lazy_connect):
             return self._version
         else:
-            reqs_disconnect = False
-
-            if not self.connection:
-                self.connect()
-                reqs_disconnect = True
-
-            self._version = self.connection.send_command("uname -r")
-
-            if reqs_disconnect:
-                self.disconnect()
+            with self.session():
+                self._version = self.connection.send_command("uname -r")
 
             return self._version
 
@@ -66,19 +58,11 @@ class Linux(BaseDevice):
         Get hostname set of device
         :return: str
         """
-        if self._hostname:
+        if self._hostname or not (self.connection or self.lazy_connect):
             return self._hostname
         else:
-            reqs_disconnect = False
-
-            if not self.connection:
-                self.connect()
-                reqs_disconnect = True
-
-            self.hostname = self.connection.send_command("hostname")
-
-            if reqs_disconnect:
-                self.disconnect()
+            with self.session():
+                self.hostname = self.connection.send_command("hostname")
 
             return self._hostname
 
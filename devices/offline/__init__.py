@@ -0,0 +1 @@
+from devices.offline.offline import Offline, OfflineConnection
@@ -0,0 +1,147 @@
+import re
+from pathlib import Path
+
+from devices.base_device import BaseDevice
+from devices.cached_connection import CachedConnection
+
+
+class OfflineConnection:
+    """
+    Connection which answers commands from captured output files instead of a device.
+
+    Provides the subset of the netmiko connection methods used by devices and bug checks.
+    """
+
+    def __init__(self, directory, hostname=None):
+        """
+        :param directory: directory containing the captured output for the device
+        :type directory: str
+        :param hostname: hostname of the device, used for the prompt
+        :type hostname: str
+        """
+        self.directory = Path(directory)
+        self.hostname = hostname
+        self.connection = True
+        self.enable_mode = False
+
+    def disconnect(self):
+        self.connection = False
+
+    def is_alive(self):
+        return self.connection
+
+    def enable(self):
+        self.enable_mode = True
+
+    def check_enable_mode(self):
+        return self.enable_mode
+
+    def exit_enable_mode(self):
+        self.enable_mode = False
+
+    def find_prompt(self):
+        return f"{self.hostname}#"
+
+    def send_command(self, command_string, *args, **kwargs):
+        """
+        Return the captured output of a command
+        :param command_string: command
+        :type command_string: str
+        :return: str - captured output
+        :raises ValueError: If no output was captured for the command
+        """
+        path = self.directory / Offline.command_file(command_string)
+
+        try:
+            return path.read_text()
+        except FileNotFoundError:
+            raise ValueError(f"No captured output for command: {command_string}")
+
+
+class Offline(BaseDevice):
+    """
+    Class to represent a device evaluated from captured command output rather than a live connection.
+
+    The device directory contains a file per command, named by command_file(), and the device facts are passed in
+    when the device is created.
+    """
+
+    def __init__(self, directory=None, device_type=None, manufacture=None, **kwargs):
+        super(Offline, self).__init__(**kwargs)
+        self.directory = directory
+        self._device_type = tuple(device_type or ())
+        self._manufacture = manufacture
+
+    @staticmethod
+    def command_file(command):
+        """
+        Name of the file containing the captured output of a command
+        :param command: command
+        :type command: str
+        :return: str - file name
+        """
+        command = CachedConnection.normalise_command(command)
+        return re.sub(r"[^A-Za-z0-9.-]+", "_", command) + ".txt"
+
+    @property
+    def manufacture(self):
+        """
+        Returns manufacture of device
+        :param self:
+        :return str
+        """
+        return self._manufacture
+
+    @property
+    def device_type(self):
+        """
+        Returns device type
+        :param self:
+        :return tuple:
+        """
+        return self._device_type
+
+    @property
+    def version(self):
+        """
+        Get device OS Version
+        :return: str
+        """
+        return self._version
+
+    @version.setter
+    def version(self, version):
+        """
+        Set Device OS version
+        :param version: OS version
+        :type version: str
+        :return:
+        """
+        self._version = version
+
+    @property
+    def hostname(self):
+        """
+        Get hostname set of device
+        :return: str
+        """
+        return self._hostname
+
+    @hostname.setter
+    def hostname(self, hostname):
+        """
+        Set hostname
+        :param hostname: Hostname of the device
+        :type hostname: str
+        :return:
+        """
+        self._hostname = hostname
+
+    def connect(self):
+        """
+        Open the captured output for the device. No network connection is made
+        :return:
+        """
+        if not self.check_connection():
+            self._logger.debug(f"{self.ipaddr} - Reading captured output from {self.directory}")
+            self.connection = OfflineConnection(self.directory, self.hostname)
@@ -0,0 +1,53 @@
+"""
+Regular expressions for parsing device command output.
+
+Each pattern is compiled once, when the module is imported, and anchored to the end of a line, so a match never
+extends past the end of the line it started on. Patterns with a fixed prefix are anchored to the start of the line too.
+The version is the first group of each version pattern.
+"""
+
+import re
+
+
+def line_pattern(prefix, pattern):
+    """
+    Compile a pattern matching the rest of a line which starts with a literal prefix.
+
+    The prefix is matched before the start of the line is asserted, by a lookbehind, as a pattern starting with "^"
+    is attempted at every position in the output, while a pattern starting with a literal is found by a fast scan.
+    This only makes anchoring cheap, the patterns are not faster than the unanchored patterns they replaced.
+    :param prefix: literal text at the start of the line
+    :type prefix: str
+    :param pattern: regular expression matching the rest of the line, not including the line ending
+    :type pattern: str
+    :return: re.Pattern
+    """
+    prefix = re.escape(prefix)
+    return re.compile(f"{prefix}(?<=^{prefix}){pattern}\\r?$", re.MULTILINE)
+
+
+# "Cisco IOS Software, C2960 Software (C2960-LANBASEK9-M), Version 15.0(2)SE11, RELEASE SOFTWARE (fc3)" in sh ver
+CISCO_IOS_VERSION = line_pattern("Cisco IOS Software, ", r".* Version ?(.*?)")
+
+# "  system:    version 7.0(3)I7(6)" in sh ver. Any indentation is accepted, and as a lookbehind
+# can not assert a variable width start of the line, only the end of the line is anchored
+CISCO_NXOS_VERSION = re.compile(r"system:[ \t]+version ?(.*?)\r?$", re.MULTILINE)
+
+# "Cisco Adaptive Security Appliance Software Version 9.8(2)20" in sh ver
+CISCO_ASA_VERSION = line_pattern("Cisco Adaptive Security Appliance Software Version", r" ?(.*?)")
+
+# "Product Version.................................. 8.5.140.0" in sh sysinfo
+CISCO_WLC_VERSION = line_pattern("Product Version.", r"\.* ?(.*?)")
+
+
+def search(pattern, output):
+    """
+    Search command output for a pattern
+    :param pattern: compiled pattern with a group
+    :type pattern: re.Pattern
+    :param output: command output
+    :type output: str
+    :return: str - the first group of the first match, or None if the pattern does not match
+    """
+    match = pattern.search(output) if output else None
+    return match.group(1) if match else None
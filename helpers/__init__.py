@@ -1,2 +1,12 @@
+from helpers.async_helper import AsyncHelper
+from helpers.checkpoint_helper import CheckpointHelper
+from helpers.concurrency_helper import AdaptiveLimiter
+from helpers.corpus_helper import CorpusHelper
 from helpers.device_helper import DeviceHelper
+from helpers.facts_helper import FactsHelper
+from helpers.metrics_helper import MetricsHelper
+from helpers.reachability_helper import ReachabilityHelper
+from helpers.shard_helper import ShardHelper
+from helpers.template_helper import TemplateHelper
 from helpers.threading_helper import ThreadingHelper
+from helpers.timing_helper import TimingHelper
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import threading
+from queue import Full, Queue
+
+
+class AsyncHelper:
+    """
+    Helper class for running a coroutine function over many items using asyncio, such as probing many devices
+    with non-blocking sockets.
+
+    Items are pulled lazily from the iterable, so only num_of_workers items are in flight at any time regardless of
+    how many items are passed in. Results of imap() wait in a bounded queue, so workers stop taking items while the
+    results are not being read. Blocking functions, such as netmiko based device checks, are run with
+    ThreadingHelper instead.
+
+    Example:
+
+    list = [1,2,3,4]
+
+    async def job(a, **kwargs):
+        return a * kwargs["times_by"]
+
+    args = {"times_by": 2}
+
+    ah = AsyncHelper(worker_func=job, worker_func_args=args, num_of_workers=256)
+    x = ah.run(list)
+    """
+
+    _logger = logging.getLogger("BugChecker.AsyncHelper")
+
+    def __init__(self, worker_func, num_of_workers=256, worker_func_args=None, timeout=None, failure_func=None,
+                 queue_size=None):
+        """
+        :param worker_func: the coroutine function which will be run for each item
+        :type worker_func: Function
+
+        :param num_of_workers: maximum number of items in flight at the same time
+        :type num_of_workers: int
+
+        :param worker_func_args: kwargs to pass to the worker function
+        :type worker_func_args: dictionary
+
+        :param timeout: seconds a single item may run for before it is cancelled. Default is no timeout
+        :type timeout: float
+
+        :param failure_func: function called with the item and exception when the worker function raises or times
+                             out. Its return value is used as the result for the item. If not set the exception is
+                             raised by run()
+        :type failure_func: Function
+
+        :param queue_size: maximum number of results waiting to be read from imap(). When reached workers wait to
+                           deliver their result before taking another item. Default is twice num_of_workers
+        :type queue_size: int
+        :raises TypeError: If worker_func is not a coroutine function
+        """
+        if not asyncio.iscoroutinefunction(worker_func):
+            raise TypeError("AsyncHelper worker_func must be a coroutine function, use ThreadingHelper for blocking "
+                            "functions")
+
+        self.num_of_workers = num_of_workers
+        self.worker_func = worker_func
+        self.worker_func_args = worker_func_args or {}
+        self.timeout = timeout
+        self.failure_func = failure_func
+        self.queue_size = queue_size or num_of_workers * 2
+
+    async def _worker(self, items, on_result):
+        """
+        Worker coroutine. Pulls items from the shared iterator until it is exhausted.
+        """
+        for item in items:
+            try:
+                r = await asyncio.wait_for(self.worker_func(item, **self.worker_func_args), self.timeout)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    e = TimeoutError(f"Item did not complete within {self.timeout} seconds")
+                self._logger.error(f"Worker failed on {item}: {e!r}")
+                if not self.failure_func:
+                    raise e
+                r = self.failure_func(item, e)
+
+            if asyncio.iscoroutinefunction(on_result):
+                await on_result(r)
+            else:
+                on_result(r)
+
+    async def run_async(self, items, on_result=None):
+        """
+        Coroutine for running the worker function across items.
+
+        :param items: iterable of items to pass to the worker function
+        :type items: iterable
+        :param on_result: function or coroutine function called with each return value as it completes. If not set
+                          the return values are collected and returned
+        :type on_result: Function
+        :return: list of the worker function return values in order of completion, or None if on_result is set
+        """
+        items = iter(items)
+        results = None
+
+        if not on_result:
+            results = []
+            on_result = results.append
+
+        self._logger.debug(f"Starting {self.num_of_workers} async workers")
+
+        workers = [self._worker(items, on_result) for _ in range(self.num_of_workers)]
+        await asyncio.gather(*workers)
+
+        return results
+
+    def imap(self, items):
+        """
+        Generator which runs the worker function across items on an event loop in a background thread, yielding each
+        result as it completes.
+
+        :param items: iterable of items, read lazily as workers become free
+        :type items: iterable
+        :return: generator of worker function return values, in order of completion
+        """
+        output_queue = Queue(maxsize=self.queue_size)
+        done = object()
+        error = []
+        stop = threading.Event()
+
+        def read_items():
+            # stop reading items once the generator is closed, such as by breaking out of a loop over it
+            for item in items:
+                if stop.is_set():
+                    return
+                yield item
+
+        def put(r):
+            # wait while the results are not being read, until the generator is closed
+            while not stop.is_set():
+                try:
+                    output_queue.put(r, timeout=0.1)
+                    return
+                except Full:
+                    pass
+
+        async def on_result(r):
+            # put from another thread, so the event loop is not blocked while the queue is full
+            await asyncio.to_thread(put, r)
+
+        def runner():
+            try:
+                asyncio.run(self.run_async(read_items(), on_result))
+            except Exception as e:
+                error.append(e)
+            finally:
+                put(done)
+
+        threading.Thread(target=runner, name="AsyncHelper", daemon=True).start()
+
+        try:
+            while True:
+                r = output_queue.get()
+                if r is done:
+                    break
+                yield r
+        finally:
+            stop.set()
+
+        if error:
+            raise error[0]
+
+    def run(self, items):
+        """
+        Method for running the worker function across items using a new event loop.
+
+        :param items: iterable of items to pass to the worker function
+        :type items: iterable
+        :return: list of the worker function return values, in order of completion
+        """
+        return asyncio.run(self.run_async(items))
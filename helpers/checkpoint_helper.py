@@ -0,0 +1,187 @@
+import json
+import logging
+import threading
+from datetime import datetime
+
+from bugs.base_bug import BaseBug
+
+
+class CheckpointHelper:
+    """
+    Helper class for an append-only checkpoint journal of device bug check results.
+
+    Each line of the journal is a JSON record for a single device and bug id, containing the result and a timestamp.
+    Devices which failed with a connection error are recorded with a bug_id of None. When a scan is restarted the
+    journal is used to skip devices which have already been checked and to restore their results.
+
+    Example:
+
+    journal = CheckpointHelper("results.csv.journal", resume=True)
+    pending = journal.skip_completed(devices, ["CSCvg76186"])
+    """
+
+    _logger = logging.getLogger("BugChecker.CheckpointHelper")
+
+    def __init__(self, journal_file, resume=False):
+        """
+        :param journal_file: location of the journal file
+        :type journal_file: str
+
+        :param resume: if True existing records are loaded and new records appended, otherwise the journal is
+                       truncated
+        :type resume: bool
+        """
+        self.journal_file = journal_file
+        self._lock = threading.Lock()
+        self._records = {}
+
+        if resume:
+            self._load()
+            mode = "a"
+        else:
+            mode = "w"
+
+        self._file = open(journal_file, mode)
+
+        # terminate a partially written line so that new records start on their own line
+        if resume and self._file.tell() > 0:
+            with open(journal_file, "rb") as journal:
+                journal.seek(-1, 2)
+                if journal.read(1) != b"\n":
+                    self._file.write("\n")
+
+    def _load(self):
+        """
+        Load existing records from the journal. Later records for the same device and bug id replace earlier ones.
+        """
+        try:
+            with open(self.journal_file) as journal:
+                for line_number, line in enumerate(journal, 1):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # a partially written line is expected if the previous run was killed mid write
+                        self._logger.warning(f"Ignoring invalid journal record on line {line_number}")
+                        continue
+
+                    self._records.setdefault(record["ipaddr"], {})[record["bug_id"]] = record
+
+        except FileNotFoundError:
+            self._logger.info(f"No journal found at {self.journal_file}, starting new scan")
+
+        self._logger.info(f"Loaded {len(self._records)} devices from journal {self.journal_file}")
+
+    def close(self):
+        """
+        Close the journal file
+        """
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def record(self, device):
+        """
+        Append the results of a checked device to the journal
+        :param device: checked device
+        :type device: BaseDevice
+        """
+        timestamp = datetime.now().isoformat()
+        lines = []
+
+        if device.connection_error:
+            lines.append({
+                "ipaddr": device.ipaddr,
+                "bug_id": None,
+                "connection_error": str(device.connection_error),
+                "timestamp": timestamp
+            })
+        else:
+            for bug_id, result in device.bugs.items():
+                lines.append({
+                    "ipaddr": device.ipaddr,
+                    "bug_id": bug_id,
+                    "hostname": device.hostname,
+                    "version": device.version,
+                    "impacted": result.impacted,
+                    "output": result.output,
+                    "timestamp": timestamp
+                })
+
+        with self._lock:
+            for line in lines:
+                self._file.write(json.dumps(line) + "\n")
+            self._file.flush()
+
+    def checkpoint(self, devices):
+        """
+        Generator which records each device in the journal as it is yielded
+        :param devices: iterable of checked devices
+        :type devices: iterable
+        :return: generator of devices
+        """
+        for device in devices:
+            self.record(device)
+            yield device
+
+    def is_completed(self, device, bug_ids):
+        """
+        Check if all bugs have been recorded for a device without a connection error
+        :param device: device to check
+        :type device: BaseDevice
+        :param bug_ids: manufacture bug ids which are being checked
+        :type bug_ids: list
+        :return: bool
+        """
+        records = self._records.get(device.ipaddr, {})
+        return all(b in records for b in bug_ids)
+
+    def restore(self, device, bug_ids):
+        """
+        Populate a device with the results recorded in the journal
+        :param device: device to restore
+        :type device: BaseDevice
+        :param bug_ids: manufacture bug ids which are being checked
+        :type bug_ids: list
+        :return: device
+        """
+        records = self._records[device.ipaddr]
+
+        for bug_id in bug_ids:
+            record = records[bug_id]
+            device.hostname = record["hostname"]
+            device.version = record["version"]
+            device.bugs[bug_id] = BaseBug.Bug(record["impacted"], record["output"])
+
+        return device
+
+    def restore_completed(self, devices, bug_ids):
+        """
+        Generator which yields the devices already completed in the journal, populated with their results
+        :param devices: iterable of devices
+        :type devices: iterable
+        :param bug_ids: manufacture bug ids which are being checked
+        :type bug_ids: list
+        :return: generator of devices
+        """
+        for device in devices:
+            if self.is_completed(device, bug_ids):
+                yield self.restore(device, bug_ids)
+
+    def skip_completed(self, devices, bug_ids):
+        """
+        Generator which yields only the devices not yet completed in the journal
+        :param devices: iterable of devices
+        :type devices: iterable
+        :param bug_ids: manufacture bug ids which are being checked
+        :type bug_ids: list
+        :return: generator of devices
+        """
+        for device in devices:
+            if self.is_completed(device, bug_ids):
+                self._logger.debug(f"{device.ipaddr} - Already completed in journal, skipping")
+            else:
+                yield device
@@ -0,0 +1,82 @@
+import logging
+import threading
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit which adapts at runtime using additive increase / multiplicative decrease (AIMD).
+
+    Each successful item increases the limit by 1 / limit, so the limit grows by roughly one for every limit items
+    completed. A failed item, such as a timeout or slow connection, halves the limit. The
+    limit is only halved once per limit items completed, so a burst of failures from items already in flight does not
+    collapse it to the minimum.
+
+    Example:
+
+    limiter = AdaptiveLimiter(min_limit=2, max_limit=64, initial_limit=4)
+    limiter.acquire()
+    limiter.release(success=True)
+    """
+
+    _logger = logging.getLogger("BugChecker.AdaptiveLimiter")
+
+    def __init__(self, min_limit=1, max_limit=64, initial_limit=None):
+        """
+        :param min_limit: lowest the limit can be decreased to
+        :type min_limit: int
+
+        :param max_limit: highest the limit can be increased to
+        :type max_limit: int
+
+        :param initial_limit: starting limit. Default is min_limit
+        :type initial_limit: int
+        """
+        if min_limit < 1 or max_limit < min_limit:
+            raise ValueError(f"Invalid limits min: {min_limit} max: {max_limit}")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit or min_limit, min_limit), max_limit))
+        self.peak_limit = int(self.limit)
+        self.in_use = 0
+        self._completed = 0
+        self._last_decrease = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Block until the number in use is below the current limit
+        """
+        with self._condition:
+            while self.in_use >= int(self.limit):
+                self._condition.wait()
+            self.in_use += 1
+
+    def release(self, success=True):
+        """
+        Release a slot, adjusting the limit based on the outcome of the item
+        :param success: False if the item showed signs of overload, such as timeouts. None if there was no item, such
+                        as when a worker stops, in which case the limit is not adjusted
+        :type success: bool
+        """
+        with self._condition:
+            self.in_use -= 1
+
+            if success is None:
+                self._condition.notify_all()
+                return
+
+            self._completed += 1
+            previous = int(self.limit)
+
+            if success:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            elif self._completed - self._last_decrease >= previous:
+                self.limit = max(self.min_limit, self.limit / 2)
+                self._last_decrease = self._completed
+
+            if int(self.limit) != previous:
+                self.peak_limit = max(self.peak_limit, int(self.limit))
+                self._logger.info(f"Concurrency limit changed from {previous} to {int(self.limit)}")
+
+            self._condition.notify_all()
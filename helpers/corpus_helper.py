@@ -0,0 +1,80 @@
+import json
+import logging
+import re
+from pathlib import Path
+
+from devices import CachedConnection, Offline
+
+
+class CorpusHelper:
+    """
+    Helper class for capturing command output from devices, and reading it back to evaluate bug checks offline.
+
+    A corpus is a directory containing a sub directory for each device. Each device directory contains a facts.json
+    file with the device ipaddr, hostname, version, device_type and manufacture, and a file per command output named
+    by Offline.command_file().
+    """
+
+    _logger = logging.getLogger("BugChecker.CorpusHelper")
+
+    FACTS_FILE = "facts.json"
+
+    @staticmethod
+    def capture(device, directory):
+        """
+        Write the command output cached on a device connection, and the device facts, to the corpus
+        :param device: connected device
+        :type device: BaseDevice
+        :param directory: corpus directory
+        :type directory: str
+        """
+        if not isinstance(device.connection, CachedConnection):
+            CorpusHelper._logger.warning(f"{device.ipaddr} - Connection does not cache output, unable to capture")
+            return
+
+        path = Path(directory) / re.sub(r"[^A-Za-z0-9.-]+", "_", device.ipaddr)
+        path.mkdir(parents=True, exist_ok=True)
+
+        # record the device type the connection was established with, rather than every type which was tried
+        device_type = getattr(device.connection.connection, "device_type", None)
+
+        facts = {
+            "ipaddr": device.ipaddr,
+            "hostname": device.hostname,
+            "version": device.version,
+            "device_type": [device_type] if device_type else list(device.device_type),
+            "manufacture": device.manufacture
+        }
+
+        with (path / CorpusHelper.FACTS_FILE).open("w") as f:
+            json.dump(facts, f, indent=2)
+
+        for command, output in device.connection.outputs().items():
+            (path / Offline.command_file(command)).write_text(output)
+
+        CorpusHelper._logger.debug(f"{device.ipaddr} - Captured output to {path}")
+
+    @staticmethod
+    def iter_devices(directory):
+        """
+        Generator which yields an offline device for each device in the corpus
+        :param directory: corpus directory
+        :type directory: str
+        :return: generator of Offline devices
+        :raises ValueError: If directory is not a directory
+        """
+        path = Path(directory)
+
+        if not path.is_dir():
+            raise ValueError(f"Location is not a directory - {directory}")
+
+        for device_path in sorted(path.iterdir()):
+            facts_file = device_path / CorpusHelper.FACTS_FILE
+
+            if not facts_file.is_file():
+                continue
+
+            with facts_file.open() as f:
+                facts = json.load(f)
+
+            yield Offline(directory=str(device_path), **facts)
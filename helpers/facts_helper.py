@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import time
+
+
+class FactsHelper:
+    """
+    Helper class for an on-disk cache of device facts discovered during a scan.
+
+    The hostname, version, device class and device_type of each device are stored against its IP address with the
+    time they were last seen. On later scans devices are pre-populated with facts younger than the TTL, so connecting
+    to them skips the hostname and version discovery commands.
+
+    The credential set and device type which last connected to each device are also stored, and are tried first on
+    later scans regardless of the TTL.
+
+    Example:
+
+    with FactsHelper("facts.json", ttl=86400) as facts:
+        devices = facts.record(scan(facts.prepopulate(devices), bug_list))
+    """
+
+    _logger = logging.getLogger("BugChecker.FactsHelper")
+
+    def __init__(self, facts_file, ttl=86400):
+        """
+        :param facts_file: location of the facts cache file
+        :type facts_file: str
+
+        :param ttl: seconds that cached facts are used for after they were last seen. Default is 24 hours
+        :type ttl: float
+        """
+        self.facts_file = facts_file
+        self.ttl = ttl
+        self._facts = {}
+        self._applied = set()
+        self._updated = set()
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            with open(facts_file) as f:
+                self._facts = json.load(f)
+        except FileNotFoundError:
+            self._logger.info(f"No facts cache found at {facts_file}")
+        except ValueError:
+            self._logger.warning(f"Facts cache {facts_file} is invalid, ignoring")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.save()
+
+    def get(self, ipaddr):
+        """
+        Get the cached facts for a device if they are within the TTL
+        :param ipaddr: IP address of the device
+        :type ipaddr: str
+        :return: dictionary of facts, or None if there are no valid facts
+        """
+        facts = self._facts.get(ipaddr)
+
+        if facts and time.time() - facts["last_seen"] < self.ttl:
+            return facts
+        else:
+            return None
+
+    def apply(self, device):
+        """
+        Pre-populate a device with its cached facts
+        :param device: device to pre-populate
+        :type device: BaseDevice
+        :return: device
+        """
+        self._apply_login(device)
+        facts = self.get(device.ipaddr)
+
+        if not facts:
+            self.misses += 1
+            return device
+
+        self.hits += 1
+
+        device.hostname = facts["hostname"]
+        device.version = facts["version"]
+        self._applied.add(device.ipaddr)
+
+        self._logger.debug(f"{device.ipaddr} - Using cached facts: {facts}")
+        return device
+
+    def _apply_login(self, device):
+        """
+        Set the preferred login of a device to the credential set and device type which last connected. The login is
+        only used if the credential set at that index still has the same username.
+        :param device: device to set the preferred login on
+        :type device: BaseDevice
+        """
+        login = self._facts.get(device.ipaddr, {}).get("login")
+
+        if not login:
+            return
+
+        credentials = device.credentials
+        if isinstance(credentials, dict):
+            credentials = [credentials]
+
+        index = login["credential_index"]
+        if credentials and index < len(credentials) and credentials[index].get("username") == login["username"]:
+            device.preferred_login = (index, login["device_type"])
+
+    def update(self, device):
+        """
+        Store the facts and login of a checked device. The facts of devices which were pre-populated from the cache
+        are not updated so that they still expire, and devices which failed to connect are not stored.
+        :param device: checked device
+        :type device: BaseDevice
+        """
+        if device.connection_error:
+            return
+
+        self._updated.add(device.ipaddr)
+
+        if device.login:
+            index, device_type = device.login
+            credentials = device.credentials if isinstance(device.credentials, list) else [device.credentials]
+            login = {
+                "credential_index": index,
+                "username": credentials[index].get("username"),
+                "device_type": device_type
+            }
+            self._facts.setdefault(device.ipaddr, {"last_seen": 0})["login"] = login
+
+        if device.ipaddr in self._applied:
+            return
+
+        self._facts.setdefault(device.ipaddr, {}).update({
+            "hostname": device.hostname,
+            "version": device.version,
+            "device_class": type(device).__name__,
+            "device_type": list(device.device_type),
+            "last_seen": time.time()
+        })
+
+    def prepopulate(self, devices):
+        """
+        Generator which pre-populates each device with its cached facts
+        :param devices: iterable of devices
+        :type devices: iterable
+        :return: generator of devices
+        """
+        for device in devices:
+            yield self.apply(device)
+
+    def record(self, devices):
+        """
+        Generator which stores the facts of each checked device as it is yielded
+        :param devices: iterable of checked devices
+        :type devices: iterable
+        :return: generator of devices
+        """
+        for device in devices:
+            self.update(device)
+            yield device
+
+    def updates(self):
+        """
+        Get the entries stored since the cache was loaded, so that the updates made in another process can be merged
+        :return: dictionary of IP address to entry
+        """
+        return {ipaddr: self._facts[ipaddr] for ipaddr in self._updated if ipaddr in self._facts}
+
+    def merge(self, entries):
+        """
+        Merge entries returned by updates() of another FactsHelper
+        :param entries: dictionary of IP address to entry
+        :type entries: dict
+        """
+        self._facts.update(entries)
+        self._updated.update(entries)
+
+    def save(self):
+        """
+        Write the facts cache to disk, replacing the previous file once it is completely written
+        """
+        tmp_file = f"{self.facts_file}.tmp"
+
+        with open(tmp_file, "w") as f:
+            json.dump(self._facts, f)
+
+        os.replace(tmp_file, self.facts_file)
+        self._logger.info(f"Facts cache hits: {self.hits} misses: {self.misses}, saved {len(self._facts)} devices")
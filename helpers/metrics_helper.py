@@ -0,0 +1,240 @@
+import bisect
+import functools
+import logging
+import threading
+
+from devices import AuthenticationException, ConnectionTimeoutException
+
+
+class MetricsHelper:
+    """
+    Helper class for exposing the progress of a scan as Prometheus text format metrics over HTTP.
+
+    The metrics are served from a daemon thread while the scan runs. They include the number of devices queued, in
+    flight and done, connection errors by type, the number of connections established to each device, bug hits per
+    bug id and histograms of the timing spans recorded on each device.
+
+    Example:
+
+    with MetricsHelper(port=9100) as metrics:
+        devices = list(scan(devices, bug_list, metrics=metrics))
+    """
+
+    _logger = logging.getLogger("BugChecker.MetricsHelper")
+
+    # upper bounds in seconds of the phase histogram buckets
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, port=9100, host="127.0.0.1", limiter=None):
+        """
+        :param port: port to serve the metrics on. Use 0 for any free port
+        :type port: int
+
+        :param host: address to serve the metrics on. Default is only the local host
+        :type host: str
+
+        :param limiter: adaptive limiter whose current limit is exposed
+        :type limiter: AdaptiveLimiter
+        """
+        self.host = host
+        self.limiter = limiter
+        self._requested_port = port
+        self._server = None
+        self._lock = threading.Lock()
+
+        self.read = 0
+        self.started = 0
+        self.done = 0
+        self.errors = {}
+        self.handshakes = {}
+        self.bugs_checked = {}
+        self.bugs_impacted = {}
+        self._phases = {}
+
+    @property
+    def port(self):
+        """
+        Port the metrics are served on
+        :return: int
+        """
+        return self._server.server_address[1] if self._server else self._requested_port
+
+    def start(self):
+        """
+        Start serving the metrics in a daemon thread
+        """
+        # imported here as http.server is slow to import and only needed when metrics are served
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", MetricsHelper.CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                metrics._logger.debug(f"{self.address_string()} - {format % args}")
+
+        self._server = ThreadingHTTPServer((self.host, self._requested_port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="Metrics", daemon=True).start()
+        self._logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        """
+        Stop serving the metrics
+        """
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @staticmethod
+    def error_type(exception):
+        """
+        Classify a device connection error
+        :param exception: connection error of a device
+        :type exception: Exception
+        :return: str - timeout, auth, or the exception class name
+        """
+        if isinstance(exception, (TimeoutError, ConnectionTimeoutException)):
+            return "timeout"
+        elif isinstance(exception, AuthenticationException):
+            return "auth"
+        else:
+            return type(exception).__name__
+
+    def queue(self, devices):
+        """
+        Generator which counts each device as it is read for checking
+        :param devices: iterable of devices
+        :type devices: iterable
+        :return: generator of devices
+        """
+        for device in devices:
+            with self._lock:
+                self.read += 1
+            yield device
+
+    def instrument(self, worker_func):
+        """
+        Wrap a device check function so that the devices in flight are counted
+        :param worker_func: function called with each device
+        :type worker_func: Function
+        :return: wrapped function
+        """
+
+        @functools.wraps(worker_func)
+        def wrapper(device, *args, **kwargs):
+            with self._lock:
+                self.started += 1
+            return worker_func(device, *args, **kwargs)
+
+        return wrapper
+
+    def update(self, device):
+        """
+        Add a checked device
+        :param device: checked device
+        :type device: BaseDevice
+        """
+        with self._lock:
+            self.done += 1
+
+            if device.connection_error:
+                error_type = self.error_type(device.connection_error)
+                self.errors[error_type] = self.errors.get(error_type, 0) + 1
+
+            self.handshakes[device.handshakes] = self.handshakes.get(device.handshakes, 0) + 1
+
+            for bug_id, result in device.bugs.items():
+                if bug_id in device.skipped_bugs:
+                    continue
+                self.bugs_checked[bug_id] = self.bugs_checked.get(bug_id, 0) + 1
+                if result.impacted:
+                    self.bugs_impacted[bug_id] = self.bugs_impacted.get(bug_id, 0) + 1
+
+            for phase, seconds in device.timings:
+                histogram = self._phases.setdefault(phase, [[0] * len(self.BUCKETS), 0, 0.0])
+                index = bisect.bisect_left(self.BUCKETS, seconds)
+                if index < len(self.BUCKETS):
+                    histogram[0][index] += 1
+                histogram[1] += 1
+                histogram[2] += seconds
+
+    @staticmethod
+    def _label(value):
+        """
+        Escape a label value
+        """
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    def render(self):
+        """
+        Render the metrics in the Prometheus text exposition format
+        :return: str
+        """
+        lines = []
+
+        def metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f"{k}=\"{self._label(v)}\"" for k, v in labels)
+                lines.append(f"{name}{suffix}{{{label_text}}} {value}" if label_text else f"{name}{suffix} {value}")
+
+        with self._lock:
+            metric("bugchecker_devices_read_total", "counter", "Devices read for checking", [("", (), self.read)])
+            metric("bugchecker_devices_queued", "gauge", "Devices read and waiting for a worker",
+                   [("", (), self.read - self.started)])
+            metric("bugchecker_devices_in_flight", "gauge", "Devices being checked",
+                   [("", (), max(self.started - self.done, 0))])
+            metric("bugchecker_devices_done_total", "counter", "Devices checked", [("", (), self.done)])
+            metric("bugchecker_connection_errors_total", "counter", "Devices which failed by error type",
+                   [("", (("type", t),), c) for t, c in sorted(self.errors.items())])
+            metric("bugchecker_handshakes_total", "counter", "Connections established to devices",
+                   [("", (), sum(h * c for h, c in self.handshakes.items()))])
+            metric("bugchecker_devices_by_handshakes_total", "counter",
+                   "Devices checked by the number of connections established to them",
+                   [("", (("handshakes", h),), c) for h, c in sorted(self.handshakes.items())])
+            metric("bugchecker_bug_checked_total", "counter", "Devices checked for each bug",
+                   [("", (("bug_id", b),), c) for b, c in sorted(self.bugs_checked.items())])
+            metric("bugchecker_bug_impacted_total", "counter", "Devices impacted by each bug",
+                   [("", (("bug_id", b),), c) for b, c in sorted(self.bugs_impacted.items())])
+
+            if self.limiter:
+                metric("bugchecker_concurrency_limit", "gauge", "Current adaptive concurrency limit",
+                       [("", (), int(self.limiter.limit))])
+
+            samples = []
+            for phase, (buckets, count, total) in sorted(self._phases.items()):
+                cumulative = 0
+                for bound, bucket in zip(self.BUCKETS, buckets):
+                    cumulative += bucket
+                    samples.append(("_bucket", (("phase", phase), ("le", bound)), cumulative))
+                samples.append(("_bucket", (("phase", phase), ("le", "+Inf")), count))
+                samples.append(("_sum", (("phase", phase),), total))
+                samples.append(("_count", (("phase", phase),), count))
+
+            metric("bugchecker_phase_seconds", "histogram", "Time taken by each phase of the device checks", samples)
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+
+from devices import ConnectionException
+from helpers.async_helper import AsyncHelper
+
+
+class ReachabilityHelper:
+    """
+    Helper class for a pre-flight TCP reachability sweep.
+
+    Each device is probed with a non-blocking TCP connect to its SSH / Telnet ports, many devices at a time.
+    Devices which do not accept a connection on any port have their connection_error set, so they can be reported
+    without waiting on a full SSH connect timeout.
+
+    Example:
+
+    rh = ReachabilityHelper(ports=(22, 23), timeout=2)
+    devices = rh.sweep(devices)
+    """
+
+    _logger = logging.getLogger("BugChecker.ReachabilityHelper")
+
+    def __init__(self, ports=(22, 23), timeout=2.0, concurrency=512):
+        """
+        :param ports: ports to probe. A device with a port set is only probed on that port
+        :type ports: tuple
+
+        :param timeout: seconds to wait for each TCP connection
+        :type timeout: float
+
+        :param concurrency: number of devices probed at the same time
+        :type concurrency: int
+        """
+        self.ports = tuple(ports)
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.reachable = 0
+        self.unreachable = 0
+
+    async def probe(self, host, port):
+        """
+        Attempt a TCP connection
+        :param host: host to connect to
+        :type host: str
+        :param port: port to connect to
+        :type port: int
+        :return: bool if the connection was accepted
+        """
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            return False
+
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+        return True
+
+    async def check(self, device):
+        """
+        Probe all ports of a device, setting connection_error if none accept a connection
+        :param device: device to check
+        :type device: BaseDevice
+        :return: device
+        """
+        ports = (device.port,) if device.port else self.ports
+        results = await asyncio.gather(*[self.probe(device.ipaddr, p) for p in ports])
+
+        if any(results):
+            self.reachable += 1
+        else:
+            self.unreachable += 1
+            self._logger.info(f"{device.ipaddr} - Unreachable on ports {ports}")
+            device.connection_error = ConnectionException(
+                f"Device unreachable on port {', '.join(str(p) for p in ports)}")
+
+        return device
+
+    def sweep(self, devices):
+        """
+        Generator which probes devices concurrently, yielding each device once it has been probed
+        :param devices: iterable of devices, read lazily
+        :type devices: iterable
+        :return: generator of devices, in order of completion
+        """
+        ah = AsyncHelper(worker_func=self.check, num_of_workers=self.concurrency)
+
+        for device in ah.imap(devices):
+            yield device
+
+        self._logger.info(f"Pre-flight sweep reachable: {self.reachable} unreachable: {self.unreachable}")
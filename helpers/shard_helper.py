@@ -0,0 +1,123 @@
+import csv
+import logging
+import re
+import zlib
+
+
+class ShardHelper:
+    """
+    Helper class for splitting a scan into shards, and merging the results of each shard.
+
+    Devices are assigned to a shard by a hash of their IP address, so every process or host given the same device
+    list and shard count checks a distinct set of devices without any coordination. Each shard writes its results to
+    its own CSV file, which are merged into a single CSV once all shards have completed.
+
+    Example:
+
+    devices = ShardHelper.select(devices, 0, 4)
+    write_csv(ShardHelper.shard_file("results.csv", 0, 4), bug_list, scan(devices, bug_list))
+
+    ShardHelper.merge([ShardHelper.shard_file("results.csv", i, 4) for i in range(4)], "results.csv")
+    """
+
+    _logger = logging.getLogger("BugChecker.ShardHelper")
+
+    @staticmethod
+    def parse(shard):
+        """
+        Parse a shard in the form K/N, where K is from 1 to N
+        :param shard: shard text
+        :type shard: str
+        :return: tuple of the zero based shard index and number of shards
+        :raises ValueError: If the shard is not in the form K/N, or K is not from 1 to N
+        """
+        match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", shard)
+
+        if not match:
+            raise ValueError(f"Shard must be in the form K/N: {shard}")
+
+        k, n = int(match.group(1)), int(match.group(2))
+
+        if not 1 <= k <= n:
+            raise ValueError(f"Shard {k} must be from 1 to {n}")
+
+        return k - 1, n
+
+    @staticmethod
+    def shard_of(ipaddr, shards):
+        """
+        Get the shard a device is assigned to. The hash is stable across processes and hosts.
+        :param ipaddr: IP address of the device
+        :type ipaddr: str
+        :param shards: number of shards
+        :type shards: int
+        :return: int - zero based shard index
+        """
+        return zlib.crc32(ipaddr.encode()) % shards
+
+    @classmethod
+    def select(cls, devices, index, shards):
+        """
+        Generator which yields only the devices assigned to a shard
+        :param devices: iterable of devices
+        :type devices: iterable
+        :param index: zero based shard index
+        :type index: int
+        :param shards: number of shards
+        :type shards: int
+        :return: generator of devices
+        """
+        for device in devices:
+            if cls.shard_of(device.ipaddr, shards) == index:
+                yield device
+
+    @staticmethod
+    def shard_file(file, index, shards):
+        """
+        Location of the file written by a shard
+        :param file: location of the file for the full scan
+        :type file: str
+        :param index: zero based shard index
+        :type index: int
+        :param shards: number of shards
+        :type shards: int
+        :return: str
+        """
+        return f"{file}.shard{index + 1}of{shards}"
+
+    @classmethod
+    def merge(cls, shard_files, output_file):
+        """
+        Merge the result CSV files written by each shard into a single CSV file
+        :param shard_files: locations of the shard CSV files
+        :type shard_files: list
+        :param output_file: location of the merged CSV file
+        :type output_file: str
+        :raises ValueError: If the shard files do not have the same columns
+        """
+        shard_files = list(shard_files)
+        header = None
+        count = 0
+
+        with open(output_file, "w") as csvfile:
+            wr = csv.writer(csvfile, dialect="excel")
+
+            for shard_file in shard_files:
+                with open(shard_file, newline="") as shard:
+                    reader = csv.reader(shard, dialect="excel")
+                    shard_header = next(reader, None)
+
+                    if shard_header is None:
+                        raise ValueError(f"Shard file {shard_file} is empty")
+
+                    if header is None:
+                        header = shard_header
+                        wr.writerow(header)
+                    elif shard_header != header:
+                        raise ValueError(f"Shard file {shard_file} columns do not match {shard_files[0]}")
+
+                    for row in reader:
+                        wr.writerow(row)
+                        count += 1
+
+        cls._logger.info(f"Merged {count} devices from {len(shard_files)} shards into {output_file}")
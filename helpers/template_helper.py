@@ -0,0 +1,114 @@
+import logging
+import threading
+from pathlib import Path
+
+from devices import CachedConnection
+
+
+class TemplateHelper:
+    """
+    Helper class for parsing command output into records with TextFSM templates, so bug checks can evaluate
+    predicates over fields rather than searching the raw output.
+
+    Templates are read from bugs/templates, or from the path given, and compiled once per process. The records
+    parsed from a command are cached on the device connection alongside the command output, so bug checks sharing a
+    command and template only parse it once per device.
+
+    Example:
+
+    records = TemplateHelper.parse(connection, "show vstack config", "cisco_ios_show_vstack_config.textfsm")
+    if TemplateHelper.match(records, Role="Client", OperMode="Enabled"):
+        ...
+    """
+
+    _logger = logging.getLogger("BugChecker.TemplateHelper")
+
+    TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "bugs" / "templates"
+
+    _lock = threading.Lock()
+    _templates = {}
+
+    @classmethod
+    def _template(cls, template):
+        """
+        Get a compiled template, compiling it on first use
+        :param template: template file name in TEMPLATE_DIR, or path to the template
+        :type template: str
+        :return: tuple of the TextFSM parser and the lock serialising its use
+        """
+        with cls._lock:
+            if template not in cls._templates:
+                # imported here as textfsm is only needed by bug checks which parse output
+                import textfsm
+
+                path = cls.TEMPLATE_DIR / template
+
+                cls._logger.debug(f"Compiling template {path}")
+                with open(path) as f:
+                    cls._templates[template] = (textfsm.TextFSM(f), threading.Lock())
+
+            return cls._templates[template]
+
+    @classmethod
+    def parse_output(cls, template, output):
+        """
+        Parse command output into records
+        :param template: template file name in TEMPLATE_DIR, or path to the template
+        :type template: str
+        :param output: command output
+        :type output: str
+        :return: list of dictionaries of template value name to value
+        """
+        parser, lock = cls._template(template)
+
+        # a TextFSM parser holds the state of the current parse, so is only used by one thread at a time
+        with lock:
+            parser.Reset()
+            rows = parser.ParseText(output or "")
+            header = parser.header
+
+        return [dict(zip(header, row)) for row in rows]
+
+    @classmethod
+    def parse(cls, connection, command, template):
+        """
+        Send a command and parse its output into records, using the records cached on the connection if the command
+        has already been parsed with the template
+        :param connection: connection to the device
+        :type connection: CachedConnection
+        :param command: command to send
+        :type command: str
+        :param template: template file name in TEMPLATE_DIR, or path to the template
+        :type template: str
+        :return: list of dictionaries of template value name to value
+        """
+        cache = getattr(connection, "records", None)
+        key = (CachedConnection.normalise_command(command), template)
+
+        if isinstance(cache, dict) and key in cache:
+            return cache[key]
+
+        records = cls.parse_output(template, connection.send_command(command))
+
+        if isinstance(cache, dict):
+            cache[key] = records
+
+        return records
+
+    @staticmethod
+    def match(records, **conditions):
+        """
+        Get the records whose fields meet every condition
+        :param records: parsed records
+        :type records: list
+        :param conditions: field name to either a value, compared case insensitively, or a function called with the
+                           field value which returns True if the condition is met
+        :return: list of matching records
+        """
+
+        def meets(value, condition):
+            if callable(condition):
+                return condition(value)
+            return str(value).lower() == str(condition).lower()
+
+        return [r for r in records if all(meets(r.get(k, ""), c) for k, c in conditions.items())]
@@ -1,11 +1,21 @@
+import logging
 import threading
-from queue import Queue
+from collections import deque
+from queue import Full, Queue
 
 
 class ThreadingHelper:
     """
     Helper class for using Threading and Queues.
 
+    Items are fed lazily from the iterable into a bounded input queue, which each worker thread pulls from as soon as
+    it is free. Results are yielded by imap() as they complete, so output is available before all items are processed.
+    Results wait in a bounded output queue, so workers stop taking items while the results are not being read.
+
+    Items can be grouped (for example by site) with a limit on how many items of a group are processed at the same
+    time. Items of a group at its limit are held back, and later items of other groups are fed to free workers in
+    their place.
+
     Example:
 
     list = [1,2,3,4]
@@ -19,7 +29,30 @@ class ThreadingHelper:
     x = th.run(list)
     """
 
-    def __init__(self, worker_func, num_of_workers=4, worker_func_args=None):
+    _logger = logging.getLogger("BugChecker.ThreadingHelper")
+
+    # Placed on the input queue to tell a worker to stop, and on the output queue when a worker has stopped
+    _SENTINEL = object()
+
+    class _Failure:
+        """
+        Wraps an exception raised by the worker function when no failure_func is specified
+        """
+
+        def __init__(self, exception):
+            self.exception = exception
+
+    class _Timeout(Exception):
+        """
+        Raised by __call when an item times out, holding the thread still running the item
+        """
+
+        def __init__(self, thread):
+            self.thread = thread
+
+    def __init__(self, worker_func, num_of_workers=4, worker_func_args=None, queue_size=None, timeout=None,
+                 failure_func=None, limiter=None, feedback_func=None, group_func=None, group_limit=None,
+                 group_buffer=10000, abort_func=None):
         """
         :param worker_func: (function) the function which ill be run in threads
         :type worker_func: Function
@@ -30,39 +63,302 @@ class ThreadingHelper:
         :param worker_func_args: kwargs to pass to the worker function
         :type worker_func_args: dictionary
 
+        :param queue_size: maximum number of items waiting in the input queue, and of results waiting in the output
+                           queue. Default is twice num_of_workers
+        :type queue_size: int
+
+        :param timeout: seconds a single item may run for before it is abandoned. Default is no timeout
+        :type timeout: float
+
+        :param failure_func: function called with the item and exception when the worker function raises or times
+                             out. Its return value is used as the result for the item. If not set the exception is
+                             raised by imap() / run()
+        :type failure_func: Function
+
+        :param limiter: adaptive limit on the number of items processed at the same time. When set num_of_workers
+                        is the limiter max_limit
+        :type limiter: AdaptiveLimiter
+
+        :param feedback_func: function called with each result, returning False if the result shows signs of
+                              overload. Used to adjust the limiter. Default is every result is a success
+        :type feedback_func: Function
+
+        :param group_func: function called with each item, returning the group of the item. Items in the group None
+                           are not limited
+        :type group_func: Function
+
+        :param group_limit: maximum number of items of each group processed at the same time
+        :type group_limit: int
+
+        :param group_buffer: maximum number of items held back while their group is at its limit. When reached the
+                             feeder waits for a held back item to be fed before reading more items
+        :type group_buffer: int
+
+        :param abort_func: function called with an item which has timed out, to make the worker function return,
+                           such as by closing the connection it is blocked reading from. It is called before
+                           failure_func
+        :type abort_func: Function
         """
-        self.input_queue = Queue()
-        self.output_queue = Queue()
+        if limiter:
+            num_of_workers = limiter.max_limit
+
+        self.limiter = limiter
+        self.feedback_func = feedback_func
         self.num_of_workers = num_of_workers
         self.worker_func = worker_func
-        self.worker_func_args = worker_func_args
+        self.worker_func_args = worker_func_args or {}
+        self.queue_size = queue_size or num_of_workers * 2
+        self.timeout = timeout
+        self.failure_func = failure_func
+        self.abort_func = abort_func
+        self.input_queue = None
+        self.output_queue = None
+        self._feeder_error = None
+        self._stop = threading.Event()
+        self.group_func = group_func if group_limit else None
+        self.group_limit = group_limit
+        self.group_buffer = group_buffer
+        self._group_condition = threading.Condition()
+        self._group_active = {}
+        self._deferred = {}
+        self._deferred_count = 0
+
+    def __feeder(self, items):
+        """
+        Feeder thread method. Puts items onto the bounded input queue followed by a sentinel for each worker.
+        """
+        try:
+            if self.group_func:
+                self.__feed_grouped(iter(items))
+            else:
+                for item in items:
+                    if not self.__put(self.input_queue, item):
+                        return
+        except Exception as e:
+            self._logger.error(f"Error reading items: {e}")
+            self._feeder_error = e
+        finally:
+            for i in range(self.num_of_workers):
+                self.__put(self.input_queue, self._SENTINEL)
+
+    def __put(self, queue, item):
+        """
+        Put an item onto a bounded queue, waiting while it is full until imap() is closed, such as by breaking out of a
+        loop over it
+        :return: False if imap() was closed before the item could be put
+        """
+        while not self._stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+
+        return False
+
+    def __feed_grouped(self, items):
+        """
+        Put items onto the input queue, holding back items whose group is at the group limit until an item of that
+        group completes.
+        """
+        exhausted = False
+
+        while not self._stop.is_set():
+            with self._group_condition:
+                item = self.__take_deferred()
+                while item is None and (exhausted or self._deferred_count >= self.group_buffer):
+                    if exhausted and not self._deferred_count:
+                        return
+                    self._group_condition.wait()
+                    item = self.__take_deferred()
+
+            if item is None:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    continue
+
+                group = self.group_func(item)
+                with self._group_condition:
+                    if group is not None and self._group_active.get(group, 0) >= self.group_limit:
+                        self._deferred.setdefault(group, deque()).append(item)
+                        self._deferred_count += 1
+                        continue
+                    self._group_active[group] = self._group_active.get(group, 0) + 1
+
+            if not self.__put(self.input_queue, item):
+                return
+
+    def __take_deferred(self):
+        """
+        Take the oldest held back item of a group below the group limit. Must be called holding the group condition.
+        :return: item, or None if no held back item can be fed
+        """
+        for group, deferred in self._deferred.items():
+            if self._group_active.get(group, 0) < self.group_limit:
+                item = deferred.popleft()
+                if not deferred:
+                    del self._deferred[group]
+                self._deferred_count -= 1
+                self._group_active[group] = self._group_active.get(group, 0) + 1
+                return item
+
+        return None
+
+    def __group_done(self, item):
+        """
+        Release the group limit held by a completed item
+        """
+        group = self.group_func(item)
+        with self._group_condition:
+            self._group_active[group] -= 1
+            self._group_condition.notify()
 
     def __worker(self):
         """
         Thread worker method.
         """
-        # Verify that the queue is not empty
-        while not self.input_queue.empty():
+        while True:
+            if self.limiter:
+                self.limiter.acquire()
+
             item = self.input_queue.get()
-            r = self.worker_func(item, **self.worker_func_args)
 
-            self.output_queue.put(r)
+            if item is self._SENTINEL or self._stop.is_set():
+                if self.limiter:
+                    self.limiter.release(success=None)
+                self.__put(self.output_queue, self._SENTINEL)
+                break
+
+            success = True
+            hung = None
+            try:
+                r = self.__call(item)
+            except Exception as e:
+                if isinstance(e, self._Timeout):
+                    hung = e.thread
+                    e = TimeoutError(f"Item did not complete within {self.timeout} seconds")
+                    self.__abort(item)
+                self._logger.error(f"Worker failed on {item}: {e!r}")
+                success = False
+                if self.failure_func:
+                    r = self.failure_func(item, e)
+                else:
+                    r = self._Failure(e)
+
+            if hung:
+                # report the timeout straight away, but hold the group and limiter slots until the item has stopped
+                self.__put(self.output_queue, r)
+                self.__wait(item, hung)
+
+            if self.group_func:
+                self.__group_done(item)
+
+            if self.limiter:
+                if success and self.feedback_func:
+                    success = self.feedback_func(r)
+                self.limiter.release(success)
 
-            self.input_queue.task_done()
+            if not hung:
+                self.__put(self.output_queue, r)
+
+    def __abort(self, item):
+        """
+        Call the abort function for an item which has timed out
+        """
+        if self.abort_func:
+            try:
+                self.abort_func(item)
+            except Exception as e:
+                self._logger.warning(f"Unable to abort {item}: {e!r}")
+
+    def __wait(self, item, thread):
+        """
+        Wait for the thread of an item which has timed out to stop, for up to another timeout. If it is still running
+        after that it is left behind.
+        """
+        thread.join(self.timeout)
+
+        if thread.is_alive():
+            self._logger.error(f"Abandoning {item}, still running {self.timeout} seconds after it timed out")
+
+    def __call(self, item):
+        """
+        Call the worker function, in a separate thread if there is a timeout so that the worker can stop waiting on it.
+
+        :param item: item to pass to the worker function
+        :return: worker function return value
+        :raises _Timeout: If the item does not complete within the timeout
+        """
+        if not self.timeout:
+            return self.worker_func(item, **self.worker_func_args)
+
+        result = {}
+
+        def target():
+            try:
+                result["value"] = self.worker_func(item, **self.worker_func_args)
+            except Exception as e:
+                result["error"] = e
+
+        # run in a daemon thread so that an item which can not be aborted does not block shutdown
+        t = threading.Thread(target=target, name=f"{threading.current_thread().name}-item", daemon=True)
+        t.start()
+        t.join(self.timeout)
+
+        if t.is_alive():
+            raise self._Timeout(t)
+        elif "error" in result:
+            raise result["error"]
+        else:
+            return result["value"]
+
+    def imap(self, items):
+        """
+        Generator which runs the worker function across items in threads, yielding each result as it completes.
+
+        :param items: iterable of items, read lazily as workers become free
+        :type items: iterable
+        :return: generator of worker function return values, in order of completion
+        """
+        self.input_queue = Queue(maxsize=self.queue_size)
+        self.output_queue = Queue(maxsize=self.queue_size)
+        self._feeder_error = None
+        self._stop = threading.Event()
+        self._group_active = {}
+        self._deferred = {}
+        self._deferred_count = 0
+
+        threading.Thread(target=self.__feeder, args=(items,), name="Feeder", daemon=True).start()
+        for i in range(self.num_of_workers):
+            t = threading.Thread(target=self.__worker, name=f"Worker-{i}", daemon=True)
+            t.start()
+
+        finished = 0
+        try:
+            while finished < self.num_of_workers:
+                r = self.output_queue.get()
+
+                if r is self._SENTINEL:
+                    finished += 1
+                elif isinstance(r, self._Failure):
+                    raise r.exception
+                else:
+                    yield r
+        finally:
+            # stop the feeder and workers if the results are no longer being read
+            self._stop.set()
+
+        if self._feeder_error:
+            raise self._feeder_error
 
     def run(self, items):
         """
         Method for running method in a thread.
 
         :param items: list of items that each element will be swapped into another thread.
-        :type items: list
-        :return: If the function returns a value, a list will be returned with the return values.
-                 If not then None will be returned.
+        :type items: iterable
+        :return: list of worker function return values, in order of completion
         """
-        for item in items:
-            self.input_queue.put(item)
-        for i in range(self.num_of_workers):
-            t = threading.Thread(target=self.__worker)
-            t.start()
-        self.input_queue.join()
-        return list(self.output_queue.queue)
+        return list(self.imap(items))
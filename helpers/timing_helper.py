@@ -0,0 +1,154 @@
+import heapq
+import json
+import logging
+import math
+import threading
+
+
+class TimingHelper:
+    """
+    Helper class for aggregating the timing spans recorded on each device during a scan.
+
+    Each device records (phase, seconds) spans in device.timings, such as the TCP connection, authentication, each
+    device type attempt, discovery, each bug check and disconnect. The spans of every device are aggregated into
+    percentiles per phase, and the slowest devices are kept with their spans.
+
+    Example:
+
+    timings = TimingHelper()
+    devices = list(timings.record(scan(devices, bug_list)))
+    timings.print_summary()
+    """
+
+    _logger = logging.getLogger("BugChecker.TimingHelper")
+
+    # phase covering the whole of a device check, used to rank the slowest devices
+    DEVICE_PHASE = "device"
+
+    def __init__(self, slowest=10):
+        """
+        :param slowest: number of slowest devices to keep
+        :type slowest: int
+        """
+        self.slowest = slowest
+        self._phases = {}
+        self._slowest = []
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def percentile(values, pct):
+        """
+        Nearest rank percentile
+        :param values: sorted values
+        :type values: list
+        :param pct: percentile from 0 to 100
+        :type pct: float
+        :return: float, or None if there are no values
+        """
+        if not values:
+            return None
+
+        rank = max(math.ceil(pct / 100 * len(values)), 1)
+        return values[rank - 1]
+
+    def update(self, device):
+        """
+        Add the timing spans of a checked device
+        :param device: checked device
+        :type device: BaseDevice
+        """
+        total = 0
+        phases = {}
+
+        for phase, seconds in device.timings:
+            phases[phase] = phases.get(phase, 0) + seconds
+            if phase == self.DEVICE_PHASE:
+                total += seconds
+
+        with self._lock:
+            self._count += 1
+
+            for phase, seconds in device.timings:
+                self._phases.setdefault(phase, []).append(seconds)
+
+            entry = (total, self._count, {"ipaddr": device.ipaddr, "seconds": total, "phases": phases})
+            if len(self._slowest) < self.slowest:
+                heapq.heappush(self._slowest, entry)
+            elif self.slowest:
+                heapq.heappushpop(self._slowest, entry)
+
+    def record(self, devices):
+        """
+        Generator which adds the timing spans of each checked device as it is yielded
+        :param devices: iterable of checked devices
+        :type devices: iterable
+        :return: generator of devices
+        """
+        for device in devices:
+            self.update(device)
+            yield device
+
+    def summary(self):
+        """
+        Percentiles of each phase across all devices
+        :return: dictionary of phase to count, total, p50, p95, p99 and max seconds
+        """
+        summary = {}
+
+        with self._lock:
+            for phase, values in sorted(self._phases.items()):
+                values = sorted(values)
+                summary[phase] = {
+                    "count": len(values),
+                    "total": sum(values),
+                    "p50": self.percentile(values, 50),
+                    "p95": self.percentile(values, 95),
+                    "p99": self.percentile(values, 99),
+                    "max": values[-1]
+                }
+
+        return summary
+
+    def slowest_devices(self):
+        """
+        The slowest devices, with the total seconds of each of their phases
+        :return: list of dictionaries with ipaddr, seconds and phases, slowest first
+        """
+        with self._lock:
+            return [e[2] for e in sorted(self._slowest, reverse=True)]
+
+    def print_summary(self):
+        """
+        Print the percentiles of each phase and the slowest devices
+        """
+        summary = self.summary()
+        width = max([len(p) for p in summary] + [5])
+
+        print("-" * (width + 56))
+        print(f"| {'Phase':^{width}} | {'Count':^7} | {'p50':^8} | {'p95':^8} | {'p99':^8} | {'Max':^8} |")
+        print("-" * (width + 56))
+
+        for phase, s in summary.items():
+            print(f"| {phase:<{width}} | {s['count']:>7} | {s['p50']:>8.3f} | {s['p95']:>8.3f} | {s['p99']:>8.3f} "
+                  f"| {s['max']:>8.3f} |")
+
+        print("-" * (width + 56))
+
+        slowest = self.slowest_devices()
+        if slowest:
+            print(f"Slowest devices:")
+            for d in slowest:
+                print(f"  {d['ipaddr']:<40} {d['seconds']:>8.3f}")
+
+    def export(self, file):
+        """
+        Write the summary and slowest devices to a JSON file
+        :param file: location of the JSON file
+        :type file: str
+        """
+        with open(file, "w") as f:
+            json.dump({"devices": self._count, "phases": self.summary(), "slowest": self.slowest_devices()}, f,
+                      indent=2)
+
+        self._logger.info(f"Timing summary of {self._count} devices written to {file}")
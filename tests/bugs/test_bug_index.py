@@ -0,0 +1,43 @@
+import pytest
+
+from bugs.bug_index import DeviceTypeIndex
+
+
+def make_bug(bug_id, device_types=("cisco_ios",)):
+    """ Create a bug class declaring device types """
+
+    class Bug:
+
+        @staticmethod
+        def manufacture_bug_id():
+            return bug_id
+
+        @staticmethod
+        def device_type_requirements():
+            return device_types
+
+    return Bug
+
+
+class TestDeviceTypeIndex:
+
+    bugs = [
+        make_bug("CSCaa00001", device_types=("cisco_ios", "cisco_ios_telnet")),
+        make_bug("CSCaa00002", device_types=("cisco_nxos",)),
+        make_bug("CSCaa00003", device_types=("cisco_ios_telnet",))
+    ]
+
+    def test_applicable(self):
+        """ Test only the bugs for one of the device types apply, in the order they were indexed """
+        index = DeviceTypeIndex(self.bugs)
+        assert index.applicable(("cisco_ios_telnet", "cisco_ios")) == [self.bugs[0], self.bugs[2]]
+        assert index.applicable("cisco_nxos") == [self.bugs[1]]
+
+    def test_no_applicable(self):
+        """ Test no bugs apply to an unknown device type """
+        assert DeviceTypeIndex(self.bugs).applicable(("linux",)) == []
+
+    def test_cached(self):
+        """ Test the applicable bugs of a device type are only looked up once """
+        index = DeviceTypeIndex(self.bugs)
+        assert index.applicable(("cisco_ios",)) is index.applicable(("cisco_ios",))
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+
+import pytest
+
+from bugs import BugClassMapper, BugRegistry
+from bugs.bug_manifest import BUGS
+
+
+class TestBugRegistry:
+
+    def test_manifest_up_to_date(self):
+        """ Test the manifest lists every bug in the package """
+        assert BugRegistry.generate_manifest() == BUGS
+
+    def test_get(self):
+        """ Test a bug class is returned for a case insensitive bug id """
+        bug = BugRegistry.get("cscVG76186")
+        assert bug.manufacture_bug_id() == "CSCvg76186"
+        assert BugRegistry.get("CSCvg76186") is bug
+
+    def test_get_unknown(self):
+        """ Test a KeyError is raised for an unknown bug id """
+        with pytest.raises(KeyError):
+            BugRegistry.get("CSCxx00000")
+
+    def test_mapper(self):
+        """ Test the BugClassMapper returns bugs from the registry """
+        assert BugClassMapper.get_bug_class("TestBug") == [BugRegistry.get("testbug")]
+        assert len(BugClassMapper.get_bug_class()) == len(BUGS)
+
+    def test_package_attribute(self):
+        """ Test bug classes are exported lazily by their package """
+        from bugs.cisco import CSCvg76186
+        assert CSCvg76186 is BugRegistry.get("CSCvg76186")
+
+        with pytest.raises(ImportError):
+            from bugs.cisco import CSCxx00000
+
+    def test_lazy_import(self):
+        """ Test only the requested bug modules are imported """
+        code = ("import sys; from bugs import BugClassMapper; BugClassMapper.get_bug_class(['TestBug']); "
+                "print('bugs.cisco.cscvg76186' in sys.modules)")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        assert output.strip() == "False"
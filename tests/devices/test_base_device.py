@@ -0,0 +1,283 @@
+import threading
+import time
+
+import netmiko
+import pytest
+from netmiko import NetMikoAuthenticationException, NetMikoTimeoutException
+
+import devices.base_device
+from bug_checker import check_bug
+from bugs.cisco import CSCvg76186
+from devices import ConnectionException
+from devices.cisco import CiscoIOSSSHTelnet
+
+credentials = [
+    {'username': 'u1', 'password': 'wrong'},
+    {'username': 'u2', 'password': 'wrong'},
+    {'username': 'u3', 'password': 'p'}
+]
+
+
+class MockConnection:
+    """ Mocking class for connection """
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.connection = True
+
+    def disconnect(self):
+        self.connection = False
+
+    def is_alive(self):
+        return self.connection
+
+    def find_prompt(self):
+        return "device1#"
+
+    def send_command(self, command):
+        return "Cisco IOS Software, C2960 Software (C2960-LANBASEK9-M), Version 15.0(2)SE11"
+
+
+class MockSocket:
+    """ Mocking class for the socket passed to netmiko """
+    def __init__(self, address, timeout):
+        self.address = address
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def create_connection(monkeypatch):
+    """ Replace the TCP connection made before SSH attempts """
+    monkeypatch.setattr(devices.base_device.socket, "create_connection", MockSocket)
+
+
+@pytest.fixture
+def connect_handler(monkeypatch):
+    """ Replace netmiko ConnectHandler, recording each attempt """
+    attempts = []
+    in_flight = set()
+    lock = threading.Lock()
+
+    def connect_handler(**kwargs):
+        with lock:
+            # only one attempt per username may be in flight
+            assert kwargs["username"] not in in_flight
+            in_flight.add(kwargs["username"])
+            attempts.append((kwargs["username"], kwargs["device_type"]))
+        time.sleep(0.01)
+        with lock:
+            in_flight.remove(kwargs["username"])
+        if kwargs["password"] != "p" or kwargs["device_type"] != "cisco_ios_telnet":
+            raise NetMikoAuthenticationException("Authentication failed")
+        return MockConnection(**kwargs)
+
+    monkeypatch.setattr(netmiko, "ConnectHandler", connect_handler)
+    return attempts
+
+
+class TestBaseDeviceConnect:
+
+    def test_connect_sequential(self, connect_handler):
+        """ Test every combination is tried in order until one connects """
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials)
+        device.connect()
+        assert device.login == (2, "cisco_ios_telnet")
+        assert device.connect_attempts == 6
+        assert connect_handler[0] == ("u1", "cisco_ios")
+        assert device.hostname == "device1"
+
+    def test_connect_preferred_login(self, connect_handler):
+        """ Test the preferred login is tried first """
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials)
+        device.preferred_login = (2, "cisco_ios_telnet")
+        device.connect()
+        assert device.connect_attempts == 1
+        assert connect_handler == [("u3", "cisco_ios_telnet")]
+
+    def test_connect_parallel(self, connect_handler):
+        """ Test combinations are attempted in parallel with one attempt per username in flight """
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials, parallel_logins=3)
+        device.connect()
+        assert device.login == (2, "cisco_ios_telnet")
+        assert len(connect_handler) == device.connect_attempts
+        assert device.check_connection() is True
+        assert device.connect_attempts <= 6
+
+    def test_connect_parallel_failed(self, connect_handler):
+        """ Test a ConnectionException is raised when no parallel attempt connects """
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials[:2], parallel_logins=4)
+        with pytest.raises(ConnectionException):
+            device.connect()
+        assert device.connect_attempts == 4
+
+    def test_connect_timeout(self, monkeypatch):
+        """ Test a timeout stops further attempts """
+        def connect_handler(**kwargs):
+            raise NetMikoTimeoutException("Timed out")
+
+        monkeypatch.setattr(netmiko, "ConnectHandler", connect_handler)
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials, parallel_logins=2)
+        with pytest.raises(ConnectionException):
+            device.connect()
+
+    def test_no_credentials(self):
+        """ Test a ConnectionException is raised without credentials """
+        with pytest.raises(ConnectionException):
+            CiscoIOSSSHTelnet(ipaddr="10.0.0.1").connect()
+
+    def test_connect_timings(self, connect_handler):
+        """ Test timing spans are recorded for each phase of connecting """
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials)
+        device.connect()
+        phases = [phase for phase, seconds in device.timings]
+        assert phases.count("tcp") == 3
+        assert phases.count("auth") == 6
+        assert phases.count("attempt:cisco_ios_telnet") == 3
+        assert "connect" in phases
+        assert "discovery" in phases
+
+    def test_tcp_connection_failed(self, monkeypatch):
+        """ Test a failed TCP connection is reported as a timeout without attempting to authenticate """
+        def create_connection(address, timeout):
+            raise ConnectionRefusedError("Connection refused")
+
+        monkeypatch.setattr(devices.base_device.socket, "create_connection", create_connection)
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials)
+        with pytest.raises(ConnectionException):
+            device.connect()
+        assert device.connect_attempts == 1
+
+    def test_socket_closed_on_auth_failure(self, monkeypatch, connect_handler):
+        """ Test the socket opened for an SSH attempt is closed when authentication fails """
+        sockets = []
+
+        class RecordingSocket(MockSocket):
+            closed = False
+
+            def __init__(self, address, timeout):
+                super().__init__(address, timeout)
+                sockets.append(self)
+
+            def close(self):
+                self.closed = True
+
+        monkeypatch.setattr(devices.base_device.socket, "create_connection", RecordingSocket)
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials)
+        device.connect()
+
+        assert len(sockets) == 3
+        assert all(s.closed for s in sockets)
+
+
+class TestBaseDeviceSession:
+
+    def test_session_single_handshake(self, connect_handler):
+        """ Test discovery, nested sessions and disconnects within a session share one connection """
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials)
+        device.preferred_login = (2, "cisco_ios_telnet")
+
+        with device.session():
+            connection = device.connection
+            with device.session():
+                device.disconnect()
+                assert device.hostname == "device1"
+            assert device.connection is connection
+
+        assert device.handshakes == 1
+        assert device.connection is None
+        assert "disconnect" in [phase for phase, seconds in device.timings]
+
+    def test_session_closed_on_error(self, connect_handler):
+        """ Test the connection is closed when a session exits with an exception """
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials)
+
+        with pytest.raises(ValueError):
+            with device.session():
+                raise ValueError("Bug check failed")
+
+        assert device.connection is None
+
+    def test_property_session(self, connect_handler):
+        """ Test an unknown property connects and disconnects when no connection is open """
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials)
+        device.preferred_login = (2, "cisco_ios_telnet")
+
+        assert device.version == "15.0(2)SE11"
+        assert device.handshakes == 1
+        assert device.connection is None
+
+    def test_no_lazy_connect(self, connect_handler):
+        """ Test an unknown property is not discovered by connecting when lazy_connect is disabled """
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials)
+        device.lazy_connect = False
+
+        assert device.hostname is None
+        assert connect_handler == []
+
+    def test_check_bug_single_handshake(self, connect_handler):
+        """ Test a device is connected to once for discovery and every bug check """
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials)
+        device.preferred_login = (2, "cisco_ios_telnet")
+
+        check_bug(device, [CSCvg76186, CSCvg76186])
+
+        assert device.connection_error is None
+        assert device.handshakes == 1
+        assert device.connection is None
+
+    def test_jump_host_channel(self, monkeypatch):
+        """ Test SSH connections use a channel through the jump hosts as their socket """
+        class JumpHosts:
+            def open_channel(self, host, port, timeout):
+                return MockSocket((host, port), timeout)
+
+        monkeypatch.setattr(netmiko, "ConnectHandler", lambda **kwargs: MockConnection(**kwargs))
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials, jump_hosts=JumpHosts())
+
+        with device.session():
+            assert device.connection.connection.kwargs["sock"].address == ("10.0.0.1", 22)
+            assert device.login == (0, "cisco_ios")
+
+
+class TestBaseDeviceEnableMode:
+
+    @pytest.fixture
+    def device(self):
+        class EnableConnection(MockConnection):
+            """ Mocking class for connection, counting the enable mode commands sent """
+            def __init__(self):
+                super().__init__()
+                self.sent = []
+
+            def enable(self):
+                self.sent.append("enable")
+
+            def exit_enable_mode(self):
+                self.sent.append("disable")
+
+            def check_enable_mode(self):
+                self.sent.append("check")
+                return "enable" in self.sent
+
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=credentials)
+        device.connection = EnableConnection()
+        return device
+
+    def test_enter_once(self, device):
+        """ Test enable mode is only entered once, without querying the device """
+        device.enter_enable_mode()
+        device.enter_enable_mode()
+        assert device.connection.sent == ["enable"]
+
+    def test_exit_tracked(self, device):
+        """ Test exiting enable mode uses the tracked mode, and is not repeated """
+        device.enter_enable_mode()
+        device.exit_enable_mode()
+        device.exit_enable_mode()
+        assert device.connection.sent == ["enable", "disable"]
+
+    def test_exit_unknown(self, device):
+        """ Test the device is queried when exiting enable mode if the mode is not known """
+        device.exit_enable_mode()
+        assert device.connection.sent == ["check"]
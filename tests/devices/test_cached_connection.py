@@ -0,0 +1,189 @@
+import pytest
+
+from devices import CachedConnection
+
+
+@pytest.fixture
+def connection():
+    class MockConnection:
+        """ Mocking class for connection """
+        def __init__(self):
+            self.connection = True
+            self.commands = []
+            self.enabled = False
+
+        def disconnect(self):
+            self.connection = False
+
+        def is_alive(self):
+            return self.connection
+
+        def send_command(self, command):
+            self.commands.append(command)
+            return f"output of {command}"
+
+        def send_config_set(self, commands):
+            return ""
+
+        def enable(self):
+            self.enabled = True
+
+        def exit_enable_mode(self):
+            self.enabled = False
+
+    return CachedConnection(MockConnection(), "192.168.254.4")
+
+
+class TestCachedConnection:
+
+    def test_normalise_command(self):
+        """ Test equivalent commands are normalised to the same text """
+        assert CachedConnection.normalise_command("sh  ver ") == "show ver"
+        assert CachedConnection.normalise_command("show vstack config") == "show vstack config"
+
+    def test_send_command_cached(self, connection):
+        """ Test a command is only sent once """
+        assert connection.send_command("show vstack config") == "output of show vstack config"
+        assert connection.send_command("show  vstack config") == "output of show vstack config"
+        assert connection.connection.commands == ["show vstack config"]
+        assert connection.hits == 1
+        assert connection.misses == 1
+
+    def test_distinct_commands(self, connection):
+        """ Test distinct commands are each sent """
+        connection.send_command("sh ver")
+        connection.send_command("show vstack config")
+        assert connection.connection.commands == ["sh ver", "show vstack config"]
+
+    def test_config_change_clears_cache(self, connection):
+        """ Test sending configuration clears cached output """
+        connection.send_command("sh ver")
+        connection.send_config_set(["no vstack"])
+        connection.send_command("sh ver")
+        assert connection.connection.commands == ["sh ver", "sh ver"]
+
+    def test_config_change_clears_records(self, connection):
+        """ Test sending configuration clears records parsed from cached output """
+        connection.records[("show ver", "template")] = []
+        connection.send_config_set(["no vstack"])
+        assert connection.records == {}
+
+    def test_enable_clears_cache(self, connection):
+        """ Test output sent before entering or leaving enable mode is not returned afterwards """
+        send_command = connection.connection.send_command
+        connection.connection.send_command = lambda c: send_command(c) if connection.connection.enabled else \
+            "% Invalid input detected at '^' marker."
+
+        assert connection.send_command("show run").startswith("% Invalid input")
+        connection.enable()
+        assert connection.send_command("show run") == "output of show run"
+        connection.exit_enable_mode()
+        assert connection.send_command("show run").startswith("% Invalid input")
+
+    def test_passthrough(self, connection):
+        """ Test other methods are passed to the wrapped connection """
+        assert connection.is_alive() is True
+        connection.disconnect()
+        assert connection.is_alive() is False
+
+    def test_abort(self, connection):
+        """ Test abort closes the channel and transport of the wrapped connection """
+        class Closable:
+            closed = False
+
+            def close(self):
+                self.closed = True
+
+        connection.connection.remote_conn = Closable()
+        connection.connection.remote_conn_pre = Closable()
+        connection.abort()
+        assert connection.connection.remote_conn.closed and connection.connection.remote_conn_pre.closed
+
+
+@pytest.fixture
+def pipeline_connection():
+    class MockChannelConnection:
+        """ Mocking class for a netmiko connection which echoes commands written to the channel """
+        RETURN = "\n"
+        prompt = "device1#"
+        outputs = {"show vstack config": "Role: Client (SmartInstall enabled)", "sh ver": "Version 15.0(2)SE11"}
+
+        def __init__(self):
+            self.buffer = ""
+            self.writes = []
+
+        def find_prompt(self):
+            return self.prompt
+
+        def normalize_cmd(self, command):
+            return command + self.RETURN
+
+        def normalize_linefeeds(self, output):
+            return output
+
+        def write_channel(self, data):
+            self.writes.append(data)
+            for command in data.splitlines():
+                self.buffer += f"{command}\n{self.outputs[command]}\n{self.prompt}"
+
+        def read_until_pattern(self, pattern, read_timeout):
+            output, separator, self.buffer = self.buffer.partition(self.prompt)
+            return output + separator
+
+        def clear_buffer(self):
+            self.buffer = ""
+
+        def strip_command(self, command, output):
+            return output.split("\n", 1)[1]
+
+        def strip_prompt(self, output):
+            return output.rsplit("\n", 1)[0]
+
+        def send_command(self, command):
+            raise AssertionError("Command should have been batched")
+
+    return CachedConnection(MockChannelConnection(), "192.168.254.4")
+
+
+class TestCachedConnectionBatch:
+
+    def test_batch_pipelined(self, pipeline_connection):
+        """ Test a batch is written to the channel at once and each output is cached """
+        pipeline_connection.send_command_batch(["sh ver", "show vstack config", "sh  ver"])
+        assert pipeline_connection.connection.writes == ["sh ver\nshow vstack config\n"]
+        assert pipeline_connection.send_command("show vstack config") == "Role: Client (SmartInstall enabled)"
+        assert pipeline_connection.send_command("sh ver") == "Version 15.0(2)SE11"
+        assert pipeline_connection.hits == 2
+
+    def test_batch_skips_cached(self, pipeline_connection):
+        """ Test commands already cached are not sent again """
+        pipeline_connection.send_command_batch(["sh ver"])
+        pipeline_connection.send_command_batch(["sh ver", "show vstack config"])
+        assert pipeline_connection.connection.writes == ["sh ver\n", "show vstack config\n"]
+
+    def test_batch_failure_discards_output(self, pipeline_connection):
+        """ Test output left in the channel by a failed batch is discarded before commands are sent individually """
+        connection = pipeline_connection.connection
+
+        def read_until_pattern(pattern, read_timeout):
+            raise OSError("Timed out reading")
+
+        def send_command(command):
+            output, separator, connection.buffer = connection.buffer.partition(connection.prompt)
+            return output
+
+        connection.read_until_pattern = read_until_pattern
+        connection.send_command = send_command
+
+        pipeline_connection.send_command_batch(["sh ver", "show vstack config"])
+        assert connection.buffer == ""
+
+        connection.write_channel("show vstack config\n")
+        assert "SmartInstall" in pipeline_connection.send_command("show vstack config")
+
+    def test_batch_fallback(self, connection):
+        """ Test commands are sent individually when the connection can not be pipelined """
+        connection.send_command_batch(["sh ver", "show vstack config"])
+        assert connection.connection.commands == ["sh ver", "show vstack config"]
+        connection.send_command("sh ver")
+        assert connection.hits == 1
@@ -0,0 +1,254 @@
+import threading
+
+import paramiko
+import pytest
+
+from devices import ConnectionException, JumpHostPool
+from devices.cisco import CiscoIOSSSHTelnet, CiscoIOSTelnet
+
+
+class MockChannel:
+    """ Mocking class for a direct-tcpip channel """
+    def __init__(self, destination):
+        self.destination = destination
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class MockTransport:
+    """ Mocking class for the transport of a jump host connection """
+    def __init__(self, jump_host, unreachable=()):
+        self.jump_host = jump_host
+        self.unreachable = unreachable
+        self.active = True
+        self.channels = []
+
+    def is_active(self):
+        return self.active
+
+    def open_channel(self, kind, destination, source, timeout=None):
+        assert kind == "direct-tcpip"
+        if self.jump_host[1] in self.unreachable:
+            raise paramiko.SSHException("Jump host failed")
+        channel = MockChannel(destination)
+        self.channels.append(channel)
+        return channel
+
+
+class MockClient:
+    """ Mocking class for paramiko SSHClient """
+    def __init__(self, transport):
+        self.transport = transport
+        self.closed = False
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def connect(monkeypatch):
+    """ Replace the SSH connection to a jump host, recording each connection """
+    connections = []
+
+    def connect(self, jump_host):
+        transport = MockTransport(jump_host, getattr(self, "unreachable", ()))
+        connections.append(transport)
+        return MockClient(transport)
+
+    monkeypatch.setattr(JumpHostPool, "_connect", connect)
+    return connections
+
+
+class TestJumpHostPool:
+
+    @pytest.mark.parametrize("jump_host, parsed", [
+        ("bastion1", (None, "bastion1", 22)),
+        ("admin@bastion1:2222", ("admin", "bastion1", 2222)),
+        ("admin@[2001:db8::1]:22", ("admin", "2001:db8::1", 22))
+    ])
+    def test_parse(self, jump_host, parsed):
+        """ Test a jump host is parsed into its username, host and port """
+        assert JumpHostPool.parse(jump_host) == parsed
+
+    @pytest.mark.parametrize("jump_host", ["", "admin@", "bastion1:ssh", "a b"])
+    def test_parse_invalid(self, jump_host):
+        """ Test a ValueError is raised for an invalid jump host """
+        with pytest.raises(ValueError):
+            JumpHostPool.parse(jump_host)
+
+    def test_channels_multiplexed(self, connect):
+        """ Test a connection carries the maximum channels before another is opened, up to the maximum connections """
+        pool = JumpHostPool(["bastion1"], connections=2, channels=3)
+
+        channels = [pool.open_channel(f"10.0.0.{i}") for i in range(8)]
+
+        assert len(connect) == 2
+        assert [len(t.channels) for t in connect] == [4, 4]
+        assert channels[0].destination == ("10.0.0.0", 22)
+
+    def test_closed_channels_released(self, connect):
+        """ Test closed channels no longer count towards the channels of a connection """
+        pool = JumpHostPool(["bastion1"], connections=2, channels=2)
+
+        for channel in [pool.open_channel("10.0.0.1"), pool.open_channel("10.0.0.2")]:
+            channel.close()
+        pool.open_channel("10.0.0.3")
+
+        assert len(connect) == 1
+        assert pool.stats() == {"bastion1:22": (1, 1)}
+
+    def test_jump_hosts_in_turn(self, connect):
+        """ Test channels are spread across the jump hosts """
+        pool = JumpHostPool(["bastion1", "bastion2"])
+
+        pool.open_channel("10.0.0.1")
+        pool.open_channel("10.0.0.2")
+
+        assert [t.jump_host[1] for t in connect] == ["bastion1", "bastion2"]
+
+    def test_failover(self, connect):
+        """ Test a channel is opened through the next jump host when a jump host fails """
+        pool = JumpHostPool(["bastion1", "bastion2"])
+        pool.unreachable = ("bastion1",)
+
+        channel = pool.open_channel("10.0.0.1")
+
+        assert channel.destination == ("10.0.0.1", 22)
+        assert connect[-1].jump_host[1] == "bastion2"
+
+    def test_all_failed(self, connect):
+        """ Test an OSError is raised when no jump host can open a channel """
+        pool = JumpHostPool(["bastion1"])
+        pool.unreachable = ("bastion1",)
+
+        with pytest.raises(OSError):
+            pool.open_channel("10.0.0.1")
+
+    def test_lost_connection_replaced(self, connect):
+        """ Test a connection to a jump host which is no longer active is replaced """
+        pool = JumpHostPool(["bastion1"], connections=1)
+
+        pool.open_channel("10.0.0.1")
+        connect[0].active = False
+        pool.open_channel("10.0.0.2")
+
+        assert len(connect) == 2
+        assert len(connect[1].channels) == 1
+
+    def test_close(self, connect):
+        """ Test closing the pool closes every connection """
+        with JumpHostPool(["bastion1"]) as pool:
+            pool.open_channel("10.0.0.1")
+
+        assert pool.stats() == {"bastion1:22": (0, 0)}
+
+    def test_device_logins(self):
+        """ Test telnet device types are not attempted through a jump host """
+        device = CiscoIOSSSHTelnet(ipaddr="10.0.0.1", credentials=[{}], jump_hosts=JumpHostPool(["bastion1"]))
+        assert [dt for i, dt in device._login_order()] == ["cisco_ios"]
+
+    def test_device_telnet_only(self):
+        """ Test a device with only telnet device types fails with a clear error through a jump host """
+        device = CiscoIOSTelnet(ipaddr="10.0.0.1", credentials=[{}], jump_hosts=JumpHostPool(["bastion1"]))
+        with pytest.raises(ConnectionException, match="Telnet is not supported through a jump host"):
+            device._login_order()
+
+    def test_connect_outside_lock(self, connect, monkeypatch):
+        """ Test channels are reserved on open connections while another connection is being opened """
+        pool = JumpHostPool(["bastion1"], connections=2, channels=1)
+        pool.open_channel("10.0.0.1").close()
+        pool.open_channel("10.0.0.2")
+
+        handshake = threading.Event()
+        connect_open = JumpHostPool._connect
+
+        def slow_connect(self, jump_host):
+            handshake.wait(5)
+            return connect_open(self, jump_host)
+
+        monkeypatch.setattr(JumpHostPool, "_connect", slow_connect)
+        opening = threading.Thread(target=pool.open_channel, args=("10.0.0.3",))
+        opening.start()
+
+        try:
+            # the first connection is at the maximum channels until one is closed
+            while pool.stats()["bastion1:22"][0] < 2:
+                pass
+            connect[0].channels[-1].close()
+            assert pool.open_channel("10.0.0.4").destination == ("10.0.0.4", 22)
+            assert not handshake.is_set()
+        finally:
+            handshake.set()
+            opening.join()
+
+        assert len(connect) == 2
+
+    def test_channels_wait_for_connection(self, connect, monkeypatch):
+        """ Test channels reserved on a connection being opened share it once it is open """
+        pool = JumpHostPool(["bastion1"], connections=1, channels=10)
+
+        handshake = threading.Event()
+        connect_open = JumpHostPool._connect
+
+        def slow_connect(self, jump_host):
+            handshake.wait(5)
+            return connect_open(self, jump_host)
+
+        monkeypatch.setattr(JumpHostPool, "_connect", slow_connect)
+        threads = [threading.Thread(target=pool.open_channel, args=(f"10.0.0.{i}",)) for i in range(3)]
+        for t in threads:
+            t.start()
+        while pool.stats()["bastion1:22"][1] < 3:
+            pass
+        handshake.set()
+        for t in threads:
+            t.join()
+
+        assert len(connect) == 1
+        assert len(connect[0].channels) == 3
+
+    def test_failed_connection_removed(self, monkeypatch):
+        """ Test a connection which fails to open is removed from the pool """
+        def connect(self, jump_host):
+            raise paramiko.SSHException("Handshake failed")
+
+        monkeypatch.setattr(JumpHostPool, "_connect", connect)
+        pool = JumpHostPool(["bastion1"])
+
+        with pytest.raises(OSError):
+            pool.open_channel("10.0.0.1")
+        assert pool.stats() == {"bastion1:22": (0, 0)}
+
+    def test_failed_connection_shared(self, monkeypatch):
+        """ Test every channel waiting on a connection which fails to open raises, leaving the pool empty """
+        handshake = threading.Event()
+        errors = []
+
+        def connect(self, jump_host):
+            handshake.wait(5)
+            raise paramiko.SSHException("Handshake failed")
+
+        def open_channel(host):
+            try:
+                pool.open_channel(host)
+            except OSError as e:
+                errors.append(e)
+
+        monkeypatch.setattr(JumpHostPool, "_connect", connect)
+        pool = JumpHostPool(["bastion1"], connections=1, channels=10)
+        threads = [threading.Thread(target=open_channel, args=(f"10.0.0.{i}",)) for i in range(3)]
+        for t in threads:
+            t.start()
+        while pool.stats()["bastion1:22"][1] < 3:
+            pass
+        handshake.set()
+        for t in threads:
+            t.join()
+
+        assert len(errors) == 3
+        assert pool.stats() == {"bastion1:22": (0, 0)}
@@ -0,0 +1,46 @@
+import pytest
+
+from devices import parsers
+
+ios_sh_ver = "Cisco IOS Software, C2960 Software (C2960-LANBASEK9-M), Version 15.0(2)SE11, RELEASE SOFTWARE (fc3)\r\n" \
+             "ROM: Bootstrap program is C2960 boot loader\r\n"
+
+nxos_sh_ver = "Software\n  BIOS:      version 1.2.0\n  kickstart: version 6.0(2)U2(5)\n  system:    version 6.0(2)U2(5)\n"
+
+asa_sh_ver = "\nCisco Adaptive Security Appliance Software Version 9.8(2)20 \nDevice Manager Version 7.8(2)\n"
+
+wlc_sysinfo = "Product Name..................................... Cisco Controller\n" \
+              "Product Version.................................. 8.5.140.0\n" \
+              "Bootloader Version............................... 1.0.20\n"
+
+
+class TestParsers:
+
+    @pytest.mark.parametrize("pattern, output, version", [
+        (parsers.CISCO_IOS_VERSION, ios_sh_ver, "15.0(2)SE11, RELEASE SOFTWARE (fc3)"),
+        (parsers.CISCO_NXOS_VERSION, nxos_sh_ver, "6.0(2)U2(5)"),
+        (parsers.CISCO_ASA_VERSION, asa_sh_ver, "9.8(2)20 "),
+        (parsers.CISCO_WLC_VERSION, wlc_sysinfo, "8.5.140.0")
+    ])
+    def test_version(self, pattern, output, version):
+        """ Test the version is parsed from the line it is on, without the line ending """
+        assert parsers.search(pattern, output) == version
+
+    @pytest.mark.parametrize("output", [None, "", "% Invalid input detected at '^' marker.\n"])
+    def test_no_match(self, output):
+        """ Test None is returned when the output does not contain the pattern """
+        assert parsers.search(parsers.CISCO_IOS_VERSION, output) is None
+
+    def test_anchored(self):
+        """ Test a pattern only matches at the start of a line """
+        assert parsers.search(parsers.CISCO_WLC_VERSION, "Previous Product Version...... 8.2.100.0\n") is None
+
+    def test_wlc_dots(self):
+        """ Test the WLC version pattern only matches a run of dots """
+        assert parsers.search(parsers.CISCO_WLC_VERSION, "Product Version Information: none\n") is None
+
+    @pytest.mark.parametrize("indent", ["", "   ", "\t"])
+    def test_nxos_indent(self, indent):
+        """ Test the NX-OS version is parsed whatever the indentation of the system line """
+        output = f"Software\n{indent}system:    version 7.0(3)I7(6)\r\n"
+        assert parsers.search(parsers.CISCO_NXOS_VERSION, output) == "7.0(3)I7(6)"
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import pytest
+
+from helpers import AsyncHelper
+
+
+async def times_by(a, **kwargs):
+    return a * kwargs["times_by"]
+
+
+async def sleep(a):
+    await asyncio.sleep(a)
+    return a
+
+
+class TestAsyncHelper:
+
+    def test_run(self):
+        """ Test run returns a result for every item """
+        ah = AsyncHelper(worker_func=times_by, worker_func_args={"times_by": 2}, num_of_workers=4)
+        assert sorted(ah.run([1, 2, 3, 4])) == [2, 4, 6, 8]
+
+    def test_blocking_function_rejected(self):
+        """ Test a TypeError is raised for a function which is not a coroutine function """
+        with pytest.raises(TypeError):
+            AsyncHelper(worker_func=lambda a: a)
+
+    def test_completion_order(self):
+        """ Test results are returned in order of completion rather than the order of the items """
+        ah = AsyncHelper(worker_func=sleep, num_of_workers=3)
+        assert ah.run([0.2, 0.1, 0]) == [0, 0.1, 0.2]
+
+    def test_timeout(self):
+        """ Test an item which times out is cancelled and reported through failure_func without stalling others """
+        ah = AsyncHelper(worker_func=sleep, num_of_workers=2, timeout=0.1, failure_func=lambda item, e: type(e))
+        start = time.monotonic()
+        assert sorted(ah.run([10, 10, 0, 0, 0]), key=str) == [0, 0, 0, TimeoutError, TimeoutError]
+        assert time.monotonic() - start < 1
+
+    def test_failure_raised(self):
+        """ Test worker exceptions are raised when no failure_func is set """
+        async def job(a):
+            raise RuntimeError("failed")
+
+        with pytest.raises(RuntimeError):
+            AsyncHelper(worker_func=job).run([1])
+
+    def test_failure_func(self):
+        """ Test worker exceptions are passed to failure_func """
+        async def job(a):
+            raise RuntimeError(f"failed {a}")
+
+        ah = AsyncHelper(worker_func=job, num_of_workers=1, failure_func=lambda item, e: str(e))
+        assert ah.run([1, 2]) == ["failed 1", "failed 2"]
+
+    def test_imap_failure_raised(self):
+        """ Test worker exceptions are raised by imap when no failure_func is set """
+        async def job(a):
+            raise RuntimeError("failed")
+
+        with pytest.raises(RuntimeError):
+            list(AsyncHelper(worker_func=job).imap([1]))
+
+    def test_imap_early_exit(self):
+        """ Test items stop being read once the imap generator is closed """
+        produced = []
+
+        def items():
+            for i in range(1000):
+                produced.append(i)
+                yield 0.01
+
+        ah = AsyncHelper(worker_func=sleep, num_of_workers=2)
+        for r in ah.imap(items()):
+            break
+
+        time.sleep(0.1)
+        assert len(produced) < 10
+
+    def test_imap_backpressure(self):
+        """ Test items stop being read while the results of imap are not read """
+        produced = []
+
+        def items():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        ah = AsyncHelper(worker_func=times_by, num_of_workers=2, worker_func_args={"times_by": 1}, queue_size=2)
+        results = ah.imap(items())
+        next(results)
+        time.sleep(0.2)
+
+        # a result for each worker and each queue slot, with an item taken by each waiting worker
+        assert len(produced) <= 8
+        results.close()
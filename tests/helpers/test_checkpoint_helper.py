@@ -0,0 +1,82 @@
+import pytest
+
+from bugs import BaseBug
+from devices.linux import Linux
+from helpers import CheckpointHelper
+
+cred = {'username': 'u', 'password': 'p'}
+
+
+def checked_device(ipaddr, impacted=True):
+    d = Linux(ipaddr=ipaddr, credentials=cred, hostname=f"host-{ipaddr}", version="1.0")
+    d.bugs["TestBug"] = BaseBug.Bug(impacted, "output")
+    return d
+
+
+@pytest.fixture
+def journal_file(tmp_path):
+    return str(tmp_path / "results.journal")
+
+
+class TestCheckpointHelper:
+
+    def test_resume(self, journal_file):
+        """ Test devices recorded in the journal are skipped and restored on resume """
+        with CheckpointHelper(journal_file) as journal:
+            journal.record(checked_device("10.0.0.1"))
+
+        devices = [Linux(ipaddr="10.0.0.1", credentials=cred), Linux(ipaddr="10.0.0.2", credentials=cred)]
+
+        with CheckpointHelper(journal_file, resume=True) as journal:
+            pending = list(journal.skip_completed(devices, ["TestBug"]))
+            restored = list(journal.restore_completed(devices, ["TestBug"]))
+
+        assert [d.ipaddr for d in pending] == ["10.0.0.2"]
+        assert restored[0].ipaddr == "10.0.0.1"
+        assert restored[0].hostname == "host-10.0.0.1"
+        assert restored[0].bugs["TestBug"] == BaseBug.Bug(True, "output")
+
+    def test_connection_error_not_completed(self, journal_file):
+        """ Test devices which failed to connect are checked again on resume """
+        device = Linux(ipaddr="10.0.0.1", credentials=cred)
+        device.connection_error = Exception("Unable to connect to device")
+
+        with CheckpointHelper(journal_file) as journal:
+            journal.record(device)
+
+        with CheckpointHelper(journal_file, resume=True) as journal:
+            assert journal.is_completed(device, ["TestBug"]) is False
+
+    def test_missing_bug_not_completed(self, journal_file):
+        """ Test devices are checked again when an additional bug is selected """
+        with CheckpointHelper(journal_file) as journal:
+            journal.record(checked_device("10.0.0.1"))
+
+        with CheckpointHelper(journal_file, resume=True) as journal:
+            assert journal.is_completed(Linux(ipaddr="10.0.0.1"), ["TestBug", "CSCvg76186"]) is False
+
+    def test_partial_line_ignored(self, journal_file):
+        """ Test a partially written record from a killed run is ignored """
+        with CheckpointHelper(journal_file) as journal:
+            journal.record(checked_device("10.0.0.1"))
+
+        with open(journal_file, "a") as f:
+            f.write('{"ipaddr": "10.0.0.2", "bug_')
+
+        with CheckpointHelper(journal_file, resume=True) as journal:
+            assert journal.is_completed(Linux(ipaddr="10.0.0.1"), ["TestBug"]) is True
+            assert journal.is_completed(Linux(ipaddr="10.0.0.2"), ["TestBug"]) is False
+            journal.record(checked_device("10.0.0.3"))
+
+        with CheckpointHelper(journal_file, resume=True) as journal:
+            assert journal.is_completed(Linux(ipaddr="10.0.0.3"), ["TestBug"]) is True
+
+    def test_no_resume_truncates(self, journal_file):
+        """ Test the journal is started again when not resuming """
+        with CheckpointHelper(journal_file) as journal:
+            journal.record(checked_device("10.0.0.1"))
+
+        CheckpointHelper(journal_file).close()
+
+        with CheckpointHelper(journal_file, resume=True) as journal:
+            assert journal.is_completed(Linux(ipaddr="10.0.0.1"), ["TestBug"]) is False
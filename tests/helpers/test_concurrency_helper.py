@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from helpers import AdaptiveLimiter, ThreadingHelper
+
+
+class TestAdaptiveLimiter:
+
+    def test_invalid_limits(self):
+        """ Test a ValueError is raised when the limits are invalid """
+        with pytest.raises(ValueError):
+            AdaptiveLimiter(min_limit=4, max_limit=2)
+
+    def test_additive_increase(self):
+        """ Test the limit increases by roughly one after limit successes """
+        limiter = AdaptiveLimiter(min_limit=1, max_limit=8, initial_limit=2)
+        for i in range(3):
+            limiter.acquire()
+            limiter.release(success=True)
+        assert int(limiter.limit) == 3
+
+    def test_max_limit(self):
+        """ Test the limit does not increase above max_limit """
+        limiter = AdaptiveLimiter(min_limit=1, max_limit=3, initial_limit=3)
+        for i in range(20):
+            limiter.acquire()
+            limiter.release(success=True)
+        assert limiter.limit == 3
+
+    def test_multiplicative_decrease(self):
+        """ Test a failure halves the limit, and failures already in flight do not decrease it again """
+        limiter = AdaptiveLimiter(min_limit=1, max_limit=64, initial_limit=16)
+        limiter._completed = 16
+        for i in range(4):
+            limiter.acquire()
+        for i in range(4):
+            limiter.release(success=False)
+        assert int(limiter.limit) == 8
+
+    def test_min_limit(self):
+        """ Test the limit does not decrease below min_limit """
+        limiter = AdaptiveLimiter(min_limit=2, max_limit=64, initial_limit=3)
+        for i in range(10):
+            limiter.acquire()
+            limiter.release(success=False)
+        assert limiter.limit == 2
+
+    def test_release_without_outcome(self):
+        """ Test releasing without an outcome frees the slot without adjusting the limit """
+        limiter = AdaptiveLimiter(min_limit=1, max_limit=8, initial_limit=2)
+        for i in range(2):
+            limiter.acquire()
+            limiter.release(success=None)
+        assert limiter.limit == 2
+        assert limiter.in_use == 0
+
+    def test_threading_helper_workers_stopping(self):
+        """ Test workers stopping do not increase the limit """
+        limiter = AdaptiveLimiter(min_limit=1, max_limit=8, initial_limit=2)
+        ThreadingHelper(worker_func=lambda a: a, limiter=limiter).run([])
+        assert limiter.limit == 2
+
+    def test_threading_helper_limit(self):
+        """ Test the ThreadingHelper does not exceed the limit """
+        limiter = AdaptiveLimiter(min_limit=2, max_limit=2)
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def job(a):
+            with lock:
+                active.append(a)
+                peak.append(len(active))
+            with lock:
+                active.remove(a)
+            return a
+
+        th = ThreadingHelper(worker_func=job, limiter=limiter, feedback_func=lambda r: r % 2 == 0)
+        assert sorted(th.run(range(50))) == list(range(50))
+        assert max(peak) <= 2
+        assert th.num_of_workers == 2
+        assert limiter.in_use == 0
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+import bug_checker
+from bugs.cisco import CSCvg76186
+from devices import CachedConnection, Offline
+from devices.cisco import CiscoIOS
+from helpers import CorpusHelper
+
+affected_output = "Capability: Client\nOper Mode: Enabled\nRole: Client"
+
+facts = {
+    "ipaddr": "192.168.254.4",
+    "hostname": "device1",
+    "version": "15.0(2)SE11",
+    "device_type": ["cisco_ios"],
+    "manufacture": "cisco"
+}
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    device_path = tmp_path / "192.168.254.4"
+    device_path.mkdir()
+    (device_path / CorpusHelper.FACTS_FILE).write_text(json.dumps(facts))
+    (device_path / Offline.command_file("show vstack config")).write_text(affected_output)
+    return tmp_path
+
+
+class TestCorpusHelper:
+
+    def test_command_file(self):
+        """ Test equivalent commands map to the same file """
+        assert Offline.command_file("show vstack config") == "show_vstack_config.txt"
+        assert Offline.command_file("sh  vstack config") == "show_vstack_config.txt"
+        assert Offline.command_file("show run | inc vstack") == "show_run_inc_vstack.txt"
+
+    def test_iter_devices(self, corpus):
+        """ Test a device is read from the corpus with its facts """
+        devices = list(CorpusHelper.iter_devices(str(corpus)))
+        assert len(devices) == 1
+        assert devices[0].ipaddr == facts["ipaddr"]
+        assert devices[0].hostname == facts["hostname"]
+        assert devices[0].version == facts["version"]
+        assert devices[0].device_type == ("cisco_ios",)
+
+    def test_iter_devices_not_directory(self, tmp_path):
+        """ Test a ValueError is raised when the corpus does not exist """
+        with pytest.raises(ValueError):
+            list(CorpusHelper.iter_devices(str(tmp_path / "missing")))
+
+    def test_offline_check_bug(self, corpus):
+        """ Test a bug check is evaluated against the captured output """
+        device = bug_checker.check_bug(next(CorpusHelper.iter_devices(str(corpus))), [CSCvg76186])
+        assert device.connection_error is None
+        assert device.bugs["CSCvg76186"].impacted is True
+
+    def test_offline_missing_output(self, corpus):
+        """ Test a connection error is reported when a command was not captured """
+        (corpus / "192.168.254.4" / "show_vstack_config.txt").unlink()
+        device = bug_checker.check_bug(next(CorpusHelper.iter_devices(str(corpus))), [CSCvg76186])
+        assert isinstance(device.connection_error, ValueError)
+
+    def test_capture(self, corpus, tmp_path):
+        """ Test captured output can be read back as a corpus """
+        class MockConnection:
+            """ Mocking class for connection """
+            device_type = "cisco_ios"
+
+            def send_command(self, command):
+                return affected_output
+
+        device = CiscoIOS(ipaddr="10.0.0.1", hostname="device2", version="15.0(2)SE11")
+        device.connection = CachedConnection(MockConnection(), device.ipaddr)
+        device.connection.send_command("show vstack config")
+
+        CorpusHelper.capture(device, str(tmp_path / "capture"))
+
+        captured = next(CorpusHelper.iter_devices(str(tmp_path / "capture")))
+        assert captured.hostname == "device2"
+        assert captured.device_type == ("cisco_ios",)
+        captured.connect()
+        assert captured.connection.send_command("show vstack config") == affected_output
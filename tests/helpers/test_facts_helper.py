@@ -0,0 +1,91 @@
+import json
+import time
+
+import pytest
+
+from devices.cisco import CiscoIOS
+from helpers import FactsHelper
+
+cred = {'username': 'u', 'password': 'p'}
+
+
+@pytest.fixture
+def facts_file(tmp_path):
+    return str(tmp_path / "facts.json")
+
+
+def checked_device():
+    return CiscoIOS(ipaddr="10.0.0.1", credentials=cred, hostname="switch1", version="15.0(2)SE11")
+
+
+class TestFactsHelper:
+
+    def test_prepopulate(self, facts_file):
+        """ Test facts stored by one scan are used by the next """
+        with FactsHelper(facts_file) as facts:
+            list(facts.record([checked_device()]))
+
+        facts = FactsHelper(facts_file)
+        device = facts.apply(CiscoIOS(ipaddr="10.0.0.1", credentials=cred))
+        assert device.hostname == "switch1"
+        assert device.version == "15.0(2)SE11"
+        assert facts.hits == 1
+
+    def test_expired(self, facts_file):
+        """ Test facts older than the TTL are not used """
+        with FactsHelper(facts_file) as facts:
+            facts.update(checked_device())
+
+        with open(facts_file) as f:
+            data = json.load(f)
+        data["10.0.0.1"]["last_seen"] = time.time() - 7200
+        with open(facts_file, "w") as f:
+            json.dump(data, f)
+
+        facts = FactsHelper(facts_file, ttl=3600)
+        device = facts.apply(CiscoIOS(ipaddr="10.0.0.1", credentials=cred))
+        assert device._hostname is None
+        assert facts.misses == 1
+
+    def test_connection_error_not_stored(self, facts_file):
+        """ Test devices which failed to connect are not stored """
+        device = CiscoIOS(ipaddr="10.0.0.1", credentials=cred)
+        device.connection_error = Exception("Unable to connect to device")
+
+        facts = FactsHelper(facts_file)
+        facts.update(device)
+        assert facts.get("10.0.0.1") is None
+
+    def test_preferred_login(self, facts_file):
+        """ Test the credential set and device type which connected are tried first on the next scan """
+        credentials = [{'username': 'u1', 'password': 'p'}, {'username': 'u2', 'password': 'p'}]
+        device = CiscoIOS(ipaddr="10.0.0.1", credentials=credentials, hostname="switch1", version="1.0")
+        device.login = (1, "cisco_ios")
+
+        with FactsHelper(facts_file) as facts:
+            facts.update(device)
+
+        device = FactsHelper(facts_file).apply(CiscoIOS(ipaddr="10.0.0.1", credentials=credentials))
+        assert device.preferred_login == (1, "cisco_ios")
+        assert device._login_order() == [(1, "cisco_ios"), (0, "cisco_ios")]
+
+    def test_preferred_login_credentials_changed(self, facts_file):
+        """ Test the stored login is ignored when the credential set at its index has changed """
+        device = checked_device()
+        device.login = (0, "cisco_ios")
+
+        with FactsHelper(facts_file) as facts:
+            facts.update(device)
+
+        device = FactsHelper(facts_file).apply(CiscoIOS(ipaddr="10.0.0.1", credentials={'username': 'other'}))
+        assert device.preferred_login is None
+
+    def test_merge_updates(self, facts_file):
+        """ Test updates made by another process are merged and saved """
+        shard_facts = FactsHelper(facts_file)
+        shard_facts.update(checked_device())
+
+        with FactsHelper(facts_file) as facts:
+            facts.merge(shard_facts.updates())
+
+        assert FactsHelper(facts_file).get("10.0.0.1")["hostname"] == "switch1"
@@ -0,0 +1,98 @@
+import urllib.request
+
+import pytest
+
+from bugs import BaseBug
+from devices import AuthenticationException, ConnectionException, ConnectionTimeoutException
+from helpers import MetricsHelper
+
+
+class Device:
+
+    def __init__(self, connection_error=None, bugs=None, timings=None, handshakes=1, skipped_bugs=None):
+        self.connection_error = connection_error
+        self.bugs = bugs or {}
+        self.skipped_bugs = skipped_bugs or set()
+        self.timings = timings or []
+        self.handshakes = handshakes
+
+
+class TestMetricsHelper:
+
+    @pytest.mark.parametrize("exception, error_type", [
+        (TimeoutError(), "timeout"),
+        (ConnectionTimeoutException(), "timeout"),
+        (AuthenticationException(), "auth"),
+        (ConnectionException(), "ConnectionException"),
+        (ValueError(), "ValueError")
+    ])
+    def test_error_type(self, exception, error_type):
+        """ Test connection errors are classified """
+        assert MetricsHelper.error_type(exception) == error_type
+
+    def test_device_counts(self):
+        """ Test devices queued, in flight and done are counted """
+        metrics = MetricsHelper()
+        check = metrics.instrument(lambda device: device)
+
+        devices = metrics.queue([Device() for _ in range(3)])
+        check(next(devices))
+        check(next(devices))
+        next(devices)
+        metrics.update(Device(connection_error=AuthenticationException()))
+
+        text = metrics.render()
+        assert "bugchecker_devices_read_total 3\n" in text
+        assert "bugchecker_devices_queued 1\n" in text
+        assert "bugchecker_devices_in_flight 1\n" in text
+        assert "bugchecker_devices_done_total 1\n" in text
+        assert "bugchecker_connection_errors_total{type=\"auth\"} 1\n" in text
+
+    def test_bug_hits(self):
+        """ Test bug hits are counted per bug id """
+        metrics = MetricsHelper()
+        metrics.update(Device(bugs={"CSCvg76186": BaseBug.Bug(True, "")}))
+        metrics.update(Device(bugs={"CSCvg76186": BaseBug.Bug(False, "")}))
+
+        text = metrics.render()
+        assert "bugchecker_bug_checked_total{bug_id=\"CSCvg76186\"} 2\n" in text
+        assert "bugchecker_bug_impacted_total{bug_id=\"CSCvg76186\"} 1\n" in text
+
+    def test_skipped_bugs_not_counted(self):
+        """ Test bugs recorded without being checked are not counted as checked """
+        metrics = MetricsHelper()
+        metrics.update(Device(bugs={"CSCvg76186": BaseBug.Bug(False, "Not applicable")}, skipped_bugs={"CSCvg76186"}))
+
+        assert "bugchecker_bug_checked_total{bug_id=\"CSCvg76186\"}" not in metrics.render()
+
+    def test_handshakes(self):
+        """ Test devices are counted by the number of connections established to them """
+        metrics = MetricsHelper()
+        metrics.update(Device())
+        metrics.update(Device())
+        metrics.update(Device(handshakes=2))
+
+        text = metrics.render()
+        assert "bugchecker_handshakes_total 4\n" in text
+        assert "bugchecker_devices_by_handshakes_total{handshakes=\"1\"} 2\n" in text
+        assert "bugchecker_devices_by_handshakes_total{handshakes=\"2\"} 1\n" in text
+
+    def test_phase_histogram(self):
+        """ Test phase spans are counted in cumulative buckets """
+        metrics = MetricsHelper()
+        metrics.update(Device(timings=[("tcp", 0.01), ("tcp", 0.2), ("tcp", 1000)]))
+
+        text = metrics.render()
+        assert "bugchecker_phase_seconds_bucket{phase=\"tcp\",le=\"0.05\"} 1\n" in text
+        assert "bugchecker_phase_seconds_bucket{phase=\"tcp\",le=\"0.25\"} 2\n" in text
+        assert "bugchecker_phase_seconds_bucket{phase=\"tcp\",le=\"300\"} 2\n" in text
+        assert "bugchecker_phase_seconds_bucket{phase=\"tcp\",le=\"+Inf\"} 3\n" in text
+        assert "bugchecker_phase_seconds_count{phase=\"tcp\"} 3\n" in text
+
+    def test_http(self):
+        """ Test metrics are served over HTTP """
+        with MetricsHelper(port=0) as metrics:
+            metrics.update(Device())
+            with urllib.request.urlopen(f"http://127.0.0.1:{metrics.port}/metrics") as response:
+                assert response.headers["Content-Type"].startswith("text/plain")
+                assert "bugchecker_devices_done_total 1" in response.read().decode()
@@ -0,0 +1,47 @@
+import socket
+
+import pytest
+
+from devices.cisco import CiscoIOS
+from helpers import ReachabilityHelper
+
+
+@pytest.fixture
+def listening_port():
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(("127.0.0.1", 0))
+    s.listen(16)
+    yield s.getsockname()[1]
+    s.close()
+
+
+@pytest.fixture
+def closed_port():
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class TestReachabilityHelper:
+
+    def test_sweep(self, listening_port, closed_port):
+        """ Test unreachable devices have connection_error set and reachable devices do not """
+        reachable = CiscoIOS(ipaddr="127.0.0.1", port=listening_port)
+        unreachable = CiscoIOS(ipaddr="127.0.0.1", port=closed_port)
+
+        rh = ReachabilityHelper(timeout=1)
+        devices = list(rh.sweep([reachable, unreachable]))
+
+        assert len(devices) == 2
+        assert reachable.connection_error is None
+        assert unreachable.connection_error is not None
+        assert rh.reachable == 1
+        assert rh.unreachable == 1
+
+    def test_any_port(self, listening_port, closed_port):
+        """ Test a device is reachable if any of the ports accept a connection """
+        device = CiscoIOS(ipaddr="127.0.0.1")
+        list(ReachabilityHelper(ports=(closed_port, listening_port), timeout=1).sweep([device]))
+        assert device.connection_error is None
@@ -0,0 +1,56 @@
+import pytest
+
+from helpers import ShardHelper
+
+
+class Device:
+
+    def __init__(self, ipaddr):
+        self.ipaddr = ipaddr
+
+
+class TestShardHelper:
+
+    def test_parse(self):
+        """ Test a shard is parsed to a zero based index """
+        assert ShardHelper.parse("1/4") == (0, 4)
+        assert ShardHelper.parse("4/4") == (3, 4)
+
+    @pytest.mark.parametrize("shard", ["0/4", "5/4", "1", "a/b"])
+    def test_parse_invalid(self, shard):
+        """ Test a ValueError is raised for an invalid shard """
+        with pytest.raises(ValueError):
+            ShardHelper.parse(shard)
+
+    def test_select_partitions(self):
+        """ Test every device is selected by exactly one shard """
+        devices = [Device(f"10.0.{i // 256}.{i % 256}") for i in range(1000)]
+        shards = [list(ShardHelper.select(devices, i, 4)) for i in range(4)]
+
+        assert sorted(d.ipaddr for s in shards for d in s) == sorted(d.ipaddr for d in devices)
+        assert all(shards)
+
+    def test_shard_of_stable(self):
+        """ Test the shard of a device does not depend on the process hash seed """
+        assert ShardHelper.shard_of("10.0.0.1", 4) == 3
+
+    def test_merge(self, tmp_path):
+        """ Test shard files are merged with a single header """
+        shard_files = []
+        for i, rows in enumerate(["a,1\r\n", "b,2\r\nc,\"3\n4\"\r\n"]):
+            shard_file = tmp_path / ShardHelper.shard_file("results.csv", i, 2)
+            shard_file.write_bytes(f"Hostname,Output\r\n{rows}".encode())
+            shard_files.append(str(shard_file))
+
+        output_file = tmp_path / "results.csv"
+        ShardHelper.merge(shard_files, str(output_file))
+
+        assert output_file.read_bytes() == b"Hostname,Output\r\na,1\r\nb,2\r\nc,\"3\n4\"\r\n"
+
+    def test_merge_mismatched_columns(self, tmp_path):
+        """ Test a ValueError is raised when shard files have different columns """
+        (tmp_path / "1.csv").write_text("Hostname,Output\n")
+        (tmp_path / "2.csv").write_text("Hostname\n")
+
+        with pytest.raises(ValueError):
+            ShardHelper.merge([str(tmp_path / "1.csv"), str(tmp_path / "2.csv")], str(tmp_path / "results.csv"))
@@ -0,0 +1,62 @@
+import pytest
+
+from devices import CachedConnection
+from helpers import TemplateHelper
+
+template = "cisco_ios_show_vstack_config.textfsm"
+
+vstack_output1 = "Role: Client (SmartInstall enabled)\nVstack Director IP address: 0.0.0.0\n"
+vstack_output2 = "Capability: Client\nOper Mode: Enabled\nRole: Client\n"
+
+
+class MockConnection:
+    """ Mocking class for connection, counting the commands sent """
+    def __init__(self, output):
+        self.output = output
+        self.sent = 0
+
+    def send_command(self, command_string):
+        self.sent += 1
+        return self.output
+
+
+class TestTemplateHelper:
+
+    def test_parse_output(self):
+        """ Test output is parsed into a record of each template value """
+        assert TemplateHelper.parse_output(template, vstack_output1) == [
+            {"Role": "Client", "SmartInstall": "enabled", "Capability": "", "OperMode": ""}]
+        assert TemplateHelper.parse_output(template, vstack_output2) == [
+            {"Role": "Client", "SmartInstall": "", "Capability": "Client", "OperMode": "Enabled"}]
+
+    @pytest.mark.parametrize("output", [None, "", "% Invalid input detected at '^' marker.\n"])
+    def test_parse_no_records(self, output):
+        """ Test no records are parsed from output without any template values """
+        assert TemplateHelper.parse_output(template, output) == []
+
+    def test_template_compiled_once(self):
+        """ Test a template is only compiled on first use """
+        TemplateHelper.parse_output(template, vstack_output1)
+        assert TemplateHelper._template(template) is TemplateHelper._template(template)
+
+    def test_parse_cached(self):
+        """ Test records are cached on the connection alongside the command output """
+        connection = CachedConnection(MockConnection(vstack_output2))
+
+        records = TemplateHelper.parse(connection, "show vstack config", template)
+
+        assert TemplateHelper.parse(connection, "sh vstack  config", template) is records
+        assert connection.connection.sent == 1
+
+    def test_parse_uncached(self):
+        """ Test output is parsed from connections which do not cache records """
+        connection = MockConnection(vstack_output1)
+        assert TemplateHelper.parse(connection, "show vstack config", template)[0]["Role"] == "Client"
+
+    def test_match(self):
+        """ Test records are matched by value case insensitively, or by function """
+        records = TemplateHelper.parse_output(template, vstack_output2)
+
+        assert TemplateHelper.match(records, Role="client", OperMode="ENABLED") == records
+        assert TemplateHelper.match(records, Role="Client", SmartInstall="enabled") == []
+        assert TemplateHelper.match(records, Capability=lambda v: v.startswith("Cli")) == records
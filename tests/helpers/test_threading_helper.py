@@ -0,0 +1,209 @@
+import threading
+import time
+
+import pytest
+
+from helpers import ThreadingHelper
+
+
+def times_by(a, **kwargs):
+    return a * kwargs["times_by"]
+
+
+class TestThreadingHelper:
+
+    def test_run(self):
+        """ Test run returns a result for every item """
+        th = ThreadingHelper(worker_func=times_by, worker_func_args={"times_by": 2})
+        assert sorted(th.run([1, 2, 3, 4])) == [2, 4, 6, 8]
+
+    def test_run_empty(self):
+        """ Test run with no items """
+        th = ThreadingHelper(worker_func=times_by, worker_func_args={"times_by": 2})
+        assert th.run([]) == []
+
+    def test_run_more_workers_than_items(self):
+        """ Test workers shut down when there are more workers than items """
+        th = ThreadingHelper(worker_func=times_by, num_of_workers=16, worker_func_args={"times_by": 3})
+        assert sorted(th.run([1, 2])) == [3, 6]
+
+    def test_imap_reads_lazily(self):
+        """ Test results are yielded before the generator of items is exhausted """
+        produced = []
+
+        def items():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        th = ThreadingHelper(worker_func=times_by, num_of_workers=2, worker_func_args={"times_by": 1}, queue_size=2)
+        results = th.imap(items())
+        next(results)
+        assert len(produced) < 1000
+
+    def test_imap_output_bounded(self):
+        """ Test workers stop taking items while the results are not being read """
+        processed = []
+
+        def worker(a):
+            processed.append(a)
+            return a
+
+        th = ThreadingHelper(worker_func=worker, num_of_workers=2, queue_size=2)
+        results = th.imap(range(1000))
+        next(results)
+        time.sleep(0.2)
+        assert len(processed) < 10
+
+    def test_imap_close(self):
+        """ Test the feeder and workers stop once the generator is closed """
+        produced = []
+
+        def items():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        th = ThreadingHelper(worker_func=times_by, num_of_workers=2, worker_func_args={"times_by": 1}, queue_size=2)
+        results = th.imap(items())
+        next(results)
+        results.close()
+        time.sleep(0.3)
+        count = len(produced)
+        time.sleep(0.2)
+        assert len(produced) == count < 1000
+
+    def test_timeout(self):
+        """ Test a hung item is reported through failure_func and does not stall other items """
+        event = threading.Event()
+
+        def job(a):
+            if a == 0:
+                event.wait()
+            return a
+
+        th = ThreadingHelper(worker_func=job, num_of_workers=1, timeout=0.1,
+                             failure_func=lambda item, e: (item, type(e)))
+        start = time.monotonic()
+        results = th.run([0, 1, 2])
+        event.set()
+
+        assert (0, TimeoutError) in results
+        assert 1 in results and 2 in results
+        assert time.monotonic() - start < 5
+
+    def test_failure_raised(self):
+        """ Test worker exceptions are raised when no failure_func is set """
+        def job(a):
+            raise RuntimeError("failed")
+
+        th = ThreadingHelper(worker_func=job)
+        with pytest.raises(RuntimeError):
+            th.run([1])
+
+    def test_failure_func(self):
+        """ Test worker exceptions are passed to failure_func """
+        def job(a):
+            raise RuntimeError("failed")
+
+        th = ThreadingHelper(worker_func=job, failure_func=lambda item, e: str(e))
+        assert th.run([1, 2]) == ["failed", "failed"]
+
+    def test_group_limit(self):
+        """ Test no more than group_limit items of a group run at the same time """
+        lock = threading.Lock()
+        active = {}
+        peak = {}
+
+        def job(item):
+            group = item[0]
+            with lock:
+                active[group] = active.get(group, 0) + 1
+                peak[group] = max(peak.get(group, 0), active[group])
+            time.sleep(0.02)
+            with lock:
+                active[group] -= 1
+            return item
+
+        items = [(g, i) for i in range(10) for g in ("a", "b")]
+        th = ThreadingHelper(worker_func=job, num_of_workers=8, group_func=lambda item: item[0], group_limit=2)
+
+        assert sorted(th.run(items)) == sorted(items)
+        assert peak == {"a": 2, "b": 2}
+
+    def test_group_limit_saturates_workers(self):
+        """ Test items of other groups run while a group is at its limit """
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def job(item):
+            with lock:
+                running.append(item)
+                peak.append(len(running))
+            time.sleep(0.05 if item[0] == "slow" else 0.01)
+            with lock:
+                running.remove(item)
+            return item
+
+        # all items of the slow group come first, so workers must skip ahead to the other groups
+        items = [("slow", i) for i in range(4)] + [(f"g{i}", i) for i in range(6)]
+        th = ThreadingHelper(worker_func=job, num_of_workers=4, group_func=lambda item: item[0], group_limit=1)
+
+        assert sorted(th.run(items)) == sorted(items)
+        assert max(peak) == 4
+
+    def test_group_none_not_limited(self):
+        """ Test items in the group None are not limited """
+        th = ThreadingHelper(worker_func=times_by, worker_func_args={"times_by": 2}, group_func=lambda item: None,
+                             group_limit=1)
+        assert sorted(th.run([1, 2, 3, 4])) == [2, 4, 6, 8]
+
+    def test_group_buffer(self):
+        """ Test all items complete when held back items fill the group buffer """
+        th = ThreadingHelper(worker_func=times_by, num_of_workers=4, worker_func_args={"times_by": 1},
+                             group_func=lambda item: item % 2, group_limit=1, group_buffer=2)
+        assert sorted(th.run(range(20))) == list(range(20))
+
+    def test_timeout_abort(self):
+        """ Test abort_func is called for an item which times out, before failure_func """
+        events = {}
+        calls = []
+
+        def job(a):
+            events[a] = threading.Event()
+            events[a].wait()
+            return a
+
+        def abort(item):
+            calls.append(("abort", item))
+            events[item].set()
+
+        def failed(item, e):
+            calls.append(("failed", item))
+            return item, type(e)
+
+        th = ThreadingHelper(worker_func=job, num_of_workers=1, timeout=0.1, failure_func=failed, abort_func=abort)
+        assert th.run([0]) == [(0, TimeoutError)]
+        assert calls == [("abort", 0), ("failed", 0)]
+
+    def test_timeout_holds_group_slot(self):
+        """ Test the group slot of an item which times out is held until its thread stops """
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def job(item):
+            with lock:
+                running.append(item)
+                peak.append(len(running))
+            time.sleep(0.15 if item == 0 else 0.01)
+            with lock:
+                running.remove(item)
+            return item
+
+        th = ThreadingHelper(worker_func=job, num_of_workers=4, timeout=0.1, failure_func=lambda item, e: -1,
+                             group_func=lambda item: "a", group_limit=1)
+
+        assert sorted(th.run([0, 1, 2])) == [-1, 1, 2]
+        assert max(peak) == 1
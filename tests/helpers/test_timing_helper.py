@@ -0,0 +1,64 @@
+import json
+
+from helpers import TimingHelper
+
+
+class Device:
+
+    def __init__(self, ipaddr, timings):
+        self.ipaddr = ipaddr
+        self.timings = timings
+
+
+class TestTimingHelper:
+
+    def test_percentile(self):
+        """ Test nearest rank percentiles """
+        values = list(range(1, 101))
+        assert TimingHelper.percentile(values, 50) == 50
+        assert TimingHelper.percentile(values, 99) == 99
+        assert TimingHelper.percentile(values, 0) == 1
+        assert TimingHelper.percentile([], 50) is None
+
+    def test_summary(self):
+        """ Test spans are aggregated per phase """
+        timings = TimingHelper()
+        devices = [Device(f"10.0.0.{i}", [("auth", i), ("auth", 1), ("device", i)]) for i in range(1, 5)]
+        list(timings.record(devices))
+
+        summary = timings.summary()
+        assert summary["auth"]["count"] == 8
+        assert summary["auth"]["max"] == 4
+        assert summary["device"]["p50"] == 2
+        assert summary["device"]["total"] == 10
+
+    def test_slowest_devices(self):
+        """ Test only the slowest devices are kept, slowest first """
+        timings = TimingHelper(slowest=2)
+        for i in range(5):
+            timings.update(Device(f"10.0.0.{i}", [("device", i), ("check:CSCvg76186", i / 2)]))
+
+        slowest = timings.slowest_devices()
+        assert [d["ipaddr"] for d in slowest] == ["10.0.0.4", "10.0.0.3"]
+        assert slowest[0]["phases"]["check:CSCvg76186"] == 2
+
+    def test_export(self, tmp_path):
+        """ Test the summary is exported as JSON """
+        timings = TimingHelper()
+        timings.update(Device("10.0.0.1", [("device", 1.5)]))
+        timings.export(str(tmp_path / "timings.json"))
+
+        data = json.loads((tmp_path / "timings.json").read_text())
+        assert data["devices"] == 1
+        assert data["phases"]["device"]["p99"] == 1.5
+        assert data["slowest"][0]["ipaddr"] == "10.0.0.1"
+
+    def test_print_summary(self, capsys):
+        """ Test the summary is printed with a row per phase """
+        timings = TimingHelper()
+        timings.update(Device("10.0.0.1", [("device", 1.5), ("tcp", 0.1)]))
+        timings.print_summary()
+
+        out = capsys.readouterr().out
+        assert "| tcp " in out
+        assert "10.0.0.1" in out
@@ -0,0 +1,300 @@
+import contextlib
+import csv
+import subprocess
+import sys
+
+import bug_checker
+from bug_checker import _check_device, check_bug_failed, check_bug_feedback, device_group, iter_csv, print_bug_summary, scan, write_csv
+from bugs.base_bug import BaseBug
+from bugs.bug_class_mapper import BugClassMapper
+from bugs.bug_index import DeviceTypeIndex
+from devices import AuthenticationException, ConnectionTimeoutException
+
+
+class TestDeviceGroup:
+
+    def test_column(self):
+        """ Test the group is the value of the group column """
+        row = {"IP Address": "10.0.0.1", "Site": "London"}
+        assert device_group(row, group_column="Site", group_prefix=24) == "London"
+
+    def test_prefix(self):
+        """ Test the group is the subnet when the group column is empty """
+        row = {"IP Address": "10.0.0.1", "Site": ""}
+        assert device_group(row, group_column="Site", group_prefix=24) == "10.0.0.0/24"
+
+    def test_no_group(self):
+        """ Test there is no group when neither option is set """
+        assert device_group({"IP Address": "10.0.0.1"}) is None
+
+    def test_invalid_ip(self):
+        """ Test there is no group when the subnet cannot be derived """
+        assert device_group({"IP Address": "switch1"}, group_prefix=24) is None
+
+    def test_iter_csv(self, tmp_path):
+        """ Test iter_csv sets the group of each device """
+        input_file = tmp_path / "devices.csv"
+        input_file.write_text("IP Address,Device Type,Site\n10.0.0.1,cisco_ios,London\n10.0.1.1,cisco_ios,\n")
+
+        devices = list(iter_csv(str(input_file), {}, group_column="Site", group_prefix=24))
+
+        assert [d.group for d in devices] == ["London", "10.0.1.0/24"]
+
+
+class TestStartup:
+
+    def test_ssh_stack_not_imported(self):
+        """ Test importing bug_checker does not import netmiko or paramiko """
+        code = "import sys, bug_checker; print([m for m in ('netmiko', 'paramiko') if m in sys.modules])"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        assert output.strip() == "[]"
+
+    def test_invalid_scan_options(self, tmp_path):
+        """ Test invalid scan options are rejected before the output CSV is created """
+        output_file = tmp_path / "output.csv"
+        for options in (["--grouplimit", "0"], ["--adaptive", "--minworkers", "5", "--maxworkers", "2"]):
+            args = [sys.executable, bug_checker.__file__, "-c", "-b", "TestBug", "-i", "devices.csv",
+                    "-o", str(output_file), *options]
+            output = subprocess.run(args, capture_output=True, text=True, check=True).stdout
+            assert "must be at least 1" in output
+        assert not output_file.exists()
+
+    def test_print_bug_summary(self, capsys):
+        """ Test the bug summary is printed for bugs without a manufacture or CVE ID """
+        print_bug_summary()
+        assert "TestBug" in capsys.readouterr().out
+
+
+class IOSBug:
+    """ Bug which applies to cisco_ios devices """
+    Bug = BaseBug.Bug
+
+    @staticmethod
+    def manufacture_bug_id():
+        return "CSCaa00001"
+
+    @staticmethod
+    def device_type_requirements():
+        return "cisco_ios",
+
+
+class DiscoveredDevice:
+    """ Device which must not be connected to """
+    ipaddr = "10.0.0.1"
+    device_type = ("cisco_ios",)
+    version = "15.0(2)SE12"
+
+    def __init__(self):
+        self.bugs = {}
+        self.skipped_bugs = set()
+
+    def connect(self):
+        raise AssertionError("Device should not be connected to")
+
+
+class TestDeviceTypeIndex:
+
+    def test_other_device_type_not_connected(self):
+        """ Test a device is not connected to when no bug applies to its device type """
+        device = DiscoveredDevice()
+        device.device_type = ("cisco_nxos",)
+        _check_device(device, [IOSBug], type_index=DeviceTypeIndex([IOSBug]))
+
+        assert device.bugs["CSCaa00001"] == IOSBug.Bug(None, "Not applicable to ('cisco_nxos',)")
+        assert device.skipped_bugs == {"CSCaa00001"}
+
+    def test_not_applicable_impacted_empty(self, tmp_path):
+        """ Test the Impacted column is empty for a bug which does not apply to the device type """
+        bug_class = BugClassMapper.get_bug_class(["CSCvg76186"])[0]
+        device = DiscoveredDevice()
+        device.hostname = "nexus1"
+        device.device_type = ("cisco_nxos",)
+        device.connection_error = None
+        _check_device(device, [bug_class])
+
+        output_file = tmp_path / "results.csv"
+        write_csv(str(output_file), ["CSCvg76186"], [device])
+
+        with open(output_file) as f:
+            row = list(csv.reader(f))[1]
+        assert row[4:] == ["", "Not applicable to ('cisco_nxos',)"]
+
+    def test_default_index(self):
+        """ Test bugs are filtered by device type when no index is passed """
+        device = DiscoveredDevice()
+        device.device_type = ("cisco_nxos",)
+        _check_device(device, [IOSBug])
+
+        assert device.skipped_bugs == {"CSCaa00001"}
+
+
+def make_bug(bug_id, enable_mode):
+    """ Create a bug class for cisco_ios devices """
+
+    class Bug(IOSBug):
+
+        @staticmethod
+        def manufacture_bug_id():
+            return bug_id
+
+        @staticmethod
+        def enable_mode_required():
+            return enable_mode
+
+        @staticmethod
+        def commands():
+            return ()
+
+    return Bug
+
+
+class ConnectedDevice(DiscoveredDevice):
+    """ Device recording the bug checks and enable mode transitions """
+    version = "15.0(2)SE11"
+    handshakes = 1
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    @contextlib.contextmanager
+    def session(self):
+        yield self
+
+    def timed(self, phase):
+        return contextlib.nullcontext()
+
+    def enter_enable_mode(self):
+        self.sent.append("enable")
+
+    def send_command_batch(self, commands):
+        pass
+
+    def check_bug(self, bug):
+        self.sent.append(bug.manufacture_bug_id())
+
+
+class TestEnableMode:
+
+    def test_privileged_bugs_last(self):
+        """ Test bugs which do not require enable mode are checked before those that do """
+        device = ConnectedDevice()
+        bugs = [make_bug("CSCaa00001", True), make_bug("CSCaa00002", False), make_bug("CSCaa00003", True)]
+
+        _check_device(device, bugs)
+
+        assert device.sent == ["CSCaa00002", "enable", "CSCaa00001", "enable", "CSCaa00003"]
+
+
+class TestCheckBugFailed:
+
+    def test_timeout_copies_device(self):
+        """ Test a timed out device is reported as a copy, so the abandoned check can not change the result """
+        device = DiscoveredDevice()
+        device.timings = []
+        device.connection = object()
+
+        result = check_bug_failed(device, TimeoutError("timed out"))
+        device.bugs["CSCaa00001"] = IOSBug.Bug(True, "late result")
+
+        assert result is not device
+        assert result.bugs == {} and result.connection is None
+        assert isinstance(result.connection_error, TimeoutError)
+
+    def test_failure_updates_device(self):
+        """ Test other failures are recorded on the device """
+        device = DiscoveredDevice()
+        error = RuntimeError("failed")
+
+        assert check_bug_failed(device, error) is device
+        assert device.connection_error is error
+
+
+class UnreachableDevice:
+    """ Device which failed before being checked, such as in the pre-flight sweep """
+    connect_attempts = 0
+    timings = ()
+
+    def __init__(self, ipaddr):
+        self.ipaddr = ipaddr
+        self.connection_error = "Unreachable"
+
+
+class TestStreaming:
+
+    def test_iter_csv_lazy(self, tmp_path, monkeypatch):
+        """ Test iter_csv creates each device as it is read rather than reading the whole file """
+        input_file = tmp_path / "devices.csv"
+        input_file.write_text("IP Address\n" + "".join(f"10.0.0.{i}\n" for i in range(100)))
+
+        created = []
+        get_device_class = bug_checker.DeviceClassMapper.get_device_class
+        monkeypatch.setattr(bug_checker.DeviceClassMapper, "get_device_class",
+                            lambda device_type: created.append(device_type) or get_device_class(device_type))
+
+        devices = iter_csv(str(input_file), {})
+        assert next(devices).ipaddr == "10.0.0.0"
+        assert len(created) == 1
+
+    def test_scan_lazy(self):
+        """ Test scan yields checked devices before the devices are all read """
+        produced = []
+
+        def devices():
+            for i in range(1000):
+                produced.append(i)
+                yield UnreachableDevice(f"10.0.0.{i}")
+
+        results = scan(devices(), ["CSCvg76186"], worker_threads=2)
+        next(results)
+        assert len(produced) < 1000
+
+    def test_write_csv_flushes_rows(self, tmp_path):
+        """ Test each row is in the output file before the next device is read """
+        output_file = tmp_path / "results.csv"
+        lines = []
+
+        def devices():
+            for i in range(3):
+                lines.append(len(output_file.read_text().splitlines()) if output_file.exists() else 0)
+                yield UnreachableDevice(f"10.0.0.{i}")
+
+        write_csv(str(output_file), ["CSCvg76186"], devices())
+
+        # the header and each earlier row have been written when each device is read
+        assert lines[1:] == [2, 3]
+        assert len(output_file.read_text().splitlines()) == 4
+
+
+class CheckedDevice:
+    """ Device which has been checked """
+
+    def __init__(self, connection_error=None, connect_attempts=1, connect_time=1.0):
+        self.connection_error = connection_error
+        self.connect_attempts = connect_attempts
+        self.connect_time = connect_time
+
+
+class TestCheckBugFeedback:
+
+    def test_success(self):
+        """ Test a device checked without error is not overload """
+        assert check_bug_feedback(CheckedDevice(), latency_target=10)
+
+    def test_timeout(self):
+        """ Test device timeouts and connection timeouts are overload """
+        assert not check_bug_feedback(CheckedDevice(TimeoutError("timed out")))
+        assert not check_bug_feedback(CheckedDevice(ConnectionTimeoutException("timed out")))
+
+    def test_skipped_before_connecting(self):
+        """ Test a device which was not connected to, such as an unreachable device, is not overload """
+        assert check_bug_feedback(CheckedDevice(ConnectionTimeoutException("unreachable"), connect_attempts=0))
+
+    def test_authentication_failure(self):
+        """ Test failed authentication is not overload """
+        assert check_bug_feedback(CheckedDevice(AuthenticationException("failed"), connect_attempts=6))
+
+    def test_latency_per_attempt(self):
+        """ Test the latency target applies to each connection attempt rather than trying every credential set """
+        assert check_bug_feedback(CheckedDevice(connect_attempts=6, connect_time=30), latency_target=10)
+        assert not check_bug_feedback(CheckedDevice(connect_attempts=1, connect_time=30), latency_target=10)